@@ -42,82 +42,117 @@ class AdvancedMOSDACScaper:
             r'\?q=filter/tips/', r'\?q=node/add/', r'\?q=search/', r'\?q=user/'
         ]
         
-        # Priority URLs from sitemap
-        self.sitemap_urls = [
+        # Priority URLs from sitemap, grouped by the category recorded as each page's facet
+        # (section names are the category vocabulary of web/facets.py, CATEGORIES)
+        self.sitemap_sections = {
             # Core pages
-            f"{self.base_url}/",
-            f"{self.base_url}/about-us",
-            f"{self.base_url}/help",
-            f"{self.base_url}/faq-page",
+            "core": [
+                f"{self.base_url}/",
+                f"{self.base_url}/about-us",
+                f"{self.base_url}/help",
+                f"{self.base_url}/faq-page",
+            ],
             
             # Missions
-            f"{self.base_url}/insat-3dr",
-            f"{self.base_url}/insat-3d",
-            f"{self.base_url}/insat-3ds",
-            f"{self.base_url}/kalpana-1",
-            f"{self.base_url}/insat-3a",
-            f"{self.base_url}/megha-tropiques",
-            f"{self.base_url}/saral-altika",
-            f"{self.base_url}/oceansat-2",
-            f"{self.base_url}/oceansat-3",
-            f"{self.base_url}/scatsat-1",
+            "missions": [
+                f"{self.base_url}/insat-3dr",
+                f"{self.base_url}/insat-3d",
+                f"{self.base_url}/insat-3ds",
+                f"{self.base_url}/kalpana-1",
+                f"{self.base_url}/insat-3a",
+                f"{self.base_url}/megha-tropiques",
+                f"{self.base_url}/saral-altika",
+                f"{self.base_url}/oceansat-2",
+                f"{self.base_url}/oceansat-3",
+                f"{self.base_url}/scatsat-1",
+            ],
             
             # Data Catalogs
-            f"{self.base_url}/internal/catalog-satellite",
-            f"{self.base_url}/internal/catalog-insitu",
-            f"{self.base_url}/internal/catalog-radar",
+            "catalogs": [
+                f"{self.base_url}/internal/catalog-satellite",
+                f"{self.base_url}/internal/catalog-insitu",
+                f"{self.base_url}/internal/catalog-radar",
+            ],
             
             # Galleries
-            f"{self.base_url}/internal/gallery",
-            f"{self.base_url}/internal/gallery/weather",
-            f"{self.base_url}/internal/gallery/ocean",
-            f"{self.base_url}/internal/gallery/dwr",
-            f"{self.base_url}/internal/gallery/current",
+            "galleries": [
+                f"{self.base_url}/internal/gallery",
+                f"{self.base_url}/internal/gallery/weather",
+                f"{self.base_url}/internal/gallery/ocean",
+                f"{self.base_url}/internal/gallery/dwr",
+                f"{self.base_url}/internal/gallery/current",
+            ],
             
             # Data Access
-            f"{self.base_url}/internal/uops",
-            f"{self.base_url}/internal/calval-data",
-            f"{self.base_url}/internal/forecast-menu",
+            "data-access": [
+                f"{self.base_url}/internal/uops",
+                f"{self.base_url}/internal/calval-data",
+                f"{self.base_url}/internal/forecast-menu",
+            ],
             
             # Atmosphere Data
-            f"{self.base_url}/bayesian-based-mt-saphir-rainfall",
-            f"{self.base_url}/gps-derived-integrated-water-vapour",
-            f"{self.base_url}/gsmap-isro-rain",
-            f"{self.base_url}/meteosat8-cloud-properties",
+            "atmosphere": [
+                f"{self.base_url}/bayesian-based-mt-saphir-rainfall",
+                f"{self.base_url}/gps-derived-integrated-water-vapour",
+                f"{self.base_url}/gsmap-isro-rain",
+                f"{self.base_url}/meteosat8-cloud-properties",
+            ],
             
             # Land Data
-            f"{self.base_url}/3d-volumetric-terls-dwrproduct",
-            f"{self.base_url}/inland-water-height",
-            f"{self.base_url}/river-discharge",
-            f"{self.base_url}/soil-moisture-0",
+            "land": [
+                f"{self.base_url}/3d-volumetric-terls-dwrproduct",
+                f"{self.base_url}/inland-water-height",
+                f"{self.base_url}/river-discharge",
+                f"{self.base_url}/soil-moisture-0",
+            ],
             
             # Ocean Data
-            f"{self.base_url}/global-ocean-surface-current",
-            f"{self.base_url}/high-resolution-sea-surface-salinity",
-            f"{self.base_url}/indian-mainland-coastal-product",
-            f"{self.base_url}/ocean-subsurface",
-            f"{self.base_url}/oceanic-eddies-detection",
-            f"{self.base_url}/sea-ice-occurrence-probability",
-            f"{self.base_url}/wave-based-renewable-energy",
+            "ocean": [
+                f"{self.base_url}/global-ocean-surface-current",
+                f"{self.base_url}/high-resolution-sea-surface-salinity",
+                f"{self.base_url}/indian-mainland-coastal-product",
+                f"{self.base_url}/ocean-subsurface",
+                f"{self.base_url}/oceanic-eddies-detection",
+                f"{self.base_url}/sea-ice-occurrence-probability",
+                f"{self.base_url}/wave-based-renewable-energy",
+            ],
             
             # Reports
-            f"{self.base_url}/insitu",
-            f"{self.base_url}/calibration-reports",
-            f"{self.base_url}/validation-reports",
-            f"{self.base_url}/data-quality",
-            f"{self.base_url}/weather-reports",
+            "reports": [
+                f"{self.base_url}/insitu",
+                f"{self.base_url}/calibration-reports",
+                f"{self.base_url}/validation-reports",
+                f"{self.base_url}/data-quality",
+                f"{self.base_url}/weather-reports",
+            ],
             
             # Tools and Resources
-            f"{self.base_url}/atlases",
-            f"{self.base_url}/tools",
-            f"{self.base_url}/rss-feed",
+            "tools": [
+                f"{self.base_url}/atlases",
+                f"{self.base_url}/tools",
+                f"{self.base_url}/rss-feed",
+            ],
             
             # Policies
-            f"{self.base_url}/data-access-policy",
-            f"{self.base_url}/copyright-policy",
-            f"{self.base_url}/privacy-policy",
-            f"{self.base_url}/terms-conditions",
-        ]
+            "policies": [
+                f"{self.base_url}/data-access-policy",
+                f"{self.base_url}/copyright-policy",
+                f"{self.base_url}/privacy-policy",
+                f"{self.base_url}/terms-conditions",
+            ],
+        }
+        self.sitemap_urls = [url for urls in self.sitemap_sections.values() for url in urls]
+    
+    def page_facets(self, url: str) -> Dict:
+        """Facet metadata for a sitemap URL: its sitemap category and, for mission pages, the mission
+        
+        Indexing adds every other mission the page's text names (web/facets.py page_facets).
+        """
+        for category, urls in self.sitemap_sections.items():
+            if url in urls:
+                missions = [url.rstrip("/").split("/")[-1]] if category == "missions" else []
+                return {"category": category, "missions": missions}
+        return {"category": "general", "missions": []}
     
     def is_allowed_url(self, url: str) -> bool:
         """Check if URL is allowed based on robots.txt rules"""
@@ -330,6 +365,9 @@ class AdvancedMOSDACScaper:
                 if result.markdown:
                     content_data["markdown"] = result.markdown[:10000]  # Limit size
                 
+                # Record mission/category facets for filtered retrieval
+                content_data["facets"] = self.page_facets(url)
+                
                 # Add extraction timestamp
                 content_data["scraped_at"] = datetime.now().isoformat()
                 
@@ -394,6 +432,7 @@ class AdvancedMOSDACScaper:
                 "headings": page["headings"],
                 "faqs": page["faqs"],
                 "data_products": page["data_products"],
+                "facets": page["facets"],
                 "tables_count": len(page["tables"]),
                 "lists_count": len(page["lists"])
             })
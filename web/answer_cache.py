@@ -0,0 +1,103 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List
+
+
+def answer_cache_key(query_tokens: List[str], doc_versions: List[str], generator: str) -> str:
+    """Hash the normalized query, the identities/versions of the retrieved documents and what generates the answer"""
+    digest = hashlib.sha256()
+    # Answers from a stub or another model must never be served for this one
+    digest.update(generator.encode("utf-8"))
+    digest.update(b"\n")
+    digest.update(" ".join(query_tokens).encode("utf-8"))
+    for version in doc_versions:
+        digest.update(b"\n")
+        digest.update(version.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class AnswerCache:
+    """Persistent LLM answer cache in a local SQLite file with TTL and size-based LRU eviction
+
+    Safe to share between threads and between processes (e.g. several
+    uvicorn workers) pointing at the same file.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024, ttl_seconds: float = 7 * 24 * 3600):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS answers ("
+                "key TEXT PRIMARY KEY, answer TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS answers_last_used ON answers (last_used)")
+
+    def get(self, key: str) -> str:
+        """Return the cached answer for key, or None if absent or expired"""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT answer, created_at FROM answers WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] + self.ttl_seconds <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM answers WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE answers SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, answer: str):
+        """Store an answer, then evict least recently used answers beyond max_bytes"""
+        now = time.time()
+        size = len(answer.encode("utf-8"))
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers (key, answer, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, answer, size, now, now),
+            )
+            self._conn.execute("DELETE FROM answers WHERE created_at + ? <= ?", (self.ttl_seconds, now))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM answers").fetchone()[0]
+            while total > self.max_bytes:
+                oldest = self._conn.execute("SELECT key, size FROM answers ORDER BY last_used LIMIT 1").fetchone()
+                if oldest is None:
+                    break
+                self._conn.execute("DELETE FROM answers WHERE key = ?", (oldest[0],))
+                total -= oldest[1]
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every cached answer"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM answers")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters (this process) plus entries and bytes on disk"""
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM answers").fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": entries,
+                "bytes": total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
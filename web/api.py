@@ -1,7 +1,17 @@
-from fastapi import FastAPI, Request
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from chatbot import MOSDACChatbot
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from chatbot import BATCH_MAX_QUESTIONS, CHAT_WORKERS, MOSDACChatbot, RELOAD_INTERVAL, normalize_query
+from facets import normalize_filters
+from metrics import render_samples
+from singleflight import AsyncSingleFlight
 
 app = FastAPI()
 
@@ -21,16 +31,193 @@ app.add_middleware(
 
 chatbot = MOSDACChatbot()
 
+# Retrieval is CPU-bound and Gemini calls block, so /chat runs them on a bounded
+# worker pool instead of the event loop; the chatbot's generation slots cap concurrent
+# Gemini requests from /chat, /chat/stream and /chat/batch together.
+chat_executor = ThreadPoolExecutor(max_workers=CHAT_WORKERS, thread_name_prefix="chat")
+
+async def run_in_chat_pool(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(chat_executor, partial(func, *args))
+
+# Identical questions arriving together share one in-flight answer
+chat_inflight = AsyncSingleFlight()
+
+@app.on_event("shutdown")
+def shutdown_chat_pool():
+    chat_executor.shutdown(wait=False)
+
+# Pick up new scraped snapshots without a restart; requests in flight finish on the old one
+@app.on_event("startup")
+def start_knowledge_base_reload():
+    if RELOAD_INTERVAL > 0:
+        chatbot.start_auto_reload(RELOAD_INTERVAL)
+
 class ChatRequest(BaseModel):
     message: str
+    # Restrict retrieval by facet, e.g. {"mission": ["insat-3dr"], "category": ["atmosphere"]}
+    filters: Optional[Dict[str, List[str]]] = None
+    # Conversation to answer in (from POST /sessions), so follow-up questions keep their context
+    session_id: Optional[str] = None
 
 class ChatResponse(BaseModel):
     answer: str
+    # Which path answered: faq, cache, no_results, llm or error
+    answered_by: str = "llm"
+    # Page of the matched FAQ when answered_by is "faq"
+    source_url: Optional[str] = None
+    # Retrieved documents: {"title", "url", "snippets": [{"text", "highlights": [[start, end], ...]}]}
+    sources: List[Dict] = []
+    session_id: Optional[str] = None
+
+class BatchChatRequest(BaseModel):
+    # At most MOSDAC_BATCH_MAX_QUESTIONS questions (422 otherwise)
+    questions: List[str] = Field(max_length=BATCH_MAX_QUESTIONS)
+    concurrency: int = 4
+
+def validated_filters(filters):
+    try:
+        return normalize_filters(filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def validated_session(session_id):
+    if session_id is not None and session_id not in chatbot.sessions:
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return session_id
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(req: ChatRequest):
-    answer = chatbot.generate_response(req.message)
-    return ChatResponse(answer=answer)
+    filters = validated_filters(req.filters)
+    session_id = validated_session(req.session_id)
+    with chatbot.metrics.time("chat"):
+        try:
+            reply = await chat_inflight.do(
+                (normalize_query(req.message), json.dumps(filters, sort_keys=True), session_id),
+                lambda: run_in_chat_pool(chatbot.answer, req.message, filters, session_id),
+            )
+        except KeyError:
+            # The session expired or was evicted after validation
+            raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return ChatResponse(**reply, session_id=session_id)
+
+# Server-Sent Events: one `data: {"text": ...}` event per chunk, then `event: done` with timings
+# and which path answered, or `event: error` if the session expired after the response started
+@app.post("/chat/stream")
+def chat_stream_endpoint(req: ChatRequest):
+    filters = validated_filters(req.filters)
+    session_id = validated_session(req.session_id)
+
+    def events():
+        start = time.perf_counter()
+        first_token_ms = None
+        info = {}
+        try:
+            for text in chatbot.generate_response_stream(req.message, filters, info, session_id):
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                yield f"data: {json.dumps({'text': text})}\n\n"
+        except KeyError:
+            # The session expired or was evicted after validation
+            yield f"event: error\ndata: {json.dumps({'status': 404, 'detail': 'Unknown or expired session'})}\n\n"
+            return
+        total_ms = (time.perf_counter() - start) * 1000
+        print(f"⏱️ Streamed answer: first token {first_token_ms or 0:.0f} ms, total {total_ms:.0f} ms")
+        yield f"event: done\ndata: {json.dumps({'ttft_ms': first_token_ms, 'total_ms': total_ms, 'session_id': session_id, **info})}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Newline-delimited JSON, one {"index", "question", "answer", "answered_by", "source_url"} object per question as it completes
+@app.post("/chat/batch")
+def chat_batch_endpoint(req: BatchChatRequest):
+    concurrency = max(1, min(req.concurrency, CHAT_WORKERS))
+
+    def results():
+        for index, reply in chatbot.generate_responses(req.questions, concurrency):
+            yield json.dumps({"index": index, "question": req.questions[index], **reply}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+# Start a conversation: pass the returned session_id with each /chat message. Sessions
+# end after MOSDAC_SESSION_IDLE_TTL idle seconds, or earlier when the memory cap is hit
+@app.post("/sessions")
+def create_session():
+    return {"session_id": chatbot.sessions.create()}
+
+@app.delete("/sessions/{session_id}")
+def delete_session(session_id: str):
+    if not chatbot.sessions.delete(session_id):
+        raise HTTPException(status_code=404, detail="Unknown or expired session")
+    return {"deleted": session_id}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return {
+        "search": chatbot.search_cache.stats(),
+        "answers": chatbot.answer_cache.stats() if chatbot.answer_cache else None,
+        "coalescing": {"api": chat_inflight.stats(), "chatbot": chatbot.inflight.stats()},
+    }
+
+# Prometheus text format: per-stage latency histograms (with recent p50/p95/p99), answers
+# by path, errors and prompt sizes, plus cache, coalescing and session counters; 404 when
+# MOSDAC_METRICS=0
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    if not chatbot.metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (MOSDAC_METRICS=0)")
+    caches = {"search": chatbot.search_cache.stats()}
+    if chatbot.answer_cache is not None:
+        caches["answers"] = chatbot.answer_cache.stats()
+    coalescing = {"api": chat_inflight.stats(), "chatbot": chatbot.inflight.stats()}
+    sessions = chatbot.sessions.stats()
+    kb_status = chatbot.kb.status()
+    text = chatbot.metrics.render()
+    for counter in ("hits", "misses", "evictions"):
+        text += render_samples(f"mosdac_cache_{counter}_total", "counter", f"Cache {counter} by cache",
+                               [({"cache": name}, stats[counter]) for name, stats in caches.items()])
+    text += render_samples("mosdac_coalesced_total", "counter", "Requests that joined an in-flight identical request",
+                           [({"layer": name}, stats["coalesced"]) for name, stats in coalescing.items()])
+    text += render_samples("mosdac_sessions", "gauge", "Live conversation sessions", [({}, sessions["sessions"])])
+    text += render_samples("mosdac_session_bytes", "gauge", "Bytes held by conversation sessions", [({}, sessions["bytes"])])
+    text += render_samples("mosdac_knowledge_base_pages", "gauge", "Pages in the knowledge base serving queries",
+                           [({"version": kb_status["version"]}, kb_status["pages"])])
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+# Data product catalog search (typeahead: the last word matches as a prefix), paginated
+# with offset/limit (at most 100 per page); no LLM call
+@app.get("/products")
+def products(q: str = "", offset: int = Query(0, ge=0), limit: int = Query(10, ge=1)):
+    product_index = chatbot.kb.product_index
+    if product_index is None:
+        raise HTTPException(status_code=503, detail="Product search needs NumPy")
+    start = time.perf_counter()
+    page = product_index.search(q, offset, limit)
+    page["took_ms"] = (time.perf_counter() - start) * 1000
+    return page
+
+# Facet values that /chat filters accept, with their page counts
+@app.get("/facets")
+def facets():
+    values = {}
+    for key, count in sorted(chatbot.kb.facet_counts.items()):
+        facet_type, value = key.split(":", 1)
+        values.setdefault(facet_type, {})[value] = count
+    return values
+
+# Version and size of the knowledge base currently serving queries, the generation
+# backend, and the live conversation sessions (count and bytes held)
+@app.get("/status")
+def status():
+    return {
+        "status": "ok",
+        "knowledge_base": chatbot.kb.status(),
+        "generation_backend": chatbot.backend.name,
+        "sessions": chatbot.sessions.stats(),
+    }
 
 @app.get("/")
 def root():
@@ -0,0 +1,191 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from mapped_store import MappedStore, MappedVocabulary, vocabulary_arrays
+
+# Per-field weights: short, curated fields count for more than long page bodies
+DEFAULT_FIELD_WEIGHTS = {
+    "title": 3.0,
+    "description": 1.5,
+    "headings": 2.0,
+    "faqs": 2.0,
+    "data_products": 1.5,
+    "tables": 1.0,
+    "main_content": 1.0,
+}
+
+# Per-field length normalisation (titles barely vary, bodies vary a lot)
+DEFAULT_FIELD_B = {
+    "title": 0.3,
+    "description": 0.5,
+    "headings": 0.6,
+    "faqs": 0.75,
+    "data_products": 0.75,
+    "tables": 0.75,
+    "main_content": 0.75,
+}
+
+
+# Function, filler and question words that say nothing about what a question is after,
+# skipped when locating query words in text (snippet windows) and picking topic words;
+# BM25 discounts them by IDF instead. FAQ matching keeps question words (faq_index.py)
+STOPWORDS = {
+    "a", "an", "the", "to", "of", "i", "my", "me", "do", "does", "did", "is", "are", "am", "be",
+    "can", "could", "in", "on", "for", "from", "and", "or", "it", "this", "that", "with", "at",
+    "by", "there", "we", "you", "your", "please", "tell", "about", "s", "how", "what", "which",
+    "where", "when", "why", "who", "get",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into the lowercase word tokens used throughout the search code"""
+    return re.findall(r'\w+', text.lower())
+
+
+class BM25FIndex:
+    """BM25F ranking over a sparse term-document matrix.
+
+    The saturated, IDF-weighted term scores only depend on the documents, so
+    they are precomputed once at build time. Scoring a query is then a single
+    sparse matrix-vector product over the columns of the query terms.
+    """
+
+    def __init__(self, field_weights: Dict[str, float] = None, field_b: Dict[str, float] = None, k1: float = 1.2):
+        self.field_weights = dict(field_weights or DEFAULT_FIELD_WEIGHTS)
+        self.field_b = {field: (field_b or DEFAULT_FIELD_B).get(field, 0.75) for field in self.field_weights}
+        self.k1 = k1
+        self.vocabulary = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.matrix = sparse.csc_matrix((0, 0), dtype=np.float32)
+        self.num_docs = 0
+
+    def fit(self, docs: List[Dict[str, str]]) -> "BM25FIndex":
+        """Build the index from documents given as {field: text} dicts"""
+        self.num_docs = len(docs)
+        fields = list(self.field_weights)
+
+        # Tokenise each field once and record its length
+        field_tokens = [[tokenize(doc.get(field, "")) for field in fields] for doc in docs]
+        lengths = np.array([[len(tokens) for tokens in doc] for doc in field_tokens], dtype=np.float32).reshape(-1, len(fields))
+        avg_lengths = lengths.mean(axis=0) if self.num_docs else np.ones(len(fields), dtype=np.float32)
+        avg_lengths[avg_lengths == 0] = 1.0
+
+        # Accumulate length-normalised, field-weighted term frequencies
+        rows, cols, values = [], [], []
+        for doc_id, doc in enumerate(field_tokens):
+            weighted_tf = {}
+            for field_index, tokens in enumerate(doc):
+                if not tokens:
+                    continue
+                field = fields[field_index]
+                b = self.field_b[field]
+                norm = 1.0 - b + b * lengths[doc_id, field_index] / avg_lengths[field_index]
+                weight = self.field_weights[field] / norm
+                for token in tokens:
+                    term_id = self.vocabulary.setdefault(token, len(self.vocabulary))
+                    weighted_tf[term_id] = weighted_tf.get(term_id, 0.0) + weight
+            rows.extend([doc_id] * len(weighted_tf))
+            cols.extend(weighted_tf.keys())
+            values.extend(weighted_tf.values())
+
+        tf = sparse.csc_matrix(
+            (np.array(values, dtype=np.float32), (np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32))),
+            shape=(self.num_docs, len(self.vocabulary)),
+        )
+
+        # Robertson-Sparck Jones IDF, kept non-negative
+        df = np.diff(tf.indptr).astype(np.float32)
+        self.idf = np.log1p((self.num_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        # Saturate the pseudo term frequency and fold in the IDF column by column
+        saturated = tf.copy()
+        saturated.data = saturated.data / (self.k1 + saturated.data)
+        self.matrix = (saturated @ sparse.diags(self.idf)).tocsc().astype(np.float32)
+        return self
+
+    def _term_ids(self, query: str) -> set:
+        """Column IDs of the query tokens present in the vocabulary"""
+        term_ids = {self.vocabulary.get(token) for token in set(tokenize(query))}
+        term_ids.discard(None)
+        return term_ids
+
+    def score(self, query: str, doc_ids: np.ndarray = None) -> np.ndarray:
+        """Return the BM25F score of every document (or just of doc_ids) for the query"""
+        term_ids = sorted(self._term_ids(query))
+        if not term_ids:
+            return np.zeros(self.num_docs if doc_ids is None else len(doc_ids), dtype=np.float32)
+        columns = self.matrix[:, term_ids]
+        if doc_ids is not None:
+            columns = columns[doc_ids]
+        return np.asarray(columns.sum(axis=1)).ravel()
+
+    def score_batch(self, queries: List[str]) -> np.ndarray:
+        """Score many queries in one sparse product; returns a (queries, docs) array"""
+        rows, cols = [], []
+        for row, query in enumerate(queries):
+            term_ids = self._term_ids(query)
+            rows.extend([row] * len(term_ids))
+            cols.extend(term_ids)
+        query_matrix = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32))),
+            shape=(len(queries), len(self.vocabulary)),
+        )
+        return (query_matrix @ self.matrix.T).toarray()
+
+    def top_k(self, query: str, k: int, doc_ids: np.ndarray = None) -> List[Tuple[int, float]]:
+        """Return up to k (doc_id, score) pairs with a positive score, best first
+
+        doc_ids (sorted) restricts scoring to that subset of documents.
+        """
+        return top_k_scores(self.score(query, doc_ids), k, doc_ids)
+
+    def to_arrays(self, name: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and metadata that from_store needs, for writing to a mapped store"""
+        arrays = vocabulary_arrays(f"{name}.vocabulary", self.vocabulary)
+        arrays[f"{name}.data"] = self.matrix.data
+        arrays[f"{name}.indices"] = self.matrix.indices
+        arrays[f"{name}.indptr"] = self.matrix.indptr
+        arrays[f"{name}.idf"] = self.idf
+        meta = {
+            "field_weights": self.field_weights,
+            "field_b": self.field_b,
+            "k1": self.k1,
+            "num_docs": self.num_docs,
+            "num_terms": len(self.vocabulary),
+        }
+        return arrays, meta
+
+    @classmethod
+    def from_store(cls, store: MappedStore, name: str, meta: Dict[str, Any]) -> "BM25FIndex":
+        """Rebuild an index whose matrix and vocabulary are views into a mapped store"""
+        index = cls(meta["field_weights"], meta["field_b"], meta["k1"])
+        index.num_docs = meta["num_docs"]
+        index.vocabulary = MappedVocabulary(store, f"{name}.vocabulary")
+        index.idf = store.array(f"{name}.idf")
+        index.matrix = sparse.csc_matrix(
+            (store.array(f"{name}.data"), store.array(f"{name}.indices"), store.array(f"{name}.indptr")),
+            shape=(meta["num_docs"], meta["num_terms"]),
+            copy=False,
+        )
+        return index
+
+
+def top_k_scores(scores: np.ndarray, k: int, doc_ids: np.ndarray = None) -> List[Tuple[int, float]]:
+    """Select the k best positive scores with argpartition, ties broken by doc ID
+
+    When scores cover only the (sorted) doc_ids subset, positions are mapped
+    back to those IDs.
+    """
+    if k <= 0:
+        return []
+    candidates = np.flatnonzero(scores > 0)
+    if len(candidates) > k:
+        candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+    order = np.lexsort((candidates, -scores[candidates]))
+    ranked = candidates[order]
+    if doc_ids is None:
+        return [(int(i), float(scores[i])) for i in ranked]
+    return [(int(doc_ids[i]), float(scores[i])) for i in ranked]
@@ -1,220 +1,604 @@
 import json
-import google.generativeai as genai
-from typing import List, Dict
+from typing import List, Dict, Iterator
 import os
 from dotenv import load_dotenv
 import re
+import threading
+import time
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from answer_cache import AnswerCache, answer_cache_key
+from cache import LRUCache
+from context_builder import assemble_context, estimate_tokens
+from facets import detect_facets, normalize_filters
+from generation import BACKENDS, GenerationBackend, create_backend
+from knowledge_base import KnowledgeBase, find_latest_snapshot, snapshot_version
+from metrics import Metrics
+from sessions import SessionStore, follow_up_query
+from singleflight import SingleFlight
+
+try:
+    from bm25 import top_k_scores
+except ImportError:  # NumPy/SciPy not installed: keyword ranking only
+    top_k_scores = None
 
 load_dotenv()
 
+# Ranking used by search_relevant_content unless the caller picks another
+DEFAULT_RANKING = "hybrid"
+
+# Hybrid retrieval: candidates taken from each retriever and the RRF damping constant
+HYBRID_CANDIDATE_BUDGET = 50
+RRF_K = 60
+
+# Fixed replies used when Gemini is not (successfully) called
+NO_RESULTS_MESSAGE = "I couldn't find specific information about that topic in the MOSDAC website data. Please try asking about satellite data, weather forecasting, oceanographic data, or other MOSDAC services."
+ERROR_MESSAGE = "I apologize, but I encountered an error while generating a response: {error}. Please try rephrasing your question or ask about specific MOSDAC services, satellite data, or weather information."
+
+# Retrieval result cache: entry bound and time-to-live in seconds
+SEARCH_CACHE_SIZE = int(os.getenv("MOSDAC_SEARCH_CACHE_SIZE", "1024"))
+SEARCH_CACHE_TTL = float(os.getenv("MOSDAC_SEARCH_CACHE_TTL", "600"))
+
+# Persistent answer cache (SQLite); set MOSDAC_ANSWER_CACHE_PATH="" to disable
+ANSWER_CACHE_PATH = os.getenv(
+    "MOSDAC_ANSWER_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "cache", "answers.sqlite3"),
+)
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("MOSDAC_ANSWER_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+ANSWER_CACHE_TTL = float(os.getenv("MOSDAC_ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+
+# Approximate token budget for the document context in each prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("MOSDAC_CONTEXT_TOKEN_BUDGET", "2500"))
+
+# Passage-level retrieval: how many passages to keep per page
+PASSAGES_PER_PAGE = 3
+
+# Send passages' query-biased snippets to Gemini instead of their full text
+SNIPPET_CONTEXT = os.getenv("MOSDAC_SNIPPET_CONTEXT", "1") != "0"
+
+# Rank pages carrying the missions/categories a question mentions higher, multiplying
+# their scores by 1 + AUTO_FACET_BOOST (explicit filters restrict instead)
+AUTO_FACETS = os.getenv("MOSDAC_AUTO_FACETS", "1") != "0"
+AUTO_FACET_BOOST = float(os.getenv("MOSDAC_AUTO_FACET_BOOST", "0.5"))
+
+# Seconds between checks for a new scraped snapshot (0 disables hot reload)
+RELOAD_INTERVAL = float(os.getenv("MOSDAC_RELOAD_INTERVAL", "60"))
+
+# Close vocabulary terms added per unknown query word ("insat3dr" -> insat, 3dr); 0 disables
+FUZZY_MAX_VARIANTS = int(os.getenv("MOSDAC_FUZZY_MAX_VARIANTS", "3"))
+
+# Passage score boost for containing all consecutive query word pairs close together; 0 disables
+PROXIMITY_WEIGHT = float(os.getenv("MOSDAC_PROXIMITY_WEIGHT", "0.5"))
+
+# Questions this similar (cosine, 0-1) to a stored FAQ get its answer without Gemini; above 1 disables
+FAQ_MATCH_THRESHOLD = float(os.getenv("MOSDAC_FAQ_THRESHOLD", "0.75"))
+
+# Conversation sessions: memory cap, seconds idle before a session is dropped, and
+# turns kept verbatim in prompts (older turns are compacted into a short summary)
+SESSION_MAX_BYTES = int(os.getenv("MOSDAC_SESSION_MAX_BYTES", str(16 * 1024 * 1024)))
+SESSION_IDLE_TTL = float(os.getenv("MOSDAC_SESSION_IDLE_TTL", "1800"))
+SESSION_RECENT_TURNS = int(os.getenv("MOSDAC_SESSION_RECENT_TURNS", "3"))
+
+# Where answers are generated: gemini (needs GEMINI_API_KEY), stub (offline, see
+# MOSDAC_STUB_* in generation.py) or http (an LLM server at MOSDAC_LLM_URL)
+LLM_BACKEND = os.getenv("MOSDAC_LLM_BACKEND", "gemini")
+
+# Answers generated at once across /chat, /chat/stream, /chat/batch and batch files;
+# /chat's worker pool has the same size
+CHAT_WORKERS = int(os.getenv("MOSDAC_CHAT_WORKERS", "16"))
+
+# Most questions one /chat/batch request may carry, and how many questions a batch scores
+# at once (each chunk holds a queries x passages score array)
+BATCH_MAX_QUESTIONS = int(os.getenv("MOSDAC_BATCH_MAX_QUESTIONS", "100"))
+BATCH_SCORE_CHUNK = 32
+
+# Per-stage latency histograms and answer/error counters, served at /metrics; 0 disables
+METRICS_ENABLED = os.getenv("MOSDAC_METRICS", "1") != "0"
+
+def normalize_query(query: str) -> str:
+    """Lowercase word tokens joined by single spaces, used to spot repeated questions"""
+    return " ".join(re.findall(r'\w+', query.lower()))
+
+def quoted_phrases(query: str) -> List[List[str]]:
+    """Word lists of the multi-word "quoted phrases" in a query"""
+    phrases = (re.findall(r'\w+', phrase.lower()) for phrase in re.findall(r'"([^"]+)"', query))
+    return [words for words in phrases if len(words) > 1]
+
+def _facets_key(facets: Dict[str, List[str]]) -> tuple:
+    """Hashable form of a {facet_type: values} mapping"""
+    return tuple(sorted((facet_type, tuple(values)) for facet_type, values in facets.items()))
+
+def _search_cache_key(kb, query: str, query_words: set, top_k: int, ranking: str, candidate_budget: int,
+                      facets: Dict[str, List[str]], explicit: bool) -> tuple:
+    """Search cache key: the word set and options, plus quoted phrases (which restrict what a query matches)"""
+    phrases = tuple(tuple(words) for words in quoted_phrases(query))
+    return (kb.version, tuple(sorted(query_words)), phrases, top_k, ranking, candidate_budget, _facets_key(facets), explicit)
+
+def _reply(answer: str, answered_by: str, source_url: str = None, sources: List[Dict] = None) -> Dict:
+    """Answer plus which path produced it (faq, cache, no_results, llm or error) and the documents it drew on"""
+    return {"answer": answer, "answered_by": answered_by, "source_url": source_url, "sources": sources or []}
+
+def _sources(relevant_docs: List[dict]) -> List[Dict]:
+    """Title, URL and highlighted snippets of each retrieved document, for showing alongside an answer"""
+    return [{"title": doc["title"], "url": doc["url"], "snippets": doc.get("snippets", [])} for doc in relevant_docs]
+
+def reciprocal_rank_fusion(rankings: List[List[tuple]], k: int = RRF_K) -> List[tuple]:
+    """Merge ranked (item_id, score) lists by summing 1 / (k + rank) across lists"""
+    fused = {}
+    for ranking in rankings:
+        for rank, (item_id, _) in enumerate(ranking, 1):
+            fused[item_id] = fused.get(item_id, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
 class MOSDACChatbot:
-    def __init__(self):
-        # Initialize Gemini client using official SDK
-        api_key = os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_API_KEY environment variable not set")
-        
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
-        self.knowledge_base = self.load_scraped_data()
+    def __init__(self, backend: GenerationBackend = None):
+        # Answer generation (Gemini unless MOSDAC_LLM_BACKEND picks another, or one is passed in);
+        # every call holds one of CHAT_WORKERS slots, whichever path it comes from
+        self.backend = backend if backend is not None else create_backend(LLM_BACKEND)
+        self.generation_slots = threading.BoundedSemaphore(max(1, CHAT_WORKERS))
+        # Cached search results, keyed on normalized query tokens and search options
+        self.search_cache = LRUCache(max_entries=SEARCH_CACHE_SIZE, ttl_seconds=SEARCH_CACHE_TTL)
+        # Generated answers persisted across restarts, keyed on query + retrieved documents
+        self.answer_cache = None
+        if ANSWER_CACHE_PATH:
+            self.answer_cache = AnswerCache(ANSWER_CACHE_PATH, max_bytes=ANSWER_CACHE_MAX_BYTES, ttl_seconds=ANSWER_CACHE_TTL)
+        # Concurrent identical questions share one retrieval + Gemini call
+        self.inflight = SingleFlight()
+        # Multi-turn conversations, so follow-up questions keep their context
+        self.sessions = SessionStore(SESSION_MAX_BYTES, SESSION_IDLE_TTL, SESSION_RECENT_TURNS)
+        self.context_token_budget = CONTEXT_TOKEN_BUDGET
+        # Stage latencies and answer counters (no-ops when MOSDAC_METRICS=0)
+        self.metrics = Metrics(enabled=METRICS_ENABLED)
+        # Current snapshot and its indexes, replaced wholesale by reload_if_changed
+        self._reload_lock = threading.Lock()
+        self.load_scraped_data()
         
     def load_scraped_data(self) -> List[Dict]:
         """Load the latest scraped MOSDAC content from data/mosdac_content/"""
-        import glob
-        import os
-        # Get the path relative to the project root (parent of web directory)
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        data_path = os.path.join(project_root, "data", "mosdac_content", "pages_*.json")
-        files = glob.glob(data_path)
-        if not files:
+        latest_file = find_latest_snapshot()
+        if not latest_file:
             print("❌ No scraped data found in data/mosdac_content/. Please run the scraper first.")
+            self._swap(KnowledgeBase([]))
             return []
-        latest_file = max(files, key=os.path.getctime)
         print(f"📂 Loading scraped data from: {latest_file}")
         
-        with open(latest_file, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # Map the compiled artifact, compiling it first if it is missing or stale
+        kb = KnowledgeBase.load(latest_file)
+        data = kb.pages
         
-        # Display comprehensive data statistics
+        # Display comprehensive data statistics (precomputed at build time)
+        stats = kb.stats
         print(f"✅ Loaded {len(data)} pages of data")
+        print(f"📋 FAQs: {stats['faqs']} found across {stats['pages_with_faqs']} pages")
+        print(f"🛰️ Data products: {stats['data_products']} found across {stats['pages_with_data_products']} pages")
+        print(f"📊 Tables: {stats['tables']} found across {stats['pages_with_tables']} pages") 
+        print(f"📝 Lists: {stats['lists']} found across {stats['pages_with_lists']} pages")
         
-        # Check structured content availability
-        has_faqs = sum(1 for page in data if page.get("faqs"))
-        has_data_products = sum(1 for page in data if page.get("data_products"))
-        has_tables = sum(1 for page in data if page.get("tables"))
-        has_lists = sum(1 for page in data if page.get("lists"))
-        
-        total_faqs = sum(len(page.get("faqs", [])) for page in data)
-        total_data_products = sum(len(page.get("data_products", [])) for page in data)
-        total_tables = sum(len(page.get("tables", [])) for page in data)
-        total_lists = sum(len(page.get("lists", [])) for page in data)
-        
-        print(f"📋 FAQs: {total_faqs} found across {has_faqs} pages")
-        print(f"🛰️ Data products: {total_data_products} found across {has_data_products} pages")
-        print(f"📊 Tables: {total_tables} found across {has_tables} pages") 
-        print(f"📝 Lists: {total_lists} found across {has_lists} pages")
+        self._swap(kb)
+        self.metrics.observe("mosdac_stage_seconds", kb.load_ms / 1000, stage="load")
+        print(f"🔍 Search index: {len(kb.inverted_index)} unique terms")
+        if kb.faq_index is not None:
+            print(f"💬 FAQ fast path: {len(kb.faq_index)} questions indexed")
+        print(f"⏱️ Knowledge base ready in {kb.load_ms:.0f} ms (from {kb.loaded_from})")
         print("🤖 Chatbot ready with comprehensive MOSDAC knowledge!")
         
         return data
     
-    def search_relevant_content(self, query: str, top_k: int = 5) -> List[dict]:
-        """Enhanced search in scraped content with better scoring"""
-        relevant_content = []
-        query_words = set(re.findall(r'\w+', query.lower()))
+    def _swap(self, kb: KnowledgeBase):
+        """Atomically make kb the knowledge base new searches use
         
-        for page in self.knowledge_base:
-            score = 0
-            content_parts = []
-            
-            # Get all text content from the page
-            title = page.get("title", "")
-            url = page.get("url", "")
-            description = page.get("description", "")
-            main_content = page.get("main_content", "")
-            markdown = page.get("markdown", "")
-            
-            # Get structured content
-            headings = page.get("headings", [])
-            tables = page.get("tables", [])
-            lists = page.get("lists", [])
-            faqs = page.get("faqs", [])
-            data_products = page.get("data_products", [])
-            
-            # Combine all text content
-            headings_text = " ".join([h.get("text", "") for h in headings])
-            tables_text = " ".join([
-                " ".join(table.get("headers", []) + [" ".join(row) for row in table.get("rows", [])])
-                for table in tables
-            ])
-            lists_text = " ".join([
-                " ".join(lst.get("items", []))
-                for lst in lists
-            ])
-            faqs_text = " ".join([
-                f"{faq.get('question', '')} {faq.get('answer', '')}"
-                for faq in faqs
-            ])
-            products_text = " ".join([
-                f"{prod.get('title', '')} {prod.get('description', '')}"
-                for prod in data_products
-            ])
+        Searches already running keep the reference they started with and
+        finish on the old snapshot; cached results are keyed on the version.
+        """
+        self.kb = kb
+        self.search_cache.clear()
+    
+    def reload_if_changed(self) -> bool:
+        """Load and swap in a newer snapshot if one has appeared; return whether it did
+        
+        The new snapshot is compiled to its artifact in a subprocess while the
+        current one keeps serving, so requests are not stalled by the build;
+        when several workers reload at once, one compiles and the others map
+        what it wrote, so they keep sharing one copy. A
+        snapshot that cannot be read yet (e.g. still being written) is
+        retried on the next call.
+        """
+        with self._reload_lock:
+            latest_file = find_latest_snapshot()
+            if not latest_file or snapshot_version(latest_file) == self.kb.version:
+                return False
+            print(f"🔄 New snapshot found: {latest_file}")
+            try:
+                kb = KnowledgeBase.load(latest_file, build_in_subprocess=True)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Could not load {latest_file}, keeping {self.kb.version}: {e}")
+                self.metrics.inc("mosdac_errors_total", stage="load")
+                return False
+            previous = self.kb.version
+            self._swap(kb)
+            self.metrics.observe("mosdac_stage_seconds", kb.load_ms / 1000, stage="load")
+            print(f"✅ Knowledge base swapped {previous} -> {kb.version} "
+                  f"({len(kb.pages)} pages, loaded from {kb.loaded_from} in {kb.load_ms:.0f} ms)")
+            return True
+    
+    def start_auto_reload(self, interval: float = RELOAD_INTERVAL) -> threading.Thread:
+        """Poll the data directory for new snapshots every interval seconds on a daemon thread"""
+        def poll():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    print(f"⚠️ Knowledge base reload failed: {e}")
+        
+        thread = threading.Thread(target=poll, name="kb-reload", daemon=True)
+        thread.start()
+        return thread
+    
+    # Read-only views of the current snapshot
+    @property
+    def knowledge_base(self) -> List[Dict]:
+        return self.kb.pages
+    
+    @property
+    def snapshot_id(self) -> str:
+        return self.kb.version
+    
+    @property
+    def page_records(self) -> List[Dict]:
+        return self.kb.page_records
+    
+    @property
+    def inverted_index(self) -> Dict[str, List[int]]:
+        return self.kb.inverted_index
+    
+    @property
+    def passages(self) -> List[Dict]:
+        return self.kb.passages
+    
+    def search_relevant_content(self, query: str, top_k: int = 5, ranking: str = DEFAULT_RANKING,
+                                candidate_budget: int = HYBRID_CANDIDATE_BUDGET, filters: Dict[str, List[str]] = None,
+                                info: Dict = None) -> List[dict]:
+        """Enhanced search in scraped content with better scoring
+        
+        ranking selects the scorer: "hybrid" (passage BM25 and dense vectors
+        fused with reciprocal rank fusion, taking candidate_budget candidates
+        from each), "passage" (BM25 over page passages, whose text replaces the
+        page prefix as context), "dense" (offline semantic vectors over the
+        same passages), "bm25f" (field-weighted BM25 over whole pages) or
+        "keyword" (word overlap plus fixed boosts). The vector rankings fall
+        back to the keyword scorer when NumPy/SciPy are unavailable.
+        
+        filters ({"mission": [...], "category": [...]}) restricts scoring to
+        pages with any of the listed values of every given facet. Without
+        filters, pages carrying any mission or domain named in the query are
+        boosted, but every page is still searched.
+        
+        Query words missing from the snapshot's vocabulary are expanded into
+        close terms first (split, joined or one typo away).
+        
+        Results are served from self.search_cache when the same normalized
+        query was searched recently with the same options. If given, info
+        is filled with the facets that restricted or boosted the search under
+        "facets", and per-retriever latencies (ms) under "timings" on a cache
+        miss.
+        """
+        with self.metrics.time("search"):
+            kb = self.kb
+            facets, explicit = self._resolve_facets(query, filters)
+            if info is not None:
+                info["facets"] = facets
+            query, query_words = self._expand_query(kb, query)
+            cache_key = _search_cache_key(kb, query, query_words, top_k, ranking, candidate_budget, facets, explicit)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                return [dict(result) for result in cached]
             
-            # Use structured content if available, otherwise fall back to markdown
-            if main_content or headings_text or tables_text:
-                full_content = f"{title} {description} {main_content} {headings_text} {tables_text} {lists_text} {faqs_text} {products_text}".lower()
-                structured_data = page.get("structured_data", "")
+            results = self._faceted_search(kb, query, query_words, top_k, ranking, candidate_budget, facets, explicit, info)
+            self.search_cache.put(cache_key, results)
+            return [dict(result) for result in results]
+    
+    def _expand_query(self, kb: KnowledgeBase, query: str) -> tuple:
+        """Return (query, query_words) with close vocabulary terms added for words the snapshot lacks"""
+        words = re.findall(r'\w+', query.lower())
+        if kb.term_expander is not None and FUZZY_MAX_VARIANTS > 0:
+            added = kb.term_expander.expand(words, FUZZY_MAX_VARIANTS)
+            if added:
+                query = f"{query} {' '.join(added)}"
+                words += added
+        return query, set(words)
+    
+    def _resolve_facets(self, query: str, filters: Dict[str, List[str]]) -> tuple:
+        """Return (facets, explicit): validated filters, else the facets the query mentions"""
+        filters = normalize_filters(filters)
+        if filters:
+            return filters, True
+        return (detect_facets(query) if AUTO_FACETS else {}), False
+    
+    def _faceted_search(self, kb: KnowledgeBase, query: str, query_words: set, top_k: int, ranking: str,
+                        candidate_budget: int, facets: Dict[str, List[str]], explicit: bool, info: Dict = None) -> List[dict]:
+        """Search only the pages carrying explicit facets, or every page boosting those carrying detected ones"""
+        if not facets:
+            return self._search(kb, query, query_words, top_k, ranking, candidate_budget, info=info)
+        page_ids = kb.filter_pages(facets, match_all=explicit)
+        if explicit:
+            return self._search(kb, query, query_words, top_k, ranking, candidate_budget, page_ids, info=info)
+        return self._search(kb, query, query_words, top_k, ranking, candidate_budget, boosted_pages=set(page_ids), info=info)
+    
+    def search_relevant_content_batch(self, queries: List[str], top_k: int = 5, ranking: str = DEFAULT_RANKING,
+                                      candidate_budget: int = HYBRID_CANDIDATE_BUDGET,
+                                      filters: Dict[str, List[str]] = None) -> List[List[dict]]:
+        """search_relevant_content for many queries, scoring all cache misses in one vectorized pass
+        
+        The passage rankings score the queries against the BM25 and dense
+        indexes with one sparse/dense matrix product each per
+        BATCH_SCORE_CHUNK queries; other rankings,
+        and queries with facets or phrases, are searched one by one.
+        """
+        kb = self.kb
+        results = [None] * len(queries)
+        misses = []
+        for i, query in enumerate(queries):
+            facets, explicit = self._resolve_facets(query, filters)
+            query, query_words = self._expand_query(kb, query)
+            cache_key = _search_cache_key(kb, query, query_words, top_k, ranking, candidate_budget, facets, explicit)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                results[i] = [dict(result) for result in cached]
+            elif facets or quoted_phrases(query):
+                found = self._faceted_search(kb, query, query_words, top_k, ranking, candidate_budget, facets, explicit)
+                self.search_cache.put(cache_key, found)
+                results[i] = [dict(result) for result in found]
             else:
-                # Fallback for older scraped data
-                structured_data = page.get("structured_data", "")
-                if isinstance(structured_data, dict):
-                    structured_text = " ".join([str(v) for v in structured_data.values() if isinstance(v, str)])
-                else:
-                    structured_text = str(structured_data) if structured_data else ""
-                full_content = f"{title} {markdown} {structured_text}".lower()
-            
-            # Calculate relevance score
-            content_words = set(re.findall(r'\w+', full_content))
-            common_words = query_words.intersection(content_words)
+                misses.append((i, query, query_words, cache_key))
+        if not misses:
+            return results
+        
+        vectorized = ranking in ("hybrid", "passage", "dense") and kb.passage_index is not None and kb.dense_index is not None
+        # Score BATCH_SCORE_CHUNK queries at a time so memory stays bounded however many there are
+        for chunk_start in range(0, len(misses), BATCH_SCORE_CHUNK):
+            chunk = misses[chunk_start:chunk_start + BATCH_SCORE_CHUNK]
+            if vectorized:
+                texts = [query for _, query, _, _ in chunk]
+                lexical_scores = kb.passage_index.score_batch(texts) if ranking != "dense" else None
+                dense_scores = kb.dense_index.score_batch(texts) if ranking != "passage" else None
             
-            if common_words:
-                # Score based on number of matching words
-                score = len(common_words) / len(query_words)
-                
-                # Boost score for title matches
-                title_words = set(re.findall(r'\w+', title.lower()))
-                if query_words.intersection(title_words):
-                    score += 0.5
-                
-                # Boost score for FAQ matches
-                if faqs and any(
-                    any(word in faq.get("question", "").lower() for word in query_words)
-                    for faq in faqs
-                ):
-                    score += 0.3
-                
-                # Boost score for data product matches
-                if data_products and any(
-                    any(word in prod.get("title", "").lower() for word in query_words)
-                    for prod in data_products
-                ):
-                    score += 0.3
-                
-                # Extract relevant content for context
-                if main_content:
-                    content_preview = main_content[:2000]
-                    full_content_for_context = f"{main_content} {headings_text} {tables_text} {lists_text}"[:5000]
+            for row, (i, query, query_words, cache_key) in enumerate(chunk):
+                if not vectorized:
+                    found = self._search(kb, query, query_words, top_k, ranking, candidate_budget)
+                elif ranking == "hybrid":
+                    fused = reciprocal_rank_fusion([
+                        top_k_scores(lexical_scores[row], candidate_budget),
+                        top_k_scores(dense_scores[row], candidate_budget),
+                    ])
+                    found = self._group_passages(kb, query, fused, query_words, top_k)
                 else:
-                    # Fallback for older data
-                    content_preview = markdown[:2000] if markdown else structured_text[:2000] if isinstance(structured_text, str) else ""
-                    full_content_for_context = markdown[:5000] if markdown else structured_text[:5000] if isinstance(structured_text, str) else ""
-                
-                relevant_content.append({
-                    "url": url,
-                    "title": title,
-                    "description": description,
-                    "content": content_preview,
-                    "score": score,
-                    "full_markdown": full_content_for_context,
-                    "headings": headings[:5],  # Include top headings
-                    "faqs": [faq for faq in faqs if any(word in faq.get("question", "").lower() for word in query_words)][:3],
-                    "data_products": [prod for prod in data_products if any(word in prod.get("title", "").lower() + prod.get("description", "").lower() for word in query_words)][:3],
-                    "tables_summary": f"{len(tables)} tables available" if tables else "",
-                    "lists_summary": f"{len(lists)} lists available" if lists else ""
-                })
-        
-        # Sort by relevance score and return top results
-        relevant_content.sort(key=lambda x: x["score"], reverse=True)
-        return relevant_content[:top_k]
-    
-    def generate_response(self, user_query: str) -> str:
-        """Generate chatbot response using Gemini API with enhanced context"""
-        relevant_docs = self.search_relevant_content(user_query)
+                    scores = lexical_scores[row] if ranking == "passage" else dense_scores[row]
+                    found = self._group_passages(kb, query, top_k_scores(scores, top_k * PASSAGES_PER_PAGE * 2), query_words, top_k)
+                self.search_cache.put(cache_key, found)
+                results[i] = [dict(result) for result in found]
+        return results
+    
+    def _search(self, kb: KnowledgeBase, query: str, query_words: set, top_k: int, ranking: str,
+                candidate_budget: int, page_ids: List[int] = None, boosted_pages: set = None,
+                info: Dict = None) -> List[dict]:
+        """Run the selected ranking over one snapshot without consulting the cache
         
-        if not relevant_docs:
-            return "I couldn't find specific information about that topic in the MOSDAC website data. Please try asking about satellite data, weather forecasting, oceanographic data, or other MOSDAC services."
-        
-        # Prepare enhanced context from relevant documents
-        context_parts = []
-        for i, doc in enumerate(relevant_docs, 1):
-            # Build comprehensive context
-            doc_context = f"""
-Document {i}:
-Title: {doc['title']}
-URL: {doc['url']}
-Description: {doc.get('description', 'No description available')}
-"""
+        page_ids (sorted) restricts scoring to those pages and their passages.
+        Quoted phrases restrict it further to the passages (and pages) that
+        contain them, unless none do. Scores of boosted_pages (and their
+        passages) are multiplied by 1 + AUTO_FACET_BOOST. Hybrid ranking
+        records its per-retriever latencies (ms) in info["timings"].
+        """
+        passage_ids = kb.filter_passages(page_ids) if page_ids is not None else None
+        phrases = quoted_phrases(query)
+        if phrases and kb.positional_index is not None:
+            passage_ids, page_ids = self._phrase_filter(kb, phrases, passage_ids, page_ids)
+        if ranking == "hybrid" and kb.passage_index is not None and kb.dense_index is not None:
+            timings = {}
+            start = time.perf_counter()
+            lexical = kb.passage_index.top_k(query, candidate_budget, passage_ids)
+            timings["lexical_ms"] = (time.perf_counter() - start) * 1000
             
-            # Add headings if available
-            if doc.get('headings'):
-                headings_text = " | ".join([h.get('text', '') for h in doc['headings']])
-                doc_context += f"Key Sections: {headings_text}\n"
+            start = time.perf_counter()
+            dense = kb.dense_index.top_k(query, candidate_budget, passage_ids)
+            timings["dense_ms"] = (time.perf_counter() - start) * 1000
+            
+            start = time.perf_counter()
+            fused = self._boost_pages(reciprocal_rank_fusion([lexical, dense]), boosted_pages, kb.passage_page_ids)
+            timings["fusion_ms"] = (time.perf_counter() - start) * 1000
+            
+            if info is not None:
+                info["timings"] = timings
+            for stage in ("lexical", "dense", "fusion"):
+                self.metrics.observe("mosdac_stage_seconds", timings[f"{stage}_ms"] / 1000, stage=stage)
+            return self._group_passages(kb, query, fused, query_words, top_k)
+        
+        candidates = top_k * PASSAGES_PER_PAGE * 2
+        if boosted_pages:
+            # Boosting can lift results from further down, so take more candidates
+            candidates = max(candidates, candidate_budget)
+        if ranking == "passage" and kb.passage_index is not None:
+            ranked_passages = self._boost_pages(kb.passage_index.top_k(query, candidates, passage_ids), boosted_pages, kb.passage_page_ids)
+            return self._group_passages(kb, query, ranked_passages, query_words, top_k)
+        
+        if ranking == "dense" and kb.dense_index is not None:
+            ranked_passages = self._boost_pages(kb.dense_index.top_k(query, candidates, passage_ids), boosted_pages, kb.passage_page_ids)
+            return self._group_passages(kb, query, ranked_passages, query_words, top_k)
+        
+        if ranking == "bm25f" and kb.bm25_index is not None:
+            ranked = kb.bm25_index.top_k(query, max(top_k, candidate_budget) if boosted_pages else top_k, page_ids)
+        else:
+            ranked = self._keyword_scores(kb, query_words, page_ids)
+        ranked = self._boost_pages(ranked, boosted_pages)[:top_k]
+        
+        return [self._with_page_passages(kb, self._build_result(kb, page_id, score, query_words), page_id, query_words)
+                for page_id, score in ranked]
+    
+    def _boost_pages(self, ranked: List[tuple], boosted_pages: set, page_ids: List[int] = None) -> List[tuple]:
+        """Re-rank (item_id, score) pairs, multiplying the scores of items on boosted_pages by 1 + AUTO_FACET_BOOST
+        
+        Items are pages, or passages when page_ids maps them to their page.
+        """
+        if not boosted_pages or AUTO_FACET_BOOST <= 0:
+            return ranked
+        page_of = (lambda item_id: int(page_ids[item_id])) if page_ids is not None else int
+        boosted = [
+            (item_id, score * (1.0 + AUTO_FACET_BOOST) if page_of(item_id) in boosted_pages else score)
+            for item_id, score in ranked
+        ]
+        return sorted(boosted, key=lambda item: -item[1])
+    
+    def _keyword_scores(self, kb: KnowledgeBase, query_words: set, page_ids: List[int] = None) -> List[tuple]:
+        """Score pages (all, or just page_ids) by query word overlap plus title, FAQ and data product boosts"""
+        scores = []
+        allowed = set(page_ids) if page_ids is not None else None
+        
+        # Only pages that share at least one token with the query can score;
+        # count how many query words each of them contains
+        matches = defaultdict(int)
+        for word in query_words:
+            for page_id in kb.inverted_index.get(word, ()):
+                if allowed is None or page_id in allowed:
+                    matches[int(page_id)] += 1
+        
+        for page_id in sorted(matches):
+            record = kb.page_records[page_id]
             
-            # Add FAQ content if relevant
-            if doc.get('faqs'):
-                doc_context += "Relevant FAQs:\n"
-                for faq in doc['faqs']:
-                    doc_context += f"Q: {faq.get('question', '')}\nA: {faq.get('answer', '')}\n"
+            # Score based on number of matching words
+            score = matches[page_id] / len(query_words)
             
-            # Add data products if relevant
-            if doc.get('data_products'):
-                doc_context += "Available Data Products:\n"
-                for prod in doc['data_products']:
-                    doc_context += f"- {prod.get('title', '')}: {prod.get('description', '')}\n"
+            # Boost score for title matches
+            if query_words.intersection(record["title_words"]):
+                score += 0.5
             
-            # Add structured summaries
-            if doc.get('tables_summary'):
-                doc_context += f"Data Tables: {doc['tables_summary']}\n"
-            if doc.get('lists_summary'):
-                doc_context += f"Information Lists: {doc['lists_summary']}\n"
+            # Boost score for FAQ matches
+            if any(
+                any(word in question for word in query_words)
+                for question in record["faq_questions"]
+            ):
+                score += 0.3
             
-            # Add main content
-            doc_context += f"Content: {doc['full_markdown']}\n"
-            doc_context += "---\n"
+            # Boost score for data product matches
+            if any(
+                any(word in product_title for word in query_words)
+                for product_title in record["product_titles"]
+            ):
+                score += 0.3
             
-            context_parts.append(doc_context)
+            scores.append((page_id, score))
         
-        context = "\n".join(context_parts)
+        # Sort by relevance score
+        scores.sort(key=lambda x: x[1], reverse=True)
+        return scores
+    
+    def _phrase_filter(self, kb: KnowledgeBase, phrases: List[List[str]], passage_ids: List[int],
+                       page_ids: List[int]) -> tuple:
+        """Return (passage_ids, page_ids) narrowed to passages containing every phrase, or unchanged if none do"""
+        matched = passage_ids
+        for words in phrases:
+            matched = kb.positional_index.phrase_docs(words, matched)
+        if not len(matched):
+            return passage_ids, page_ids
+        return matched.tolist(), sorted({int(kb.passage_page_ids[passage_id]) for passage_id in matched})
+    
+    def _boost_proximity(self, kb: KnowledgeBase, query: str, ranked_passages: List[tuple]) -> List[tuple]:
+        """Re-rank passages, boosting those holding consecutive query words close together"""
+        if kb.positional_index is None or PROXIMITY_WEIGHT <= 0 or not ranked_passages:
+            return ranked_passages
+        proximity = kb.positional_index.proximity(
+            re.findall(r'\w+', query.lower()), [passage_id for passage_id, _ in ranked_passages]
+        )
+        boosted = [
+            (passage_id, score * (1.0 + PROXIMITY_WEIGHT * closeness))
+            for (passage_id, score), closeness in zip(ranked_passages, proximity.tolist())
+        ]
+        return sorted(boosted, key=lambda item: -item[1])
+    
+    def _group_passages(self, kb: KnowledgeBase, query: str, ranked_passages: List[tuple], query_words: set,
+                        top_k: int) -> List[dict]:
+        """Group ranked passages by page, keeping each page's best passages as its context"""
+        ranked_passages = self._boost_proximity(kb, query, ranked_passages)
+        words = list(query_words)
+        hits_by_page = {}
+        for passage_id, score in ranked_passages:
+            hits = hits_by_page.setdefault(int(kb.passage_page_ids[passage_id]), [])
+            if len(hits) < PASSAGES_PER_PAGE:
+                hits.append((passage_id, score))
+        
+        results = []
+        for page_id, ranked_hits in list(hits_by_page.items())[:top_k]:
+            hits = []
+            for passage_id, score in ranked_hits:
+                passage = kb.passages[passage_id]
+                hits.append(dict(passage, score=score, snippets=kb.snippets(passage, words)))
+            result = self._build_result(kb, page_id, hits[0]["score"], query_words)
+            result["snippets"] = [snippet for hit in hits for snippet in hit["snippets"]]
+            # Present the passages in page order so the context reads naturally
+            hits.sort(key=lambda hit: hit["id"])
+            result["passages"] = hits
+            result["content"] = max(hits, key=lambda hit: hit["score"])["text"]
+            result["full_markdown"] = "\n...\n".join(hit["text"] for hit in hits)
+            results.append(result)
+        return results
+    
+    def _with_page_passages(self, kb: KnowledgeBase, result: dict, page_id: int, query_words: set) -> dict:
+        """Give a page-level result the page's passages matching the most query words, with snippets
+        
+        They replace the page's leading content as the result's context.
+        """
+        if kb.positional_index is None:
+            return result
+        passage_ids = kb.filter_passages([page_id])
+        counts = kb.positional_index.match_counts(list(query_words), passage_ids)
+        best = [passage_ids[i] for i in sorted(range(len(passage_ids)), key=lambda i: -counts[i]) if counts[i] > 0]
+        if not best:
+            return result
+        words = list(query_words)
+        hits = []
+        for passage_id in sorted(best[:PASSAGES_PER_PAGE]):
+            passage = kb.passages[passage_id]
+            hits.append(dict(passage, score=result["score"], snippets=kb.snippets(passage, words)))
+        result["passages"] = hits
+        result["snippets"] = [snippet for hit in hits for snippet in hit["snippets"]]
+        result["full_markdown"] = "\n...\n".join(hit["text"] for hit in hits)
+        return result
+    
+    def _build_result(self, kb: KnowledgeBase, page_id: int, score: float, query_words: set) -> dict:
+        """Build the search result returned for a ranked page"""
+        record = kb.page_records[page_id]
+        page = kb.pages[page_id]
+        faqs = page.get("faqs", [])
+        data_products = page.get("data_products", [])
+        tables = page.get("tables", [])
+        lists = page.get("lists", [])
+        
+        return {
+            "url": page.get("url", ""),
+            "title": page.get("title", ""),
+            "description": page.get("description", ""),
+            "content": record["content_preview"],
+            "score": score,
+            "full_markdown": record["full_content_for_context"],
+            "headings": page.get("headings", [])[:5],  # Include top headings
+            "faqs": [faq for faq in faqs if any(word in faq.get("question", "").lower() for word in query_words)][:3],
+            "data_products": [prod for prod in data_products if any(word in prod.get("title", "").lower() + prod.get("description", "").lower() for word in query_words)][:3],
+            "scraped_at": page.get("scraped_at", ""),
+            "tables_summary": f"{len(tables)} tables available" if tables else "",
+            "lists_summary": f"{len(lists)} lists available" if lists else ""
+        }
+    
+    def build_prompt(self, user_query: str, relevant_docs: List[dict], history: str = "", info: Dict = None) -> str:
+        """Assemble the Gemini prompt, packing document context into the token budget
+        
+        history is the conversation so far (as given by SessionStore.context), if any.
+        If given, info is filled with the packing and token statistics under "prompt_stats".
+        """
+        start = time.perf_counter()
+        # Prepare enhanced context from the best, de-duplicated passages
+        context, stats = assemble_context(relevant_docs, self.context_token_budget, use_snippets=SNIPPET_CONTEXT)
+        conversation = f"Conversation so far (use it to resolve follow-up questions):\n{history}\n\n" if history else ""
         
         # Create comprehensive prompt for Gemini
         prompt = f"""
@@ -232,7 +616,7 @@ Based on the following comprehensive website content from MOSDAC, please answer
 
 {context}
 
-User Question: {user_query}
+{conversation}User Question: {user_query}
 
 Instructions:
 1. Provide a detailed, informative response based on the structured context above
@@ -246,13 +630,248 @@ Instructions:
 
 Please provide a comprehensive and helpful answer:
 """
-
+        
+        stats["prompt_tokens"] = estimate_tokens(prompt)
+        stats["history_tokens"] = estimate_tokens(history) if history else 0
+        if info is not None:
+            info["prompt_stats"] = stats
+        self.metrics.observe("mosdac_stage_seconds", time.perf_counter() - start, stage="prompt")
+        self.metrics.observe("mosdac_prompt_tokens", stats["prompt_tokens"])
+        print(f"🧮 Prompt: {stats['prompt_tokens']} tokens ({stats['context_tokens']}/{stats['token_budget']} context, "
+              f"{stats['history_tokens']} conversation, "
+              f"{stats['passages']} passages from {stats['documents']} documents, "
+              f"{stats['dropped_duplicates']} duplicates dropped)")
+        return prompt
+    
+    def match_faq(self, user_query: str) -> Dict:
+        """Reply with the stored answer of a closely matching FAQ, or None"""
+        faq_index = self.kb.faq_index
+        if faq_index is None:
+            return None
+        with self.metrics.time("faq"):
+            match = faq_index.match(user_query, FAQ_MATCH_THRESHOLD)
+        if match is None:
+            return None
+        faq, similarity = match
+        print(f"💬 FAQ match ({similarity:.2f}): {faq['question'][:60]}")
+        return _reply(f"{faq['answer']}\n\nSource: {faq['url']}", "faq", faq["url"])
+    
+    def _prepare_generation(self, user_query: str, relevant_docs: List[dict] = None,
+                            filters: Dict[str, List[str]] = None, search_query: str = None,
+                            history: str = "") -> tuple:
+        """Retrieve context for a question and return (reply, prompt, cache_key, sources)
+        
+        reply is set when the question can be answered without calling Gemini
+        (a matching FAQ, nothing relevant found, or a cached answer); otherwise
+        prompt is set. sources describes the retrieved documents. The FAQ fast path is skipped for explicit filters, which
+        ask for answers from those pages only. Pass relevant_docs to reuse
+        results that were already retrieved. In a conversation, search_query
+        is what to retrieve for (the question plus the earlier topic) and
+        history the conversation so far.
+        """
+        if relevant_docs is None:
+            if not normalize_filters(filters):
+                reply = self.match_faq(user_query)
+                if reply is not None:
+                    return reply, None, None, []
+            relevant_docs = self.search_relevant_content(search_query or user_query, filters=filters)
+        
+        if not relevant_docs:
+            return _reply(NO_RESULTS_MESSAGE, "no_results"), None, None, []
+        sources = _sources(relevant_docs)
+        
+        # Reuse a stored answer for the same question (and conversation) over the same documents, from the same backend and model
+        cache_key = answer_cache_key(
+            re.findall(r'\w+', f"{history}\n{user_query}".lower()),
+            [
+                f"{doc['url']}|{doc.get('scraped_at', '')}|{','.join(str(p['id']) for p in doc.get('passages', []))}"
+                for doc in relevant_docs
+            ],
+            self.backend.identity,
+        )
+        if self.answer_cache is not None:
+            cached_answer = self.answer_cache.get(cache_key)
+            if cached_answer is not None:
+                return _reply(cached_answer, "cache", sources=sources), None, cache_key, sources
+        
+        return None, self.build_prompt(user_query, relevant_docs, history), cache_key, sources
+    
+    def generate_response(self, user_query: str, filters: Dict[str, List[str]] = None) -> str:
+        """Generate chatbot response using Gemini API with enhanced context"""
+        return self.answer(user_query, filters)["answer"]
+    
+    def answer(self, user_query: str, filters: Dict[str, List[str]] = None, session_id: str = None) -> Dict:
+        """Answer a question, returning {"answer", "answered_by", "source_url", "sources"}
+        
+        Concurrent calls with the same normalized question (and filters and
+        session) are coalesced into a single retrieval and Gemini call whose
+        answer they all receive. filters restricts retrieval as in
+        search_relevant_content. With a session_id (from sessions.create) the
+        question is answered in the context of that conversation and recorded
+        in it; an unknown or expired session raises KeyError.
+        """
+        key = (normalize_query(user_query), _facets_key(normalize_filters(filters)), session_id)
+        return self.inflight.do(key, self._answer, user_query, filters, session_id)
+    
+    def _session_context(self, user_query: str, session_id: str) -> tuple:
+        """(search_query, history, topic) for a question in a session (the question alone without one)"""
+        if session_id is None:
+            return user_query, "", []
+        context = self.sessions.context(session_id)
+        if context is None:
+            raise KeyError(f"Unknown or expired session: {session_id}")
+        search_query, topic = follow_up_query(user_query, context["topic"])
+        return search_query, context["history"], topic
+    
+    def _answer(self, user_query: str, filters: Dict[str, List[str]] = None, session_id: str = None) -> Dict:
+        """Uncoalesced body of answer"""
+        search_query, history, topic = self._session_context(user_query, session_id)
+        reply, prompt, cache_key, sources = self._prepare_generation(
+            user_query, filters=filters, search_query=search_query, history=history
+        )
+        if reply is None:
+            reply = self._complete(prompt, cache_key, sources)
+        self.metrics.inc("mosdac_answers_total", answered_by=reply["answered_by"])
+        if session_id is not None and reply["answered_by"] != "error":
+            self.sessions.record(session_id, user_query, reply["answer"], topic)
+        return reply
+    
+    def _complete(self, prompt: str, cache_key: str, sources: List[Dict] = None) -> Dict:
+        """Call Gemini for a prepared prompt and cache the answer"""
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            with self.generation_slots, self.metrics.time("generate"):
+                answer = self.backend.generate(prompt)
+            if self.answer_cache is not None:
+                self.answer_cache.put(cache_key, answer)
+            return _reply(answer, "llm", sources=sources)
             
         except Exception as e:
-            return f"I apologize, but I encountered an error while generating a response: {str(e)}. Please try rephrasing your question or ask about specific MOSDAC services, satellite data, or weather information."
+            self.metrics.inc("mosdac_errors_total", stage="generate")
+            return _reply(ERROR_MESSAGE.format(error=str(e)), "error", sources=sources)
+    
+    def generate_responses(self, questions: List[str], concurrency: int = 4) -> Iterator[tuple]:
+        """Answer many questions, yielding (index, reply) pairs as each one completes
+        
+        Questions matching a stored FAQ are answered first; retrieval for the
+        other distinct questions runs in one batched pass, then Gemini is
+        called on up to `concurrency` threads at once (fewer when other
+        requests hold the CHAT_WORKERS generation slots). Repeated questions
+        are answered once. Replies are dicts as returned by answer. Closing
+        the generator early (e.g. the client disconnected) sends no further
+        Gemini calls and does not wait for the ones in progress.
+        """
+        indexes_by_query = {}
+        for i, question in enumerate(questions):
+            indexes_by_query.setdefault(normalize_query(question), []).append(i)
+        firsts = []
+        for indexes in indexes_by_query.values():
+            reply = self.match_faq(questions[indexes[0]])
+            if reply is not None:
+                self.metrics.inc("mosdac_answers_total", answered_by=reply["answered_by"])
+                for j in indexes:
+                    yield j, reply
+            else:
+                firsts.append(indexes[0])
+        docs_per_question = self.search_relevant_content_batch([questions[i] for i in firsts])
+        
+        pending = []
+        for i, relevant_docs in zip(firsts, docs_per_question):
+            reply, prompt, cache_key, sources = self._prepare_generation(questions[i], relevant_docs)
+            if reply is not None:
+                self.metrics.inc("mosdac_answers_total", answered_by=reply["answered_by"])
+                for j in indexes_by_query[normalize_query(questions[i])]:
+                    yield j, reply
+            else:
+                pending.append((i, prompt, cache_key, sources))
+        
+        # Submit a question only when a thread is free, so nothing is queued that an early close would have to wait for
+        pending.reverse()
+        pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="batch")
+        try:
+            futures = {}
+            while pending or futures:
+                while pending and len(futures) < max(1, concurrency):
+                    i, prompt, cache_key, sources = pending.pop()
+                    futures[pool.submit(self._complete, prompt, cache_key, sources)] = i
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures.pop(future)
+                    reply = future.result()
+                    self.metrics.inc("mosdac_answers_total", answered_by=reply["answered_by"])
+                    for j in indexes_by_query[normalize_query(questions[i])]:
+                        yield j, reply
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def answer_batch_file(self, input_path: str, output_path: str, concurrency: int = 4):
+        """Answer the questions in a JSONL file, writing JSONL results as they complete
+        
+        Each input line is a {"question": ...} object, a JSON string or plain text.
+        """
+        questions = []
+        with open(input_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:
+                    item = line
+                questions.append((item.get("question") or item.get("message", "")) if isinstance(item, dict) else str(item))
+        
+        print(f"📥 Answering {len(questions)} questions from {input_path} (concurrency {concurrency})")
+        start = time.perf_counter()
+        with open(output_path, "w", encoding="utf-8") as out:
+            for done, (index, reply) in enumerate(self.generate_responses(questions, concurrency), 1):
+                out.write(json.dumps({"index": index, "question": questions[index], **reply}, ensure_ascii=False) + "\n")
+                out.flush()
+                print(f"✅ [{done}/{len(questions)}] {questions[index][:60]}")
+        print(f"💾 Results written to {output_path} in {time.perf_counter() - start:.1f}s")
+    
+    def generate_response_stream(self, user_query: str, filters: Dict[str, List[str]] = None,
+                                 info: Dict = None, session_id: str = None) -> Iterator[str]:
+        """Generator variant of generate_response that yields the answer as Gemini produces it
+        
+        If given, info is filled with the reply's answered_by, source_url and
+        sources. session_id works as in answer.
+        """
+        info = info if info is not None else {}
+        search_query, history, topic = self._session_context(user_query, session_id)
+        reply, prompt, cache_key, sources = self._prepare_generation(
+            user_query, filters=filters, search_query=search_query, history=history
+        )
+        if reply is not None:
+            info.update(answered_by=reply["answered_by"], source_url=reply["source_url"], sources=reply["sources"])
+            self.metrics.inc("mosdac_answers_total", answered_by=reply["answered_by"])
+            if session_id is not None:
+                self.sessions.record(session_id, user_query, reply["answer"], topic)
+            yield reply["answer"]
+            return
+        
+        info.update(answered_by="llm", source_url=None, sources=sources)
+        chunks = []
+        start = time.perf_counter()
+        try:
+            with self.generation_slots:
+                for text in self.backend.stream(prompt):
+                    if text:
+                        if not chunks:
+                            self.metrics.observe("mosdac_stage_seconds", time.perf_counter() - start, stage="generate_first_chunk")
+                        chunks.append(text)
+                        yield text
+        except Exception as e:
+            info["answered_by"] = "error"
+            self.metrics.inc("mosdac_errors_total", stage="generate")
+            self.metrics.inc("mosdac_answers_total", answered_by="error")
+            yield ERROR_MESSAGE.format(error=str(e))
+            return
+        
+        self.metrics.inc("mosdac_answers_total", answered_by="llm")
+        if self.answer_cache is not None and chunks:
+            self.answer_cache.put(cache_key, "".join(chunks))
+        if session_id is not None and chunks:
+            self.sessions.record(session_id, user_query, "".join(chunks), topic)
     
     def chat(self):
         """Interactive chat interface"""
@@ -261,14 +880,10 @@ Please provide a comprehensive and helpful answer:
         print("=" * 70)
         
         # Display comprehensive data statistics
-        total_faqs = sum(len(page.get("faqs", [])) for page in self.knowledge_base)
-        total_data_products = sum(len(page.get("data_products", [])) for page in self.knowledge_base)
-        total_tables = sum(len(page.get("tables", [])) for page in self.knowledge_base)
-        total_lists = sum(len(page.get("lists", [])) for page in self.knowledge_base)
-        
+        stats = self.kb.stats
         print(f"📊 Data Source: {len(self.knowledge_base)} pages from MOSDAC website")
-        print(f"🛰️ Knowledge Base: {total_data_products} data products, {total_tables} tables, {total_lists} lists")
-        print(f"🧠 AI Engine: Gemini 1.5 Flash for intelligent responses")
+        print(f"🛰️ Knowledge Base: {stats['data_products']} data products, {stats['tables']} tables, {stats['lists']} lists")
+        print(f"🧠 AI Engine: {self.backend.name} backend for intelligent responses")
         print(f"🔍 Enhanced Search: FAQs, structured data, and comprehensive content")
         print("\n💡 I can help you with:")
         print("   • Satellite missions (INSAT-3D/3DR/3DS, OCEANSAT, KALPANA-1, SCATSAT-1)")
@@ -276,6 +891,7 @@ Please provide a comprehensive and helpful answer:
         print("   • Data access procedures and download methods")
         print("   • Scientific applications and technical specifications")
         print("\n🚀 Ask me anything about MOSDAC! Type 'quit' to exit.\n")
+        session_id = self.sessions.create()
         
         while True:
             try:
@@ -290,7 +906,9 @@ Please provide a comprehensive and helpful answer:
                     continue
                 
                 print("🤖 Thinking...")
-                response = self.generate_response(user_input)
+                if session_id not in self.sessions:
+                    session_id = self.sessions.create()
+                response = self.answer(user_input, session_id=session_id)["answer"]
                 print(f"🛰️ MOSDAC Assistant: {response}\n")
                 
             except KeyboardInterrupt:
@@ -300,9 +918,20 @@ Please provide a comprehensive and helpful answer:
                 print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="MOSDAC Chatbot")
+    parser.add_argument("--batch", metavar="FILE", help="answer the questions in a JSONL file instead of chatting")
+    parser.add_argument("--output", metavar="FILE", help="where to write batch results (default: <FILE>.answers.jsonl)")
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent Gemini calls in batch mode (default: 4)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=LLM_BACKEND, help=f"where answers are generated (default: {LLM_BACKEND})")
+    args = parser.parse_args()
+    
     try:
-        chatbot = MOSDACChatbot()
-        chatbot.chat()
+        chatbot = MOSDACChatbot(create_backend(args.backend))
+        if args.batch:
+            chatbot.answer_batch_file(args.batch, args.output or f"{os.path.splitext(args.batch)[0]}.answers.jsonl", args.concurrency)
+        else:
+            chatbot.chat()
     except Exception as e:
         print(f"❌ Failed to initialize chatbot: {e}")
         print("Please check your GEMINI_API_KEY and ensure you have scraped data available.")
@@ -0,0 +1,166 @@
+import math
+import re
+from typing import Dict, List, Tuple
+
+# Rough characters-per-token ratio for English text with Gemini's tokenizer
+CHARS_PER_TOKEN = 4
+
+# Word n-gram size and Jaccard similarity above which two texts count as duplicates
+SHINGLE_SIZE = 5
+DUPLICATE_THRESHOLD = 0.5
+
+# Smallest remainder (in tokens) worth filling with a truncated passage
+MIN_PARTIAL_TOKENS = 100
+
+# Text rendering adds around each document and between its passages
+DOCUMENT_FRAMING = "Content: \n---\n\n"
+PASSAGE_SEPARATOR = "\n...\n"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap, offline token estimate used for budgeting and reporting"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _shingles(text: str) -> set:
+    """Word n-gram set used to detect near-duplicate text"""
+    words = re.findall(r'\w+', text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def _truncate_words(text: str, max_chars: int) -> str:
+    """Cut text to at most max_chars, ending on a word boundary"""
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip()
+
+
+def _is_near_duplicate(shingles: set, accepted: List[set], threshold: float) -> bool:
+    """Check a text's shingles against every text already packed"""
+    for other in accepted:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= threshold:
+            return True
+    return False
+
+
+def _document_header(doc: Dict, index: int, seen_faqs: set, seen_products: set) -> str:
+    """Render the metadata part of a document, skipping FAQs/products already shown"""
+    header = f"""
+Document {index}:
+Title: {doc['title']}
+URL: {doc['url']}
+Description: {doc.get('description', 'No description available')}
+"""
+
+    # Add headings if available
+    if doc.get('headings'):
+        headings_text = " | ".join([h.get('text', '') for h in doc['headings']])
+        header += f"Key Sections: {headings_text}\n"
+
+    # Add FAQ content if relevant
+    faqs = [faq for faq in doc.get('faqs', []) if faq.get('question', '') not in seen_faqs]
+    if faqs:
+        header += "Relevant FAQs:\n"
+        for faq in faqs:
+            seen_faqs.add(faq.get('question', ''))
+            header += f"Q: {faq.get('question', '')}\nA: {faq.get('answer', '')}\n"
+
+    # Add data products if relevant (the same product is often listed on many pages)
+    products = [prod for prod in doc.get('data_products', []) if prod.get('title', '') not in seen_products]
+    if products:
+        header += "Available Data Products:\n"
+        for prod in products:
+            seen_products.add(prod.get('title', ''))
+            header += f"- {prod.get('title', '')}: {prod.get('description', '')}\n"
+
+    # Add structured summaries
+    if doc.get('tables_summary'):
+        header += f"Data Tables: {doc['tables_summary']}\n"
+    if doc.get('lists_summary'):
+        header += f"Information Lists: {doc['lists_summary']}\n"
+    return header
+
+
+def passage_context(passage: Dict, use_snippets: bool = True) -> str:
+    """Text of a passage to put in the prompt: its query-biased snippets when it has any"""
+    if use_snippets and passage.get("snippets"):
+        return "\n".join(snippet["text"] for snippet in passage["snippets"])
+    return passage.get("text", "")
+
+
+def assemble_context(docs: List[Dict], token_budget: int, duplicate_threshold: float = DUPLICATE_THRESHOLD,
+                     use_snippets: bool = True) -> Tuple[str, Dict]:
+    """Pack the highest-scoring passages of the retrieved documents into a token budget
+
+    Passages (or a document's whole context when it has none) are taken in
+    descending score order, as their snippets when use_snippets is set; a passage is skipped when it nearly duplicates
+    text already packed, and truncated or skipped when it, plus its
+    document's header the first time the document is used, no longer fits,
+    so the context never exceeds the budget.
+    Returns the rendered context and packing statistics.
+    """
+    units = []
+    for rank, doc in enumerate(docs):
+        passages = doc.get("passages") or [{"id": 0, "text": doc.get("full_markdown", ""), "score": doc.get("score", 0.0)}]
+        for passage in passages:
+            units.append((rank, passage))
+    units.sort(key=lambda unit: (-unit[1].get("score", 0.0), unit[0], unit[1].get("id", 0)))
+
+    remaining = token_budget
+    seen_faqs, seen_products = set(), set()
+    accepted_shingles = []
+    headers = {}
+    selected = {}
+    dropped_duplicates = dropped_budget = 0
+
+    for rank, passage in units:
+        text = passage_context(passage, use_snippets)
+        shingles = _shingles(text)
+        if shingles and _is_near_duplicate(shingles, accepted_shingles, duplicate_threshold):
+            dropped_duplicates += 1
+            continue
+
+        header = headers.get(rank)
+        if header is None:
+            header = _document_header(docs[rank], len(headers) + 1, set(seen_faqs), set(seen_products))
+        # Count the separators and document framing that rendering adds
+        header_cost = 0 if rank in headers else estimate_tokens(header + DOCUMENT_FRAMING)
+        cost = header_cost + estimate_tokens(text + PASSAGE_SEPARATOR)
+
+        if cost > remaining:
+            # Trim to the space left when enough remains to be useful (or nothing fits yet);
+            # skip the passage when even its document's header does not fit
+            room = remaining - header_cost - estimate_tokens(PASSAGE_SEPARATOR)
+            if room <= 0 or (room < MIN_PARTIAL_TOKENS and selected):
+                dropped_budget += 1
+                continue
+            text = _truncate_words(text, room * CHARS_PER_TOKEN)
+            cost = header_cost + estimate_tokens(text + PASSAGE_SEPARATOR)
+
+        if rank not in headers:
+            headers[rank] = _document_header(docs[rank], len(headers) + 1, seen_faqs, seen_products)
+        selected.setdefault(rank, []).append(dict(passage, text=text))
+        accepted_shingles.append(shingles)
+        remaining -= cost
+
+    # Render documents in the order they were first selected, passages in page order
+    context_parts = []
+    for rank, header in headers.items():
+        passages = sorted(selected[rank], key=lambda passage: passage.get("id", 0))
+        content = PASSAGE_SEPARATOR.join(passage["text"] for passage in passages)
+        context_parts.append(f"{header}Content: {content}\n---\n")
+    context = "\n".join(context_parts)
+
+    stats = {
+        "token_budget": token_budget,
+        "context_tokens": estimate_tokens(context),
+        "documents": len(headers),
+        "passages": sum(len(passages) for passages in selected.values()),
+        "dropped_duplicates": dropped_duplicates,
+        "dropped_budget": dropped_budget,
+    }
+    return context, stats
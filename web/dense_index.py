@@ -0,0 +1,126 @@
+import re
+import zlib
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.linalg import svds
+
+from bm25 import top_k_scores
+from mapped_store import MappedStore
+
+# Hashed feature space and the size of the reduced (SVD) vectors
+N_FEATURES = 2 ** 14
+DIMENSIONS = 128
+
+# Seed of the SVD start vector, so rebuilding a snapshot gives the same vectors
+SVD_SEED = 0
+
+# Character n-grams let morphological variants ("salinity"/"saline") share features
+CHAR_NGRAM = 4
+CHAR_NGRAM_WEIGHT = 0.5
+
+
+def _hashed_features(text: str, n_features: int) -> dict:
+    """Map text to {feature_id: weight} using word and in-word character n-gram hashes"""
+    counts = {}
+    for word in re.findall(r'\w+', text.lower()):
+        # crc32 is stable across processes, unlike hash()
+        feature = zlib.crc32(word.encode("utf-8")) % n_features
+        counts[feature] = counts.get(feature, 0.0) + 1.0
+        if len(word) > CHAR_NGRAM:
+            padded = f"<{word}>"
+            for i in range(len(padded) - CHAR_NGRAM + 1):
+                feature = zlib.crc32(padded[i:i + CHAR_NGRAM].encode("utf-8")) % n_features
+                counts[feature] = counts.get(feature, 0.0) + CHAR_NGRAM_WEIGHT
+    return counts
+
+
+def hashed_tf_matrix(texts: List[str], n_features: int) -> sparse.csr_matrix:
+    """Build a sublinear term-frequency matrix over the hashed feature space"""
+    rows, cols, values = [], [], []
+    for row, text in enumerate(texts):
+        counts = _hashed_features(text, n_features)
+        rows.extend([row] * len(counts))
+        cols.extend(counts.keys())
+        values.extend(counts.values())
+    matrix = sparse.csr_matrix(
+        (np.array(values, dtype=np.float32), (np.array(rows, dtype=np.int32), np.array(cols, dtype=np.int32))),
+        shape=(len(texts), n_features),
+    )
+    matrix.data = 1.0 + np.log(matrix.data)
+    return matrix
+
+
+class DenseIndex:
+    """Offline semantic retrieval over hashed TF-IDF vectors reduced with truncated SVD (LSA).
+
+    Item vectors are a contiguous, L2-normalised float32 matrix; a query is
+    projected into the same space and scored with one matrix-vector product.
+    """
+
+    def __init__(self, vectors: np.ndarray, components: np.ndarray, n_features: int = N_FEATURES):
+        self.vectors = vectors  # (items, dims), possibly memory-mapped
+        self.components = components  # (dims, features), IDF folded into the columns
+        self.n_features = n_features
+
+    @classmethod
+    def build(cls, texts: List[str], n_features: int = N_FEATURES, dimensions: int = DIMENSIONS) -> "DenseIndex":
+        """Fit hashed TF-IDF + truncated SVD on the texts and embed them"""
+        tf = hashed_tf_matrix(texts, n_features)
+        df = np.bincount(tf.indices, minlength=n_features).astype(np.float32)
+        idf = (np.log((1.0 + len(texts)) / (1.0 + df)) + 1.0).astype(np.float32)
+        tfidf = tf @ sparse.diags(idf)
+
+        k = min(dimensions, min(tfidf.shape) - 1)
+        if k < 1:
+            return cls(np.zeros((len(texts), 0), dtype=np.float32), np.zeros((0, n_features), dtype=np.float32), n_features)
+
+        v0 = np.random.default_rng(SVD_SEED).uniform(-1.0, 1.0, min(tfidf.shape))
+        u, s, vt = svds(tfidf.astype(np.float64), k=k, v0=v0)
+        vectors = _normalize_rows((u * s).astype(np.float32))
+        components = (vt * idf).astype(np.float32)
+        return cls(np.ascontiguousarray(vectors), np.ascontiguousarray(components), n_features)
+
+    def embed(self, text: str) -> np.ndarray:
+        """Project a query into the reduced space as a unit vector"""
+        counts = _hashed_features(text, self.n_features)
+        if not counts or not self.components.shape[0]:
+            return np.zeros(self.components.shape[0], dtype=np.float32)
+        features = np.fromiter(counts.keys(), dtype=np.int64)
+        weights = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32))
+        vector = self.components[:, features] @ weights
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def score(self, query: str, item_ids: np.ndarray = None) -> np.ndarray:
+        """Cosine similarity of every item (or just of item_ids) to the query"""
+        vectors = self.vectors if item_ids is None else self.vectors[item_ids]
+        return vectors @ self.embed(query)
+
+    def score_batch(self, queries: List[str]) -> np.ndarray:
+        """Cosine similarities for many queries in one matrix product; returns (queries, items)"""
+        embedded = np.stack([self.embed(query) for query in queries]) if queries else np.zeros((0, self.vectors.shape[1]), dtype=np.float32)
+        return embedded @ self.vectors.T
+
+    def top_k(self, query: str, k: int, item_ids: np.ndarray = None) -> List[Tuple[int, float]]:
+        """Return up to k (item_id, similarity) pairs with positive similarity, best first
+
+        item_ids (sorted) restricts scoring to that subset of items.
+        """
+        return top_k_scores(self.score(query, item_ids), k, item_ids)
+
+    def to_arrays(self, name: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and metadata that from_store needs, for writing to a mapped store"""
+        return {f"{name}.vectors": self.vectors, f"{name}.components": self.components}, {"n_features": self.n_features}
+
+    @classmethod
+    def from_store(cls, store: MappedStore, name: str, meta: Dict[str, Any]) -> "DenseIndex":
+        """Rebuild an index whose vectors are views into a mapped store"""
+        return cls(store.array(f"{name}.vectors"), store.array(f"{name}.components"), meta["n_features"])
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Scale each row to unit length (zero rows are left as-is)"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
@@ -0,0 +1,131 @@
+import re
+from typing import Dict, List
+from urllib.parse import urlparse
+
+# Facet types pages can be filtered on
+FACET_TYPES = ("category", "mission")
+
+# Satellite missions, keyed by their MOSDAC page slug, and how questions name them
+MISSION_PATTERNS = {
+    "insat-3dr": r"\b(insat[\s-]*)?3dr\b",
+    "insat-3ds": r"\b(insat[\s-]*)?3ds\b",
+    "insat-3d": r"\binsat[\s-]*3d\b",
+    "insat-3a": r"\binsat[\s-]*3a\b",
+    "kalpana-1": r"\bkalpana([\s-]*1)?\b",
+    "megha-tropiques": r"\bmegha[\s-]*tropiques\b",
+    "saral-altika": r"\b(saral|altika)\b",
+    "oceansat-2": r"\boceansat([\s-]*2)?\b(?![\s-]*3)",
+    "oceansat-3": r"\boceansat([\s-]*3)?\b(?![\s-]*2)",
+    "scatsat-1": r"\bscatsat([\s-]*1)?\b",
+}
+
+# Page categories: the sections of the scraper's sitemap (advanced_scraper.py records the
+# section a page was found in), plus "general" for pages outside it
+CATEGORIES = ("core", "missions", "catalogs", "galleries", "data-access", "atmosphere", "land", "ocean",
+              "reports", "tools", "policies", "general")
+
+# Sitemap pages (URL path) by category, for snapshots scraped before pages recorded theirs
+SITEMAP_CATEGORIES = {
+    "core": ("", "about-us", "help", "faq-page"),
+    "missions": tuple(MISSION_PATTERNS),
+    "catalogs": ("internal/catalog-satellite", "internal/catalog-insitu", "internal/catalog-radar"),
+    "galleries": ("internal/gallery", "internal/gallery/weather", "internal/gallery/ocean", "internal/gallery/dwr",
+                  "internal/gallery/current"),
+    "data-access": ("internal/uops", "internal/calval-data", "internal/forecast-menu"),
+    "atmosphere": ("bayesian-based-mt-saphir-rainfall", "gps-derived-integrated-water-vapour", "gsmap-isro-rain",
+                   "meteosat8-cloud-properties"),
+    "land": ("3d-volumetric-terls-dwrproduct", "inland-water-height", "river-discharge", "soil-moisture-0"),
+    "ocean": ("global-ocean-surface-current", "high-resolution-sea-surface-salinity", "indian-mainland-coastal-product",
+              "ocean-subsurface", "oceanic-eddies-detection", "sea-ice-occurrence-probability",
+              "wave-based-renewable-energy"),
+    "reports": ("insitu", "calibration-reports", "validation-reports", "data-quality", "weather-reports"),
+    "tools": ("atlases", "tools", "rss-feed"),
+    "policies": ("data-access-policy", "copyright-policy", "privacy-policy", "terms-conditions"),
+}
+_PATH_CATEGORIES = {path: category for category, paths in SITEMAP_CATEGORIES.items() for path in paths}
+
+# Words that select a category, in questions and in the URL and title of pages outside
+# the sitemap ("core" and "general" pages are never selected by words)
+CATEGORY_KEYWORDS = {
+    "missions": {"mission", "missions"},
+    "catalogs": {"catalog", "catalogs", "catalogue", "catalogues"},
+    "galleries": {"gallery", "galleries"},
+    "data-access": {"download", "downloads", "order", "orders", "ordering", "uops"},
+    "reports": {"report", "reports", "validation", "calibration"},
+    "tools": {"tool", "tools", "atlas", "atlases", "rss", "feed", "feeds"},
+    "policies": {"policy", "policies", "copyright", "privacy", "terms"},
+    "ocean": {"ocean", "oceanic", "sea", "marine", "coastal", "salinity", "eddy", "eddies", "wave", "waves"},
+    "atmosphere": {"atmosphere", "atmospheric", "rain", "rainfall", "cloud", "clouds", "vapour", "vapor", "humidity"},
+    "land": {"land", "soil", "river", "inland", "hydrology"},
+}
+
+
+def facet_key(facet_type: str, value: str) -> str:
+    """Key of a facet value in the facet index, e.g. mission:insat-3dr"""
+    return f"{facet_type}:{value}"
+
+
+def detect_missions(text: str) -> List[str]:
+    """Missions named in free text"""
+    text = text.lower()
+    return [mission for mission, pattern in MISSION_PATTERNS.items() if re.search(pattern, text)]
+
+
+def detect_facets(query: str) -> Dict[str, List[str]]:
+    """Missions and domain categories a question mentions, as {facet_type: values}"""
+    words = set(re.findall(r'\w+', query.lower()))
+    facets = {
+        "category": [category for category, keywords in CATEGORY_KEYWORDS.items() if words & keywords],
+        "mission": detect_missions(query),
+    }
+    return {facet_type: values for facet_type, values in facets.items() if values}
+
+
+def page_text(page: Dict) -> str:
+    """Title, description, body, FAQ and data product text of a scraped page"""
+    parts = [page.get("title", ""), page.get("description", ""), page.get("main_content", "") or page.get("markdown", "")]
+    parts += [f"{faq.get('question', '')} {faq.get('answer', '')}" for faq in page.get("faqs", [])]
+    parts += [f"{product.get('title', '')} {product.get('description', '')}" for product in page.get("data_products", [])]
+    return " ".join(parts)
+
+
+def page_facets(page: Dict) -> Dict[str, List[str]]:
+    """Facets of a scraped page as {facet_type: values}
+
+    A page is tagged with every mission its text names, not only the
+    mission's own landing page, plus any the scraper recorded. Its category
+    is the one the scraper recorded; pages scraped before categories were
+    recorded get their sitemap section, or one inferred from their URL and
+    title, or "general".
+    """
+    recorded = page.get("facets") or {}
+    missions = list(recorded.get("missions", []))
+    missions += [mission for mission in detect_missions(page_text(page)) if mission not in missions]
+    if recorded.get("category"):
+        return {"category": [recorded["category"]], "mission": missions}
+
+    path = urlparse(page.get("url", "")).path.strip("/")
+    category = _PATH_CATEGORIES.get(path)
+    if category is None:
+        # The first matching category wins, so e.g. /internal/gallery/ocean is a gallery
+        title = page.get("title", "").split("|")[0]
+        words = set(re.findall(r'[a-z0-9]+', f"{path} {title}".lower()))
+        category = next((category for category, keywords in CATEGORY_KEYWORDS.items() if words & keywords), "general")
+    return {"category": [category], "mission": missions}
+
+
+def normalize_filters(filters: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Validate explicit facet filters, lowercasing values and dropping empty ones
+
+    Raises ValueError for an unknown facet type.
+    """
+    normalized = {}
+    for facet_type, values in (filters or {}).items():
+        if facet_type not in FACET_TYPES:
+            raise ValueError(f"Unknown facet '{facet_type}' (expected one of: {', '.join(FACET_TYPES)})")
+        if isinstance(values, str):
+            values = [values]
+        values = sorted({value.strip().lower() for value in values if value.strip()})
+        if values:
+            normalized[facet_type] = values
+    return normalized
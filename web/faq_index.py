@@ -0,0 +1,123 @@
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from dense_index import N_FEATURES, hashed_tf_matrix
+from mapped_store import JSONRecords, MappedStore, json_arrays
+
+# Cosine similarity above which a stored FAQ answer is returned as-is
+MATCH_THRESHOLD = 0.75
+
+# Filler words that make differently phrased questions look less alike. Question words
+# (what, where, how, ...) are kept: "Where is MOSDAC?" does not ask "What is MOSDAC?"
+STOPWORDS = {
+    "a", "an", "the", "to", "of", "i", "my", "me", "do", "does", "did", "is", "are", "am", "be",
+    "can", "could", "in", "on", "for", "from", "and", "or", "it", "this", "that", "with", "at",
+    "by", "there", "we", "you", "your", "please", "tell", "about", "s",
+}
+
+# Heading of FAQ pages whose question/answer blocks were not extracted at scrape time
+FAQ_HEADING = "frequently asked questions"
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase word tokens without stopwords"""
+    return " ".join(word for word in re.findall(r'\w+', text.lower()) if word not in STOPWORDS)
+
+
+def extract_faqs(page: Dict) -> List[Dict]:
+    """Question/answer pairs of a page
+
+    Uses the FAQs recorded by the scraper; on an FAQ page without any, the
+    main content is read as alternating question and answer blocks
+    separated by blank lines.
+    """
+    if page.get("faqs"):
+        return [{"question": faq.get("question", ""), "answer": faq.get("answer", "")} for faq in page["faqs"]]
+
+    if not any(heading.get("text", "").strip().lower() == FAQ_HEADING for heading in page.get("headings", [])):
+        return []
+    blocks = [block.strip() for block in re.split(r'\n\s*\n', page.get("main_content", "")) if block.strip()]
+    if blocks and blocks[0].lower() == FAQ_HEADING:
+        blocks = blocks[1:]
+    return [
+        {"question": question, "answer": answer}
+        for question, answer in zip(blocks[0::2], blocks[1::2])
+    ]
+
+
+def collect_faqs(pages: List[Dict]) -> List[Dict]:
+    """Every FAQ in a snapshot, with the URL and title of the page it came from"""
+    return [
+        {**faq, "url": page.get("url", ""), "title": page.get("title", "")}
+        for page in pages
+        for faq in extract_faqs(page)
+        if faq["question"] and faq["answer"]
+    ]
+
+
+class FAQIndex:
+    """Match questions against stored FAQ questions by TF-IDF cosine similarity
+
+    Questions are embedded with the same hashed word and character n-gram
+    features as the dense index (without SVD), so small wording and
+    inflection differences still match.
+    """
+
+    def __init__(self, faqs: List[Dict], matrix: sparse.csr_matrix, idf: np.ndarray, n_features: int = N_FEATURES):
+        self.faqs = faqs
+        self.matrix = matrix  # (faqs, features), rows L2-normalised
+        self.idf = idf
+        self.n_features = n_features
+
+    @classmethod
+    def build(cls, faqs: List[Dict], n_features: int = N_FEATURES) -> "FAQIndex":
+        """Index the questions of the given FAQs"""
+        tf = hashed_tf_matrix([normalize_question(faq["question"]) for faq in faqs], n_features)
+        df = np.bincount(tf.indices, minlength=n_features).astype(np.float32)
+        idf = (np.log((1.0 + len(faqs)) / (1.0 + df)) + 1.0).astype(np.float32)
+        return cls(faqs, _normalize_rows(tf @ sparse.diags(idf)), idf, n_features)
+
+    def __len__(self) -> int:
+        return len(self.faqs)
+
+    def match(self, question: str, threshold: float = MATCH_THRESHOLD) -> Tuple[Dict, float]:
+        """Return (faq, similarity) for the closest stored question, or None below threshold"""
+        if not len(self.faqs):
+            return None
+        query = _normalize_rows(hashed_tf_matrix([normalize_question(question)], self.n_features) @ sparse.diags(self.idf))
+        similarities = (self.matrix @ query.T).toarray().ravel()
+        best = int(np.argmax(similarities))
+        if similarities[best] < threshold:
+            return None
+        return self.faqs[best], float(similarities[best])
+
+    def to_arrays(self, name: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and metadata that from_store needs, for writing to a mapped store"""
+        arrays = json_arrays(f"{name}.faqs", self.faqs)
+        arrays[f"{name}.data"] = self.matrix.data
+        arrays[f"{name}.indices"] = self.matrix.indices
+        arrays[f"{name}.indptr"] = self.matrix.indptr
+        arrays[f"{name}.idf"] = self.idf
+        return arrays, {"n_features": self.n_features}
+
+    @classmethod
+    def from_store(cls, store: MappedStore, name: str, meta: Dict[str, Any]) -> "FAQIndex":
+        """Rebuild an index whose questions and vectors are views into a mapped store"""
+        faqs = JSONRecords(store, f"{name}.faqs")
+        matrix = sparse.csr_matrix(
+            (store.array(f"{name}.data"), store.array(f"{name}.indices"), store.array(f"{name}.indptr")),
+            shape=(len(faqs), meta["n_features"]),
+            copy=False,
+        )
+        return cls(faqs, matrix, store.array(f"{name}.idf"), meta["n_features"])
+
+
+def _normalize_rows(matrix: sparse.spmatrix) -> sparse.csr_matrix:
+    """Scale each row of a sparse matrix to unit length (zero rows are left as-is)"""
+    matrix = sparse.csr_matrix(matrix, dtype=np.float32)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(matrix).tocsr().astype(np.float32)
@@ -3,6 +3,7 @@ import './App.css';
 
 // Use environment variable or fallback to local development
 const API_URL = process.env.REACT_APP_API_URL || "http://localhost:8000/chat";
+const STREAM_URL = `${API_URL}/stream`;
 
 // Debug log to verify the API URL
 console.log("🔗 API_URL:", API_URL);
@@ -79,10 +80,10 @@ export default function App() {
     setLoading(true);
     
     try {
-        console.log("🚀 Sending request to:", API_URL);
+        console.log("🚀 Sending request to:", STREAM_URL);
         console.log("📝 Message:", messageText);
         
-        const res = await fetch(API_URL, {
+        const res = await fetch(STREAM_URL, {
           method: "POST",
           headers: { "Content-Type": "application/json" },
           body: JSON.stringify({ message: messageText })
@@ -94,11 +95,44 @@ export default function App() {
           throw new Error(`HTTP error! status: ${res.status}`);
         }
         
-        const data = await res.json();
-        console.log("✅ Response data:", data);
+        // Read Server-Sent Events and append each chunk to the bot message as it arrives
+        const reader = res.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = "";
+        let started = false;
         
-        const botMsg = { sender: "bot", text: data.answer };
-        setMessages((msgs) => [...msgs, botMsg]);
+        while (true) {
+          const { done, value } = await reader.read();
+          if (done) break;
+          buffer += decoder.decode(value, { stream: true });
+          
+          const events = buffer.split("\n\n");
+          buffer = events.pop();
+          for (const event of events) {
+            const lines = event.split("\n");
+            const eventType = lines.find(line => line.startsWith("event:"))?.slice(6).trim() || "message";
+            const data = lines.filter(line => line.startsWith("data:")).map(line => line.slice(5).trim()).join("\n");
+            if (!data) continue;
+            const payload = JSON.parse(data);
+            
+            if (eventType === "done") {
+              console.log("✅ Stream complete:", payload);
+              continue;
+            }
+            
+            if (!started) {
+              // First token: swap the typing indicator for the message being streamed
+              started = true;
+              setLoading(false);
+              setMessages((msgs) => [...msgs, { sender: "bot", text: payload.text }]);
+            } else {
+              setMessages((msgs) => {
+                const last = msgs[msgs.length - 1];
+                return [...msgs.slice(0, -1), { ...last, text: last.text + payload.text }];
+              });
+            }
+          }
+        }
 
     } catch (error) {
         console.error("❌ Error:", error);
@@ -0,0 +1,133 @@
+from typing import Any, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from mapped_store import MappedPostings, MappedStore, MappedVocabulary, StringTable, postings_arrays, vocabulary_arrays
+
+# Shortest (alphabetic) query word that is corrected for typos; shorter words
+# are too often a different word one edit away
+MIN_TYPO_LENGTH = 4
+
+
+def _deletes(word: str) -> List[str]:
+    """Every string made by deleting one character of word"""
+    return list({word[:i] + word[i + 1:] for i in range(len(word))})
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Whether a and b differ by at most one insertion, deletion, substitution or adjacent transposition"""
+    if a == b:
+        return True
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) < len(b):
+        return a[i:] == b[i + 1:]
+    return a[i + 1:] == b[i + 1:] or (a[i + 2:] == b[i + 2:] and a[i:i + 2] == b[i:i + 2][::-1])
+
+
+class TermExpander:
+    """Expand query words that are not in the corpus vocabulary into close vocabulary terms
+
+    Unknown words are split into two known terms ("insat3dr" -> "insat",
+    "3dr"), adjacent words are joined ("scat sat" -> "scatsat"), and
+    alphabetic words are matched one edit away through a symmetric-delete
+    index ("satelite" -> "satellite"): every term is stored under each of
+    its single-character deletions, so candidates are found with one
+    lookup per deletion of the query word, independent of vocabulary size.
+    """
+
+    def __init__(self, terms: Sequence[str], term_ids, doc_freqs: np.ndarray, deletes):
+        self.terms = terms  # sorted vocabulary
+        self.term_ids = term_ids  # term -> position in terms
+        self.doc_freqs = doc_freqs
+        self.deletes = deletes  # single-deletion variant -> ids of the terms it came from
+
+    @classmethod
+    def build(cls, doc_freqs: Dict[str, int]) -> "TermExpander":
+        """Index a {term: document frequency} vocabulary"""
+        terms = sorted(doc_freqs)
+        term_ids = {term: i for i, term in enumerate(terms)}
+        deletes = {}
+        for term_id, term in enumerate(terms):
+            if term.isalpha() and len(term) >= MIN_TYPO_LENGTH - 1:
+                for variant in _deletes(term):
+                    deletes.setdefault(variant, []).append(term_id)
+        return cls(terms, term_ids, np.array([doc_freqs[term] for term in terms], dtype=np.int32), deletes)
+
+    def __contains__(self, word: str) -> bool:
+        return self.term_ids.get(word) is not None
+
+    def _doc_freq(self, term: str) -> int:
+        return int(self.doc_freqs[self.term_ids.get(term)])
+
+    def corrections(self, word: str) -> List[str]:
+        """Vocabulary terms one edit away from word, most frequent first"""
+        if not word.isalpha() or len(word) < MIN_TYPO_LENGTH:
+            return []
+        candidates = set()
+        for variant in [word] + _deletes(word):
+            term_ids = self.deletes.get(variant)
+            if term_ids is not None:
+                candidates.update(int(term_id) for term_id in term_ids)
+            # A term the query word has one extra character over
+            term_id = self.term_ids.get(variant)
+            if term_id is not None:
+                candidates.add(int(term_id))
+        found = [self.terms[term_id] for term_id in candidates]
+        found = [term for term in found if term != word and _within_one_edit(word, term)]
+        return sorted(found, key=lambda term: (-self._doc_freq(term), term))
+
+    def split(self, word: str) -> List[str]:
+        """Two vocabulary terms that concatenate to word, preferring the most common pair
+
+        Known words are only split between letters and digits, and only when
+        both parts are more common than the word itself (a page writing
+        "INSAT3DR" should not hide the many writing "INSAT-3DR").
+        """
+        known = word in self
+        best, best_freq = [], self._doc_freq(word) if known else 0
+        for i in range(1, len(word)):
+            left, right = word[:i], word[i:]
+            if known and left[-1].isdigit() == right[0].isdigit():
+                continue
+            if left in self and right in self:
+                freq = min(self._doc_freq(left), self._doc_freq(right))
+                if freq > best_freq:
+                    best, best_freq = [left, right], freq
+        return best
+
+    def expand(self, words: List[str], max_variants: int = 3) -> List[str]:
+        """Vocabulary terms to add for the (ordered) query words, at most max_variants per word or pair"""
+        added = []
+        for word in words:
+            variants = self.split(word)
+            if not variants and word not in self:
+                variants = self.corrections(word)
+            added.extend(variants[:max_variants])
+        for left, right in zip(words, words[1:]):
+            if left + right in self:
+                added.append(left + right)
+        return [term for i, term in enumerate(added) if term not in words and term not in added[:i]]
+
+    def to_arrays(self, name: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and metadata that from_store needs, for writing to a mapped store"""
+        # Term ids are positions in the sorted vocabulary, so its stored terms double as self.terms
+        arrays = vocabulary_arrays(f"{name}.vocabulary", self.term_ids)
+        arrays[f"{name}.doc_freqs"] = self.doc_freqs
+        arrays.update(postings_arrays(f"{name}.deletes", self.deletes))
+        return arrays, {}
+
+    @classmethod
+    def from_store(cls, store: MappedStore, name: str, meta: Dict[str, Any]) -> "TermExpander":
+        """Rebuild an expander whose vocabulary and delete index are views into a mapped store"""
+        return cls(
+            StringTable(store, f"{name}.vocabulary.terms"),
+            MappedVocabulary(store, f"{name}.vocabulary"),
+            store.array(f"{name}.doc_freqs"),
+            MappedPostings(store, f"{name}.deletes"),
+        )
@@ -0,0 +1,191 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Iterator, List
+
+# Gemini model used by the default backend
+GEMINI_MODEL = os.getenv("MOSDAC_GEMINI_MODEL", "gemini-1.5-flash")
+
+# Stub backend: delay before the first chunk, delay between chunks (ms), share of calls
+# that fail, answer length in words and random seed (for reproducible failures)
+STUB_LATENCY_MS = float(os.getenv("MOSDAC_STUB_LATENCY_MS", "0"))
+STUB_CHUNK_DELAY_MS = float(os.getenv("MOSDAC_STUB_CHUNK_DELAY_MS", "0"))
+STUB_FAILURE_RATE = float(os.getenv("MOSDAC_STUB_FAILURE_RATE", "0"))
+STUB_ANSWER_WORDS = int(os.getenv("MOSDAC_STUB_ANSWER_WORDS", "120"))
+STUB_SEED = int(os.getenv("MOSDAC_STUB_SEED", "0"))
+
+# Words per streamed stub chunk
+STUB_CHUNK_WORDS = 8
+
+# HTTP backend: base URL of the LLM server (e.g. llm_stub_server.py) and request timeout in seconds
+LLM_URL = os.getenv("MOSDAC_LLM_URL", "http://127.0.0.1:8081")
+LLM_TIMEOUT = float(os.getenv("MOSDAC_LLM_TIMEOUT", "60"))
+
+
+class GenerationError(Exception):
+    """A backend failed to produce (all of) an answer"""
+
+
+class GenerationBackend:
+    """Turns a prompt into answer text, whole or as a stream of chunks"""
+
+    name = "base"
+
+    @property
+    def identity(self) -> str:
+        """What produced an answer (backend plus model or endpoint), so cached answers are only reused for it"""
+        return self.name
+
+    def generate(self, prompt: str) -> str:
+        raise NotImplementedError
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Answer text in chunks as they are produced (one chunk unless overridden)"""
+        yield self.generate(prompt)
+
+
+class GeminiBackend(GenerationBackend):
+    """Google Gemini through the official SDK; needs GEMINI_API_KEY and network access"""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = GEMINI_MODEL, api_key: str = None):
+        api_key = api_key or os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY environment variable not set")
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name)
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.model_name}"
+
+    def generate(self, prompt: str) -> str:
+        return self.model.generate_content(prompt).text
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        for chunk in self.model.generate_content(prompt, stream=True):
+            if chunk.text:
+                yield chunk.text
+
+
+class StubBackend(GenerationBackend):
+    """Deterministic offline stand-in for an LLM, for load tests, benchmarks and CI
+
+    Answers restate the question and the sources in the prompt, padded to
+    answer_words words, after latency_ms plus chunk_delay_ms per chunk.
+    failure_rate of calls (drawn from a seeded generator) raise
+    GenerationError: before any text when generating, after the first
+    chunk when streaming, so partial-answer handling is exercised too.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency_ms: float = STUB_LATENCY_MS, chunk_delay_ms: float = STUB_CHUNK_DELAY_MS,
+                 failure_rate: float = STUB_FAILURE_RATE, answer_words: int = STUB_ANSWER_WORDS, seed: int = STUB_SEED):
+        self.latency_ms = latency_ms
+        self.chunk_delay_ms = chunk_delay_ms
+        self.failure_rate = failure_rate
+        self.answer_words = answer_words
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            self.calls += 1
+            failed = self.failure_rate > 0 and self._rng.random() < self.failure_rate
+            self.failures += failed
+            return failed
+
+    def _chunks(self, prompt: str) -> List[str]:
+        question = re.search(r'User Question: (.*)', prompt)
+        urls = list(dict.fromkeys(re.findall(r'https?://[^\s)\]]+', prompt)))[:3]
+        words = f"This is a stub answer to: {question.group(1).strip() if question else prompt[:80]}".split()
+        if urls:
+            words += ["Sources:"] + urls
+        filler = "MOSDAC archives satellite data from Indian meteorological and oceanographic missions.".split()
+        words += [filler[i % len(filler)] for i in range(self.answer_words - len(words))]
+        return [" ".join(words[i:i + STUB_CHUNK_WORDS]) + " " for i in range(0, len(words), STUB_CHUNK_WORDS)]
+
+    def generate(self, prompt: str) -> str:
+        chunks = self._chunks(prompt)
+        time.sleep((self.latency_ms + self.chunk_delay_ms * len(chunks)) / 1000)
+        if self._should_fail():
+            raise GenerationError("Injected stub failure")
+        return "".join(chunks).strip()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        fail = self._should_fail()
+        time.sleep(self.latency_ms / 1000)
+        for i, chunk in enumerate(self._chunks(prompt)):
+            if i:
+                time.sleep(self.chunk_delay_ms / 1000)
+            yield chunk
+            if fail:
+                raise GenerationError("Injected stub failure mid-stream")
+
+
+class HTTPBackend(GenerationBackend):
+    """An LLM behind the llm_stub_server.py protocol: POST /generate {"prompt", "stream"}
+
+    Whole answers come back as {"text"}; streams as newline-delimited
+    {"text"} objects, where an {"error"} object ends the stream.
+    """
+
+    name = "http"
+
+    def __init__(self, url: str = LLM_URL, timeout: float = LLM_TIMEOUT):
+        self.url = url.rstrip("/") + "/generate"
+        self.timeout = timeout
+
+    @property
+    def identity(self) -> str:
+        return f"{self.name}:{self.url}"
+
+    def _post(self, prompt: str, stream: bool):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps({"prompt": prompt, "stream": stream}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            raise GenerationError(f"LLM server returned {e.code}: {e.read().decode('utf-8', 'replace')[:200]}")
+        except urllib.error.URLError as e:
+            raise GenerationError(f"LLM server unreachable at {self.url}: {e.reason}")
+
+    def generate(self, prompt: str) -> str:
+        with self._post(prompt, stream=False) as response:
+            return json.loads(response.read())["text"]
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        with self._post(prompt, stream=True) as response:
+            for line in response:
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if "error" in event:
+                    raise GenerationError(event["error"])
+                yield event["text"]
+
+
+# Backends selectable with MOSDAC_LLM_BACKEND
+BACKENDS = {"gemini": GeminiBackend, "stub": StubBackend, "http": HTTPBackend}
+
+
+def create_backend(name: str) -> GenerationBackend:
+    """Backend registered under name, configured from the environment"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown generation backend '{name}' (expected one of: {', '.join(BACKENDS)})")
+    return BACKENDS[name]()
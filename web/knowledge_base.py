@@ -0,0 +1,499 @@
+import glob
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+from facets import facet_key, page_facets
+from passages import split_page
+
+try:
+    from bm25 import BM25FIndex
+    from dense_index import DenseIndex
+    from faq_index import FAQIndex, collect_faqs
+    from fuzzy import TermExpander
+    from positional_index import PositionalIndex
+    from snippets import extract_snippets
+    from product_index import ProductIndex, collect_products
+    import numpy as np
+    from mapped_store import JSONRecords, MappedPostings, MappedStore, json_arrays, postings_arrays, write_store
+except ImportError:  # NumPy/SciPy not installed: keyword ranking only
+    BM25FIndex = None
+    DenseIndex = None
+    FAQIndex = None
+    TermExpander = None
+    PositionalIndex = None
+    ProductIndex = None
+    MappedStore = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: workers may compile the same snapshot at once (each write is still atomic)
+    fcntl = None
+
+# Directory the scraper writes pages_<timestamp>.json snapshots to
+DATA_DIR = os.getenv(
+    "MOSDAC_DATA_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "mosdac_content"),
+)
+
+# Passage-level retrieval field weights
+PASSAGE_FIELD_WEIGHTS = {"title": 2.0, "section": 2.0, "text": 1.0}
+
+# Compiled artifacts are written next to their snapshot as <prefix>.kb; bump
+# ARTIFACT_FORMAT whenever the indexed structures change shape or the text
+# normalization behind them (tokenizer, stopwords, facet tagging) changes, so
+# stale artifacts are rebuilt instead of scoring queries normalized differently
+ARTIFACT_SUFFIX = ".kb"
+ARTIFACT_FORMAT = 10
+
+# Dense vectors that earlier versions cached beside the snapshot, now kept in the artifact
+LEGACY_DENSE_SUFFIXES = (".dense.npy", ".dense_components.npy", ".dense.meta")
+
+# Page record keys kept in the artifact (the rest are only needed while indexing)
+ARTIFACT_RECORD_KEYS = ("title_words", "faq_questions", "product_titles", "content_preview", "full_content_for_context")
+
+
+def find_latest_snapshot(data_dir: str = DATA_DIR) -> str:
+    """Path of the newest pages_*.json snapshot in data_dir, or None"""
+    # Skip derived files (e.g. cached indexes) that share the snapshot prefix
+    files = [
+        f for f in glob.glob(os.path.join(data_dir, "pages_*.json"))
+        if re.fullmatch(r'pages_[^.]+\.json', os.path.basename(f))
+    ]
+    if not files:
+        return None
+    return max(files, key=os.path.getctime)
+
+
+def snapshot_version(path: str) -> str:
+    """Identifier that changes whenever a snapshot file is replaced or rewritten"""
+    return f"{os.path.basename(path)}@{int(os.path.getmtime(path))}"
+
+
+def artifact_path(snapshot_path: str) -> str:
+    """Where the compiled artifact for a snapshot lives"""
+    return os.path.splitext(snapshot_path)[0] + ARTIFACT_SUFFIX
+
+
+@contextmanager
+def compile_lock(snapshot_path: str):
+    """Hold an exclusive lock on a snapshot's artifact across processes while it is compiled"""
+    lock_file = None
+    if fcntl is not None:
+        try:
+            lock_file = open(artifact_path(snapshot_path) + ".lock", "w")
+        except OSError:
+            pass  # Read-only data directory: no artifact can be written either
+    try:
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+    finally:
+        if lock_file is not None:
+            lock_file.close()  # Releases the lock
+
+
+def compile_in_subprocess(snapshot_path: str) -> bool:
+    """Compile a snapshot's artifact by running this module in a child process; return whether it succeeded"""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), snapshot_path],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    if result.returncode != 0:
+        print(f"⚠️ Compiling {snapshot_path} in a subprocess failed: {result.stderr.strip()[-500:]}")
+    return result.returncode == 0
+
+
+def remove_stale_artifacts(snapshot_path: str):
+    """Delete the artifacts (and locks) of snapshots older than this one, and its own legacy dense caches
+
+    Processes still mapping a removed artifact keep a valid view; a file
+    that cannot be removed yet (e.g. mapped on Windows) is left for a later compile.
+    """
+    prefix = os.path.splitext(snapshot_path)[0]
+    created = os.path.getctime(snapshot_path)
+    for path in glob.glob(os.path.join(os.path.dirname(snapshot_path), "pages_*")):
+        suffixes = (ARTIFACT_SUFFIX, ARTIFACT_SUFFIX + ".lock") + LEGACY_DENSE_SUFFIXES
+        suffix = next((suffix for suffix in suffixes if path.endswith(suffix)), None)
+        if suffix is None:
+            continue
+        owner = path[:-len(suffix)]
+        if os.path.abspath(owner) == os.path.abspath(prefix):
+            stale = suffix in LEGACY_DENSE_SUFFIXES
+        else:
+            snapshot = owner + ".json"
+            stale = not os.path.exists(snapshot) or os.path.getctime(snapshot) < created
+        if stale:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def content_stats(pages: List[Dict]) -> Dict[str, int]:
+    """Counts of structured content (and the pages carrying it) reported at startup"""
+    stats = {}
+    for kind in ("faqs", "data_products", "tables", "lists"):
+        stats[kind] = sum(len(page.get(kind, [])) for page in pages)
+        stats[f"pages_with_{kind}"] = sum(1 for page in pages if page.get(kind))
+    return stats
+
+
+def build_page_record(page: Dict) -> Dict:
+    """Extract the text, token sets and context previews used to score a page"""
+    # Get all text content from the page
+    title = page.get("title", "")
+    description = page.get("description", "")
+    main_content = page.get("main_content", "")
+    markdown = page.get("markdown", "")
+
+    # Get structured content
+    headings = page.get("headings", [])
+    tables = page.get("tables", [])
+    lists = page.get("lists", [])
+    faqs = page.get("faqs", [])
+    data_products = page.get("data_products", [])
+
+    # Combine all text content
+    headings_text = " ".join([h.get("text", "") for h in headings])
+    tables_text = " ".join([
+        " ".join(table.get("headers", []) + [" ".join(row) for row in table.get("rows", [])])
+        for table in tables
+    ])
+    lists_text = " ".join([
+        " ".join(lst.get("items", []))
+        for lst in lists
+    ])
+    faqs_text = " ".join([
+        f"{faq.get('question', '')} {faq.get('answer', '')}"
+        for faq in faqs
+    ])
+    products_text = " ".join([
+        f"{prod.get('title', '')} {prod.get('description', '')}"
+        for prod in data_products
+    ])
+
+    # Fallback text for older scraped data
+    structured_data = page.get("structured_data", "")
+    if isinstance(structured_data, dict):
+        structured_text = " ".join([str(v) for v in structured_data.values() if isinstance(v, str)])
+    else:
+        structured_text = str(structured_data) if structured_data else ""
+
+    # Use structured content if available, otherwise fall back to markdown
+    if main_content or headings_text or tables_text:
+        full_content = f"{title} {description} {main_content} {headings_text} {tables_text} {lists_text} {faqs_text} {products_text}".lower()
+    else:
+        full_content = f"{title} {markdown} {structured_text}".lower()
+
+    # Extract relevant content for context
+    if main_content:
+        content_preview = main_content[:2000]
+        full_content_for_context = f"{main_content} {headings_text} {tables_text} {lists_text}"[:5000]
+    else:
+        content_preview = markdown[:2000] if markdown else structured_text[:2000]
+        full_content_for_context = markdown[:5000] if markdown else structured_text[:5000]
+
+    # Per-field text for BM25F ranking
+    fields = {
+        "title": title,
+        "description": description,
+        "headings": headings_text,
+        "faqs": faqs_text,
+        "data_products": products_text,
+        "tables": f"{tables_text} {lists_text}",
+        "main_content": main_content or markdown or structured_text,
+    }
+
+    return {
+        "page": page,
+        "fields": fields,
+        "content_words": set(re.findall(r'\w+', full_content)),
+        "title_words": set(re.findall(r'\w+', title.lower())),
+        "faq_questions": [faq.get("question", "").lower() for faq in faqs],
+        "product_titles": [prod.get("title", "").lower() for prod in data_products],
+        "content_preview": content_preview,
+        "full_content_for_context": full_content_for_context,
+    }
+
+
+class KnowledgeBase:
+    """One scraped snapshot with every search index built over it
+
+    Instances are never modified after construction, so a reader holding a
+    reference keeps a consistent view while a newer snapshot is loaded and
+    swapped in alongside it.
+    """
+
+    def __init__(self, pages: List[Dict], source_path: str = None, version: str = None):
+        start = time.perf_counter()
+        self.pages = pages
+        self.source_path = source_path
+        self.version = version
+        self.loaded_from = "json"
+        self.loaded_at = time.time()
+        self.stats = content_stats(pages)
+        self.page_records = [build_page_record(page) for page in pages]
+
+        # Map every token to the (sorted) list of page IDs that contain it
+        inverted_index = defaultdict(list)
+        for page_id, record in enumerate(self.page_records):
+            for word in record["content_words"]:
+                inverted_index[word].append(page_id)
+        self.inverted_index = dict(inverted_index)
+
+        # Typo- and spacing-tolerant expansion of query words onto this vocabulary
+        self.term_expander = None
+        if TermExpander is not None:
+            self.term_expander = TermExpander.build({word: len(page_ids) for word, page_ids in self.inverted_index.items()})
+
+        # Mission/category facets: "mission:insat-3dr" -> sorted page IDs
+        facet_index = defaultdict(list)
+        for page_id, page in enumerate(pages):
+            for facet_type, values in page_facets(page).items():
+                for value in values:
+                    facet_index[facet_key(facet_type, value)].append(page_id)
+        self.facet_index = dict(facet_index)
+        self.facet_counts = {key: len(page_ids) for key, page_ids in self.facet_index.items()}
+
+        # Field-weighted BM25 index (optional, needs NumPy/SciPy)
+        self.bm25_index = None
+        if BM25FIndex is not None:
+            self.bm25_index = BM25FIndex().fit([record["fields"] for record in self.page_records])
+
+        # Overlapping passages split along heading, list and table boundaries
+        self.passages = [passage for page_id, page in enumerate(pages) for passage in split_page(page, page_id)]
+        for passage_id, passage in enumerate(self.passages):
+            passage["id"] = passage_id
+        # Page of every passage, so ranked passages can be grouped without reading them,
+        # and where each page's (contiguous) passages start
+        self.passage_page_ids = [passage["page_id"] for passage in self.passages]
+        self.page_passage_offsets = [0] * (len(pages) + 1)
+        for page_id in self.passage_page_ids:
+            self.page_passage_offsets[page_id + 1] += 1
+        for page_id in range(len(pages)):
+            self.page_passage_offsets[page_id + 1] += self.page_passage_offsets[page_id]
+        self.passage_index = None
+        if BM25FIndex is not None:
+            self.passage_index = BM25FIndex(field_weights=PASSAGE_FIELD_WEIGHTS).fit([
+                {"title": passage["title"], "section": passage["section"], "text": passage["text"]}
+                for passage in self.passages
+            ])
+
+        # Semantic (LSA) vectors over the same passages (persisted in the compiled artifact)
+        self.dense_index = None
+        if DenseIndex is not None and self.passages:
+            self.dense_index = DenseIndex.build(self._dense_texts())
+
+        # Token positions in the same passage text, for quoted phrases and proximity
+        self.positional_index = None
+        if PositionalIndex is not None:
+            self.positional_index = PositionalIndex.build(self._dense_texts())
+
+        # Stored FAQ questions, for answering close matches without the LLM
+        self.faq_index = None
+        if FAQIndex is not None:
+            self.faq_index = FAQIndex.build(collect_faqs(pages))
+
+        # Distinct data products, for catalog search without retrieval or the LLM
+        self.product_index = None
+        if ProductIndex is not None:
+            self.product_index = ProductIndex.build(collect_products(pages))
+        self.load_ms = (time.perf_counter() - start) * 1000
+
+    def _dense_texts(self) -> List[str]:
+        """Text embedded for each passage by the dense index (and indexed by the positional index)"""
+        return [f"{passage['title']} {passage['section']} {passage['text']}" for passage in self.passages]
+
+    def snippets(self, passage: Dict, words: List[str]) -> List[Dict]:
+        """Query-biased snippets of a passage's text with highlight spans (none without NumPy)"""
+        if self.positional_index is None:
+            return []
+        # The passage text follows "title section " in the indexed text
+        text_start = len(passage["title"]) + len(passage["section"]) + 2
+        return extract_snippets(self.positional_index, passage["id"], passage["text"], text_start, words)
+
+    def filter_pages(self, facets: Dict[str, List[str]], match_all: bool = True) -> List[int]:
+        """Sorted IDs of the pages carrying the given facets
+
+        A page matches a facet type when it has any of its values; with
+        match_all it must match every given type, otherwise any of them.
+        """
+        selected = None
+        for facet_type, values in facets.items():
+            page_ids = set()
+            for value in values:
+                page_ids.update(int(page_id) for page_id in self.facet_index.get(facet_key(facet_type, value), ()))
+            if selected is None:
+                selected = page_ids
+            else:
+                selected = selected & page_ids if match_all else selected | page_ids
+        return sorted(selected or ())
+
+    def filter_passages(self, page_ids: List[int]) -> List[int]:
+        """Sorted IDs of the passages of the given (sorted) pages"""
+        offsets = self.page_passage_offsets
+        return [passage_id for page_id in page_ids for passage_id in range(offsets[page_id], offsets[page_id + 1])]
+
+    @classmethod
+    def load(cls, path: str, build_in_subprocess: bool = False) -> "KnowledgeBase":
+        """Load a pages_*.json snapshot from its compiled artifact, compiling it first if missing or stale
+
+        One process compiles while any others loading the same snapshot wait
+        for it and then map the artifact it wrote, so uvicorn workers share one
+        copy of every snapshot, including ones picked up by hot reload.
+        With build_in_subprocess the compile runs in a child process, so a
+        serving process keeps handling requests instead of holding the GIL
+        for the whole build. Without NumPy, or if the artifact cannot be
+        written, the snapshot is indexed from JSON in memory.
+        """
+        start = time.perf_counter()
+        version = snapshot_version(path)
+        kb = cls.load_compiled(path, version)
+        if kb is None and build_in_subprocess and MappedStore is not None and compile_in_subprocess(path):
+            kb = cls.load_compiled(path, version)
+        if kb is None:
+            with compile_lock(path):
+                # Another process may have compiled it while this one waited
+                kb = cls.load_compiled(path, version)
+                if kb is None:
+                    kb = cls._compile_snapshot(path, version)
+        kb.load_ms = (time.perf_counter() - start) * 1000
+        return kb
+
+    @classmethod
+    def _compile_snapshot(cls, path: str, version: str) -> "KnowledgeBase":
+        """Index a snapshot from JSON, compile it and map the result (the in-memory index if that fails)"""
+        with open(path, "r", encoding="utf-8") as f:
+            kb = cls(json.load(f), source_path=path, version=version)
+        if MappedStore is None:
+            return kb
+        try:
+            kb.compile()
+        except Exception as e:
+            print(f"⚠️ Could not compile {artifact_path(path)}, serving {version} from memory: {e!r}")
+            return kb
+        return cls.load_compiled(path, version) or kb
+
+    def compile(self) -> str:
+        """Write the snapshot and its indexes to a memory-mappable artifact next to the snapshot; return its path
+
+        Pages, page records and passages are stored as JSON records decoded
+        on access; the inverted index, BM25F matrices, dense and FAQ vectors as
+        flat arrays. Every process that loads the artifact maps the same file
+        read-only, so uvicorn workers share one copy through the page cache.
+        Artifacts of older snapshots are removed once it is written.
+        """
+        records = [
+            {key: sorted(record[key]) if key == "title_words" else record[key] for key in ARTIFACT_RECORD_KEYS}
+            for record in self.page_records
+        ]
+        arrays = {}
+        arrays.update(json_arrays("pages", self.pages))
+        arrays.update(json_arrays("page_records", records))
+        arrays.update(json_arrays("passages", self.passages))
+        arrays.update(postings_arrays("inverted_index", self.inverted_index))
+        arrays.update(postings_arrays("facet_index", self.facet_index))
+        arrays["passage_page_ids"] = np.array(self.passage_page_ids, dtype=np.int32)
+        arrays["page_passage_offsets"] = np.array(self.page_passage_offsets, dtype=np.int64)
+        meta = {"format": ARTIFACT_FORMAT, "version": self.version, "stats": self.stats, "facet_counts": self.facet_counts}
+        for name, index in (("bm25", self.bm25_index), ("fuzzy", self.term_expander), ("passage_index", self.passage_index), ("dense", self.dense_index),
+                            ("positions", self.positional_index), ("faq", self.faq_index),
+                            ("products", self.product_index)):
+            if index is not None:
+                index_arrays, meta[name] = index.to_arrays(name)
+                arrays.update(index_arrays)
+
+        path = artifact_path(self.source_path)
+        write_store(path, arrays, meta)
+        remove_stale_artifacts(self.source_path)
+        return path
+
+    @classmethod
+    def load_compiled(cls, path: str, version: str) -> "KnowledgeBase":
+        """Map the compiled artifact of a snapshot, or return None if it is missing or stale"""
+        if MappedStore is None:
+            return None
+        try:
+            store = MappedStore(artifact_path(path))
+        except (OSError, ValueError):
+            return None
+        meta = store.meta
+        if meta.get("format") != ARTIFACT_FORMAT or meta.get("version") != version:
+            return None
+
+        kb = cls.__new__(cls)
+        kb.source_path = path
+        kb.version = version
+        kb.loaded_from = "artifact"
+        kb.loaded_at = time.time()
+        kb.stats = meta["stats"]
+        kb.pages = JSONRecords(store, "pages")
+        kb.page_records = JSONRecords(store, "page_records")
+        kb.passages = JSONRecords(store, "passages")
+        kb.passage_page_ids = store.array("passage_page_ids")
+        kb.page_passage_offsets = store.array("page_passage_offsets")
+        kb.facet_index = MappedPostings(store, "facet_index")
+        kb.facet_counts = meta["facet_counts"]
+        kb.inverted_index = MappedPostings(store, "inverted_index")
+        kb.term_expander = TermExpander.from_store(store, "fuzzy", meta["fuzzy"]) if "fuzzy" in meta else None
+        kb.bm25_index = BM25FIndex.from_store(store, "bm25", meta["bm25"]) if "bm25" in meta else None
+        kb.passage_index = BM25FIndex.from_store(store, "passage_index", meta["passage_index"]) if "passage_index" in meta else None
+        kb.dense_index = DenseIndex.from_store(store, "dense", meta["dense"]) if "dense" in meta else None
+        kb.positional_index = PositionalIndex.from_store(store, "positions", meta["positions"]) if "positions" in meta else None
+        kb.faq_index = FAQIndex.from_store(store, "faq", meta["faq"]) if "faq" in meta else None
+        kb.product_index = ProductIndex.from_store(store, "products", meta["products"]) if "products" in meta else None
+        return kb
+
+    def status(self) -> Dict:
+        """Version and size summary of the snapshot"""
+        return {
+            "version": self.version,
+            "source": self.source_path,
+            "pages": len(self.pages),
+            "passages": len(self.passages),
+            "terms": len(self.inverted_index),
+            "faqs": len(self.faq_index) if self.faq_index is not None else 0,
+            "products": len(self.product_index) if self.product_index is not None else 0,
+            "loaded_from": self.loaded_from,
+            "loaded_at": self.loaded_at,
+            "load_ms": self.load_ms,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Compile a scraped snapshot into a fast-loading knowledge base artifact")
+    parser.add_argument("snapshot", nargs="?", help="pages_*.json file to compile (default: the latest in the data directory)")
+    args = parser.parse_args()
+
+    snapshot = args.snapshot or find_latest_snapshot()
+    if not snapshot:
+        raise SystemExit("❌ No scraped data found. Please run the scraper first.")
+
+    # Serving workers may be compiling the same snapshot (see KnowledgeBase.load);
+    # map what another process already wrote rather than compiling it again
+    version = snapshot_version(snapshot)
+    output = artifact_path(snapshot)
+    with compile_lock(snapshot):
+        json_ms = None
+        if KnowledgeBase.load_compiled(snapshot, version) is None:
+            start = time.perf_counter()
+            with open(snapshot, "r", encoding="utf-8") as f:
+                kb = KnowledgeBase(json.load(f), source_path=snapshot, version=version)
+            json_ms = (time.perf_counter() - start) * 1000
+            output = kb.compile()
+    compiled = KnowledgeBase.load(snapshot)
+
+    if json_ms is None:
+        print(f"📦 {output} is already up to date ({os.path.getsize(output) / 1024:.0f} KB)")
+        print(f"⏱️ Cold start: {compiled.load_ms:.0f} ms from the compiled artifact")
+    else:
+        print(f"📦 Compiled {snapshot} -> {output} ({os.path.getsize(output) / 1024:.0f} KB)")
+        print(f"⏱️ Cold start: {json_ms:.0f} ms from JSON, {compiled.load_ms:.0f} ms from the compiled artifact")
@@ -0,0 +1,100 @@
+import argparse
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from generation import (STUB_ANSWER_WORDS, STUB_CHUNK_DELAY_MS, STUB_FAILURE_RATE, STUB_LATENCY_MS, STUB_SEED,
+                        GenerationError, StubBackend)
+
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """POST /generate {"prompt", "stream"}: {"text"}, or newline-delimited {"text"} chunks when streaming
+
+    A failure is a 500 with {"error"}, or an {"error"} line once a stream
+    has started. GET / reports the backend settings and call counters.
+    """
+
+    backend: StubBackend = None
+    protocol_version = "HTTP/1.1"
+
+    def _send_json(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        backend = self.backend
+        self._send_json(200, {
+            "status": "MOSDAC stub LLM running",
+            "latency_ms": backend.latency_ms,
+            "chunk_delay_ms": backend.chunk_delay_ms,
+            "failure_rate": backend.failure_rate,
+            "calls": backend.calls,
+            "failures": backend.failures,
+        })
+
+    def do_POST(self):
+        if self.path != "/generate":
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            prompt = request["prompt"]
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {"error": "Expected a JSON body with a prompt"})
+            return
+
+        if not request.get("stream"):
+            try:
+                self._send_json(200, {"text": self.backend.generate(prompt)})
+            except GenerationError as e:
+                self._send_json(500, {"error": str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for text in self.backend.stream(prompt):
+                self._write_chunk({"text": text})
+        except GenerationError as e:
+            self._write_chunk({"error": str(e)})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, event: dict):
+        data = (json.dumps(event) + "\n").encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host: str, port: int, backend: StubBackend) -> ThreadingHTTPServer:
+    """HTTP server answering every request with backend (not yet serving)"""
+    handler = type("Handler", (StubLLMHandler,), {"backend": backend})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the LLM, for offline load tests (use with MOSDAC_LLM_BACKEND=http)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=STUB_LATENCY_MS, help="delay before the first chunk")
+    parser.add_argument("--chunk-delay-ms", type=float, default=STUB_CHUNK_DELAY_MS, help="delay between streamed chunks")
+    parser.add_argument("--failure-rate", type=float, default=STUB_FAILURE_RATE, help="share of requests that fail (0-1)")
+    parser.add_argument("--answer-words", type=int, default=STUB_ANSWER_WORDS, help="words per answer")
+    parser.add_argument("--seed", type=int, default=STUB_SEED, help="seed for failure injection")
+    args = parser.parse_args()
+
+    backend = StubBackend(args.latency_ms, args.chunk_delay_ms, args.failure_rate, args.answer_words, args.seed)
+    server = make_server(args.host, args.port, backend)
+    print(f"🧪 Stub LLM listening on http://{args.host}:{args.port} (latency {args.latency_ms:.0f} ms, "
+          f"{args.chunk_delay_ms:.0f} ms/chunk, failure rate {args.failure_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Stub LLM stopped")
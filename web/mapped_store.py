@@ -0,0 +1,215 @@
+import bisect
+import json
+import mmap
+import os
+import zlib
+from typing import Any, Dict, Iterable, List, Sequence
+
+import numpy as np
+
+# File layout: magic, 8-byte little-endian header length, JSON header, then
+# each array's raw bytes at an aligned offset from the start of the data
+MAGIC = b"MOSDACKB"
+ALIGNMENT = 64
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_store(path: str, arrays: Dict[str, np.ndarray], meta: Dict[str, Any]):
+    """Write named arrays plus JSON metadata to one flat file that MappedStore can map
+
+    The file is written under a temporary name (unique to this process) and
+    renamed into place, so processes that already mapped the previous version
+    keep a valid view.
+    """
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        offset = _align(offset)
+        specs[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += array.nbytes
+    header = json.dumps({"meta": meta, "arrays": specs}).encode("utf-8")
+    data_start = _align(len(MAGIC) + 8 + len(header))
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + specs[name]["offset"])
+            # A byte view rather than memoryview.cast, which rejects shapes containing zero
+            f.write(array.reshape(-1).view(np.uint8))
+    os.replace(tmp_path, path)
+
+
+class MappedStore:
+    """Read-only memory map of a file written by write_store
+
+    Arrays are zero-copy views into the map, so every process mapping the
+    same file shares one copy of the data through the page cache.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a compiled knowledge base")
+        header_length = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 8], "little")
+        header = json.loads(self._mmap[len(MAGIC) + 8:len(MAGIC) + 8 + header_length])
+        self.meta = header["meta"]
+        self._specs = header["arrays"]
+        self._data_start = _align(len(MAGIC) + 8 + header_length)
+
+    def array(self, name: str) -> np.ndarray:
+        """Read-only view of a stored array"""
+        spec = self._specs[name]
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        count = int(np.prod(shape, dtype=np.int64))
+        if count == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=self._data_start + spec["offset"]).reshape(shape)
+
+
+def string_arrays(name: str, strings: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Pack strings as one UTF-8 blob plus an offsets array, for StringTable"""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return {
+        f"{name}.blob": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        f"{name}.offsets": offsets,
+    }
+
+
+def json_arrays(name: str, records: Iterable[Any]) -> Dict[str, np.ndarray]:
+    """Pack JSON-serialisable records for JSONRecords"""
+    return string_arrays(name, (json.dumps(record, ensure_ascii=False) for record in records))
+
+
+def _term_hash(term: str) -> int:
+    """Hash of a term that is stable across processes (unlike hash())"""
+    return zlib.crc32(term.encode("utf-8"))
+
+
+def vocabulary_arrays(name: str, vocabulary: Dict[str, int]) -> Dict[str, np.ndarray]:
+    """Pack a {term: id} mapping as sorted terms plus their ids and a hash table, for MappedVocabulary"""
+    terms = sorted(vocabulary)
+    arrays = string_arrays(f"{name}.terms", terms)
+    arrays[f"{name}.ids"] = np.array([vocabulary[term] for term in terms], dtype=np.int32)
+    hashes = np.array([_term_hash(term) for term in terms], dtype=np.uint32)
+    order = np.argsort(hashes, kind="stable").astype(np.int32)
+    arrays[f"{name}.hashes"] = hashes[order]
+    arrays[f"{name}.hash_order"] = order
+    return arrays
+
+
+def postings_arrays(name: str, postings: Dict[str, List[int]]) -> Dict[str, np.ndarray]:
+    """Pack {term: sorted ids} posting lists as a vocabulary plus CSR-style arrays, for MappedPostings"""
+    terms = sorted(postings)
+    arrays = vocabulary_arrays(name, {term: i for i, term in enumerate(terms)})
+    indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum([len(postings[term]) for term in terms], out=indptr[1:])
+    arrays[f"{name}.indptr"] = indptr
+    arrays[f"{name}.indices"] = np.fromiter((i for term in terms for i in postings[term]), dtype=np.int32, count=int(indptr[-1]))
+    return arrays
+
+
+class StringTable(Sequence):
+    """Sequence of strings decoded on access from a mapped blob"""
+
+    def __init__(self, store: MappedStore, name: str):
+        # Memoryviews index to plain ints/bytes much faster than NumPy scalars
+        self._blob = memoryview(store.array(f"{name}.blob"))
+        self._offsets = memoryview(store.array(f"{name}.offsets"))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1]], "utf-8")
+
+
+class JSONRecords(StringTable):
+    """Sequence of JSON records (dicts, lists) decoded on access
+
+    Each access returns a fresh object, so callers may modify it freely.
+    """
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return json.loads(super().__getitem__(index))
+
+
+class MappedVocabulary:
+    """Read-only {term: id} lookup over mapped, sorted terms
+
+    Terms are found through their hashes (one searchsorted plus one string
+    comparison) rather than a binary search that decodes a term per step.
+    """
+
+    def __init__(self, store: MappedStore, name: str):
+        self._terms = StringTable(store, f"{name}.terms")
+        self._ids = store.array(f"{name}.ids")
+        self._hashes = memoryview(store.array(f"{name}.hashes"))
+        self._hash_order = memoryview(store.array(f"{name}.hash_order"))
+
+    def _position(self, term: str) -> int:
+        """Position of term in the sorted terms, or -1"""
+        term_hash = _term_hash(term)
+        i = bisect.bisect_left(self._hashes, term_hash)
+        while i < len(self._hashes) and self._hashes[i] == term_hash:
+            position = self._hash_order[i]
+            if self._terms[position] == term:
+                return position
+            i += 1
+        return -1
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def __contains__(self, term: str) -> bool:
+        return self._position(term) >= 0
+
+    def __getitem__(self, term: str) -> int:
+        position = self._position(term)
+        if position < 0:
+            raise KeyError(term)
+        return int(self._ids[position])
+
+    def get(self, term: str, default: Any = None) -> Any:
+        position = self._position(term)
+        return int(self._ids[position]) if position >= 0 else default
+
+
+class MappedPostings:
+    """Read-only {term: sorted ids} posting lists over mapped arrays"""
+
+    def __init__(self, store: MappedStore, name: str):
+        self._vocabulary = MappedVocabulary(store, name)
+        self._indptr = store.array(f"{name}.indptr")
+        self._indices = store.array(f"{name}.indices")
+
+    def __len__(self) -> int:
+        return len(self._vocabulary)
+
+    def __contains__(self, term: str) -> bool:
+        return term in self._vocabulary
+
+    def get(self, term: str, default: Any = None) -> Any:
+        term_id = self._vocabulary.get(term)
+        if term_id is None:
+            return default
+        return self._indices[self._indptr[term_id]:self._indptr[term_id + 1]]
@@ -0,0 +1,130 @@
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+from typing import Dict, List
+
+from knowledge_base import KnowledgeBase, artifact_path, find_latest_snapshot, snapshot_version
+
+QUERIES = [
+    "INSAT-3DR imager data",
+    "sea surface salinity",
+    "rainfall estimation product",
+    "how to download satellite data",
+    "SCATSAT-1 wind vectors",
+]
+
+
+def memory_kb() -> Dict[str, int]:
+    """Resident, proportional (shared pages split between processes) and private memory in KB (Linux only)"""
+    fields = {}
+    with open("/proc/self/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss": fields.get("Rss", 0),
+        "pss": fields.get("Pss", 0),
+        "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def _worker(snapshot: str, mode: str, loaded, done, results):
+    """Load the knowledge base like one uvicorn worker would, serve a few queries and report memory"""
+    baseline = memory_kb()
+    if mode == "artifact":
+        kb = KnowledgeBase.load(snapshot)
+        assert kb.loaded_from == "artifact", "compile the snapshot first"
+    else:
+        with open(snapshot, "r", encoding="utf-8") as f:
+            kb = KnowledgeBase(json.load(f), source_path=snapshot, version=snapshot_version(snapshot))
+
+    # Touch everything a long-running worker eventually reads
+    for query in QUERIES:
+        for passage_id, _ in kb.passage_index.top_k(query, 20) + kb.dense_index.top_k(query, 20):
+            kb.passages[passage_id]
+        for page_id, _ in kb.bm25_index.top_k(query, 5):
+            kb.pages[page_id]
+    for page_id in range(len(kb.pages)):
+        kb.page_records[page_id]
+
+    # Measure once every worker holds its knowledge base, so shared pages are split between them
+    loaded.wait()
+    used = memory_kb()
+    results.put({key: used[key] - baseline[key] for key in used})
+    done.wait()
+
+
+def measure(snapshot: str, mode: str, workers: int) -> Dict[str, float]:
+    """Average per-worker memory growth (KB) from loading the knowledge base in `workers` processes"""
+    context = multiprocessing.get_context("spawn")
+    loaded, done = context.Barrier(workers), context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(snapshot, mode, loaded, done, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in processes]
+    done.wait()
+    for process in processes:
+        process.join()
+    return {key: sum(sample[key] for sample in samples) / workers for key in samples[0]}
+
+
+def scaled_snapshot(snapshot: str, pages: int, directory: str) -> str:
+    """Write a copy of the snapshot repeated (with distinct URLs) up to `pages` pages"""
+    with open(snapshot, "r", encoding="utf-8") as f:
+        original = json.load(f)
+    scaled = []
+    for i in range(pages):
+        page = dict(original[i % len(original)])
+        if i >= len(original):
+            page["url"] = f"{page.get('url', '')}#copy-{i // len(original)}"
+        scaled.append(page)
+    path = os.path.join(directory, f"pages_scaled{pages}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(scaled, f, ensure_ascii=False)
+    return path
+
+
+def run(snapshot: str, workers: int, pages: int = None) -> List[Dict]:
+    directory = tempfile.mkdtemp(prefix="mosdac-memory-")
+    try:
+        if pages:
+            snapshot = scaled_snapshot(snapshot, pages, directory)
+        else:
+            snapshot = shutil.copy(snapshot, directory)
+        with open(snapshot, "r", encoding="utf-8") as f:
+            KnowledgeBase(json.load(f), source_path=snapshot, version=snapshot_version(snapshot)).compile()
+        artifact_mb = os.path.getsize(artifact_path(snapshot)) / 1024 / 1024
+
+        rows = []
+        for mode in ("json", "artifact"):
+            memory = measure(snapshot, mode, workers)
+            rows.append({"mode": mode, "workers": workers, "artifact_mb": artifact_mb, **{f"{key}_mb": value / 1024 for key, value in memory.items()}})
+        return rows
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of JSON-loaded and memory-mapped knowledge bases")
+    parser.add_argument("snapshot", nargs="?", help="pages_*.json file (default: the latest in the data directory)")
+    parser.add_argument("--workers", type=int, default=4, help="worker processes to start (default: 4)")
+    parser.add_argument("--pages", type=int, help="repeat the snapshot's pages up to this many pages")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    snapshot = args.snapshot or find_latest_snapshot()
+    if not snapshot:
+        raise SystemExit("❌ No scraped data found. Please run the scraper first.")
+    rows = run(snapshot, args.workers, args.pages)
+    if args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print(f"🧠 Knowledge base memory per worker ({args.workers} workers, artifact {rows[0]['artifact_mb']:.1f} MB)")
+        print(f"{'mode':<10}{'RSS MB':>10}{'PSS MB':>10}{'private MB':>12}")
+        for row in rows:
+            print(f"{row['mode']:<10}{row['rss_mb']:>10.1f}{row['pss_mb']:>10.1f}{row['private_mb']:>12.1f}")
@@ -0,0 +1,176 @@
+import bisect
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Tuple
+
+# Histogram bucket upper bounds: stage latencies in seconds, prompt sizes in tokens
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (250, 500, 1000, 1500, 2000, 2500, 3000, 4000, 6000, 8000)
+
+# Quantiles reported over the most recent QUANTILE_WINDOW observations of each histogram
+QUANTILES = (0.5, 0.95, 0.99)
+QUANTILE_WINDOW = 1024
+
+# Name -> (type, help, buckets) of every metric the chatbot records
+DEFINITIONS = {
+    "mosdac_stage_seconds": (
+        "histogram",
+        "Latency of each request stage (load, faq, search, lexical, dense, fusion, prompt, generate, "
+        "generate_first_chunk, chat)",
+        LATENCY_BUCKETS,
+    ),
+    "mosdac_prompt_tokens": ("histogram", "Estimated tokens per Gemini prompt", TOKEN_BUCKETS),
+    "mosdac_answers_total": ("counter", "Answers by the path that produced them (faq, cache, no_results, llm, error)", None),
+    "mosdac_errors_total": ("counter", "Failed operations by stage", None),
+}
+
+_NO_TIMER = nullcontext()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels: Iterable[Tuple[str, str]]) -> str:
+    pairs = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + pairs + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Histogram:
+    """Cumulative bucket counts plus a window of recent observations for quantiles"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=QUANTILE_WINDOW)
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+        self.recent.append(value)
+
+    def quantiles(self) -> List[Tuple[float, float]]:
+        ordered = sorted(self.recent)
+        if not ordered:
+            return []
+        return [(q, ordered[min(len(ordered) - 1, int(q * len(ordered)))]) for q in QUANTILES]
+
+
+class _Timer:
+    """Context manager observing its elapsed time into a stage histogram"""
+
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics: "Metrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe("mosdac_stage_seconds", time.perf_counter() - self.start, stage=self.stage)
+        return False
+
+
+class Metrics:
+    """Thread-safe counters and histograms rendered in the Prometheus text format
+
+    Observations cost a lock, a bisect and a few additions. A disabled
+    instance records nothing: time() returns a shared do-nothing context
+    manager and observe/inc return at once, so instrumented code pays only
+    the call.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> _Histogram
+        self._lock = threading.Lock()
+
+    def time(self, stage: str):
+        """Context manager recording the latency of a stage"""
+        if not self.enabled:
+            return _NO_TIMER
+        return _Timer(self, stage)
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value in a histogram from DEFINITIONS"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(DEFINITIONS[name][2])
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1.0, **labels):
+        """Add to a counter from DEFINITIONS"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def quantiles(self, name: str, **labels) -> Dict[float, float]:
+        """{quantile: value} over the recent observations of a histogram ({} if none)"""
+        with self._lock:
+            histogram = self._histograms.get((name, tuple(sorted(labels.items()))))
+            return dict(histogram.quantiles()) if histogram is not None else {}
+
+    def render(self) -> str:
+        """Every recorded metric in the Prometheus text exposition format
+
+        Each histogram also gets a `<name>_recent` summary with the
+        QUANTILES of its last QUANTILE_WINDOW observations.
+        """
+        lines = []
+        with self._lock:
+            for name, (metric_type, help_text, _) in DEFINITIONS.items():
+                if metric_type == "counter":
+                    samples = sorted((labels, value) for (key, labels), value in self._counters.items() if key == name)
+                    if samples:
+                        lines.append(f"# HELP {name} {help_text}")
+                        lines.append(f"# TYPE {name} counter")
+                        lines.extend(f"{name}{_labels_text(labels)} {_number(value)}" for labels, value in samples)
+                    continue
+
+                histograms = sorted((labels, h) for (key, labels), h in self._histograms.items() if key == name)
+                if not histograms:
+                    continue
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for labels, histogram in histograms:
+                    cumulative = 0
+                    for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.counts):
+                        cumulative += count
+                        le = bound if bound == "+Inf" else _number(bound)
+                        lines.append(f"{name}_bucket{_labels_text(labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{_labels_text(labels)} {_number(histogram.sum)}")
+                    lines.append(f"{name}_count{_labels_text(labels)} {histogram.count}")
+                lines.append(f"# HELP {name}_recent {help_text} (quantiles of the last {QUANTILE_WINDOW} observations)")
+                lines.append(f"# TYPE {name}_recent summary")
+                for labels, histogram in histograms:
+                    for q, value in histogram.quantiles():
+                        lines.append(f"{name}_recent{_labels_text(labels + (('quantile', _number(q)),))} {_number(value)}")
+                    lines.append(f"{name}_recent_sum{_labels_text(labels)} {_number(sum(histogram.recent))}")
+                    lines.append(f"{name}_recent_count{_labels_text(labels)} {len(histogram.recent)}")
+        return "\n".join(lines) + "\n" if lines else ""
+
+
+def render_samples(name: str, metric_type: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]) -> str:
+    """One metric family, in the Prometheus text format, from (labels, value) samples taken elsewhere"""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+    lines.extend(f"{name}{_labels_text(sorted(labels.items()))} {_number(value)}" for labels, value in samples)
+    return "\n".join(lines) + "\n"
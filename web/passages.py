@@ -0,0 +1,116 @@
+import re
+from typing import Dict, List
+
+# Passage sizing: small enough to keep prompts short, large enough to hold a full section
+MAX_PASSAGE_CHARS = 1200
+OVERLAP_CHARS = 200
+
+
+def split_page(page: Dict, page_id: int, max_chars: int = MAX_PASSAGE_CHARS, overlap_chars: int = OVERLAP_CHARS) -> List[Dict]:
+    """Split a scraped page into overlapping passages along heading, list and table boundaries
+
+    Sections start at lines matching the page's extracted headings. Within a
+    section, consecutive list items are kept together as one block and blocks
+    are packed into passages of at most max_chars, each repeating up to
+    overlap_chars from the end of the previous one. Tables become their own
+    passages, one row per line.
+    """
+    title = page.get("title", "")
+    url = page.get("url", "")
+    text = page.get("main_content", "") or page.get("markdown", "")
+    heading_texts = {h.get("text", "").strip() for h in page.get("headings", []) if h.get("text", "").strip()}
+    list_items = {item.strip() for lst in page.get("lists", []) for item in lst.get("items", []) if item.strip()}
+
+    passages = []
+
+    def add(section: str, kind: str, body: str):
+        body = body.strip()
+        if body:
+            passages.append({
+                "page_id": page_id,
+                "url": url,
+                "title": title,
+                "section": section,
+                "kind": kind,
+                "text": body,
+            })
+
+    # Group lines into (section, blocks) where a block is a paragraph line or a run of list items
+    sections = [(title, [])]
+    for line in (line.strip() for line in text.splitlines()):
+        if not line:
+            continue
+        blocks = sections[-1][1]
+        if line in heading_texts:
+            sections.append((line, []))
+        elif line in list_items and blocks and blocks[-1][0] == "list":
+            blocks[-1] = ("list", blocks[-1][1] + "\n" + line)
+        else:
+            blocks.append(("list" if line in list_items else "text", line))
+
+    for section, blocks in sections:
+        for body in _pack_blocks([block for _, block in blocks], max_chars, overlap_chars):
+            add(section, "text", body)
+
+    for table in page.get("tables", []):
+        rows = [" | ".join(table.get("headers", []))] if table.get("headers") else []
+        rows += [" | ".join(row) for row in table.get("rows", [])]
+        for body in _pack_blocks(rows, max_chars, 0):
+            add(f"{title} (table)", "table", body)
+
+    return passages
+
+
+def _pack_blocks(blocks: List[str], max_chars: int, overlap_chars: int) -> List[str]:
+    """Greedily pack text blocks into chunks of at most max_chars, splitting oversized blocks"""
+    pieces = []
+    for block in blocks:
+        if len(block) <= max_chars:
+            pieces.append(block)
+        else:
+            pieces.extend(_split_long_block(block, max_chars))
+
+    chunks, current = [], []
+    for piece in pieces:
+        if current and len("\n".join(current + [piece])) > max_chars:
+            chunks.append("\n".join(current))
+            # Carry the end of the previous chunk into the next one for context
+            tail = _tail_text(current[-1], overlap_chars)
+            current = [tail] if tail and len(tail) + len(piece) < max_chars else []
+        current.append(piece)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _tail_text(text: str, max_chars: int) -> str:
+    """Return at most max_chars from the end of text, starting on a word boundary"""
+    if max_chars <= 0:
+        return ""
+    if len(text) <= max_chars:
+        return text
+    tail = text[-max_chars:]
+    space = tail.find(" ")
+    return tail[space + 1:] if space >= 0 else tail
+
+
+def _split_long_block(block: str, max_chars: int) -> List[str]:
+    """Split a block that exceeds max_chars at sentence, then word, boundaries"""
+    parts, current = [], ""
+    for sentence in re.split(r'(?<=[.!?])\s+', block):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(sentence[:cut])
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            parts.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        parts.append(current)
+    return parts
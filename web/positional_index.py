@@ -0,0 +1,195 @@
+import bisect
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from bm25 import STOPWORDS
+from mapped_store import MappedStore, MappedVocabulary, vocabulary_arrays
+
+# Query words this many tokens apart (in query order) count as near each other
+PROXIMITY_WINDOW = 3
+
+# Words in more than this share of documents are too common to locate anything
+# (ignored for proximity and snippets)
+MAX_DOC_SHARE = 0.5
+
+
+class PositionalIndex:
+    """Term positions within each document, for exact phrases and term proximity
+
+    Postings are laid out term by term: the documents containing term t are
+    docs[doc_ptr[t]:doc_ptr[t + 1]] (sorted), and the positions of t in the
+    document at postings slot j are positions[pos_ptr[j]:pos_ptr[j + 1]]
+    (sorted). Phrases are found by intersecting the document lists and then
+    the shifted position lists, never by scanning text. The character span
+    of every token is kept too (spans[span_ptr[d] + i] for token i of
+    document d), so matches can be located in the text for snippets.
+    """
+
+    def __init__(self, term_ids, doc_ptr: np.ndarray, docs: np.ndarray, pos_ptr: np.ndarray,
+                 positions: np.ndarray, span_ptr: np.ndarray, spans: np.ndarray, num_docs: int):
+        self.term_ids = term_ids
+        self.doc_ptr = doc_ptr
+        self.docs = docs
+        self.pos_ptr = pos_ptr
+        self.positions = positions
+        self.span_ptr = span_ptr
+        self.spans = spans  # (tokens, 2) character start/end
+        self.num_docs = num_docs
+
+    @classmethod
+    def build(cls, texts: List[str]) -> "PositionalIndex":
+        """Index the token positions and character spans of each text (document ids are list positions)"""
+        postings = {}
+        spans = []
+        span_ptr = np.zeros(len(texts) + 1, dtype=np.int64)
+        for doc_id, text in enumerate(texts):
+            for position, match in enumerate(re.finditer(r'\w+', text)):
+                doc_positions = postings.setdefault(match.group().lower(), {})
+                doc_positions.setdefault(doc_id, []).append(position)
+                spans.append(match.span())
+            span_ptr[doc_id + 1] = len(spans)
+
+        terms = sorted(postings)
+        doc_ptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(postings[term]) for term in terms], out=doc_ptr[1:])
+        slots = [(doc_id, postings[term][doc_id]) for term in terms for doc_id in sorted(postings[term])]
+        pos_ptr = np.zeros(len(slots) + 1, dtype=np.int64)
+        np.cumsum([len(positions) for _, positions in slots], out=pos_ptr[1:])
+        return cls(
+            {term: i for i, term in enumerate(terms)},
+            doc_ptr,
+            np.array([doc_id for doc_id, _ in slots], dtype=np.int32),
+            pos_ptr,
+            np.array([position for _, positions in slots for position in positions], dtype=np.int32),
+            span_ptr,
+            np.array(spans, dtype=np.int32).reshape(-1, 2),
+            len(texts),
+        )
+
+    def _doc_range(self, term: str) -> Tuple[int, int]:
+        """Postings slots [start, end) of a term (empty if unknown)"""
+        term_id = self.term_ids.get(term)
+        if term_id is None:
+            return 0, 0
+        return int(self.doc_ptr[term_id]), int(self.doc_ptr[term_id + 1])
+
+    def _informative_ranges(self, words: List[str]) -> Dict[str, Tuple[int, int]]:
+        """Postings slots of the known words that are not too common to locate anything"""
+        max_docs = MAX_DOC_SHARE * self.num_docs
+        ranges = {}
+        for word in set(words) - STOPWORDS:
+            start, end = self._doc_range(word)
+            if 0 < end - start <= max_docs:
+                ranges[word] = (start, end)
+        return ranges
+
+    def _doc_positions(self, start: int, end: int, doc_ids: np.ndarray) -> List[List[int]]:
+        """Positions of the term whose postings slots are [start, end) in each of doc_ids ([] where absent)"""
+        docs = self.docs[start:end]
+        if not len(docs) or not len(doc_ids):
+            return [[] for _ in doc_ids]
+        # One vectorised lookup per term; the short per-document lists are cheaper as Python lists
+        slots = np.minimum(np.searchsorted(docs, doc_ids), len(docs) - 1)
+        present = docs[slots] == doc_ids
+        lows, highs = self.pos_ptr[start + slots].tolist(), self.pos_ptr[start + slots + 1].tolist()
+        return [
+            self.positions[low:high].tolist() if found else []
+            for low, high, found in zip(lows, highs, present.tolist())
+        ]
+
+    def phrase_docs(self, words: List[str], doc_ids: np.ndarray = None) -> np.ndarray:
+        """Sorted ids of the documents (optionally among doc_ids) containing the words as a phrase"""
+        ranges = [self._doc_range(word) for word in words]
+        if not words or any(start == end for start, end in ranges):
+            return np.zeros(0, dtype=np.int32)
+
+        # Intersect document lists, rarest term first
+        candidates = None
+        for start, end in sorted(ranges, key=lambda r: r[1] - r[0]):
+            docs = self.docs[start:end]
+            candidates = docs if candidates is None else np.intersect1d(candidates, docs, assume_unique=True)
+        if doc_ids is not None:
+            candidates = np.intersect1d(candidates, doc_ids)
+
+        # Keep start positions where word k sits k tokens after word 0
+        starts = [set(positions) for positions in self._doc_positions(*ranges[0], candidates)]
+        for offset, (start, end) in enumerate(ranges[1:], 1):
+            for doc_starts, positions in zip(starts, self._doc_positions(start, end, candidates)):
+                doc_starts.intersection_update(position - offset for position in positions)
+        return np.array([doc_id for doc_id, doc_starts in zip(candidates.tolist(), starts) if doc_starts], dtype=np.int32)
+
+    def proximity(self, words: List[str], doc_ids: List[int]) -> np.ndarray:
+        """Share of consecutive query word pairs found within PROXIMITY_WINDOW tokens (in order) in each document
+
+        Pairs involving unknown, very common or stop words are ignored; a query
+        without any remaining pair scores 0 everywhere.
+        """
+        scores = np.zeros(len(doc_ids), dtype=np.float32)
+        ranges = self._informative_ranges(words)
+        pairs = [(a, b) for a, b in zip(words, words[1:]) if a != b and a in ranges and b in ranges]
+        if not pairs:
+            return scores
+
+        doc_ids = np.asarray(doc_ids)
+        positions = {word: self._doc_positions(start, end, doc_ids) for word, (start, end) in ranges.items()}
+        for i in range(len(doc_ids)):
+            hits = 0
+            for a, b in pairs:
+                second = positions[b][i]
+                # Is the nearest b after some a within the window?
+                for position in positions[a][i]:
+                    after = bisect.bisect_right(second, position)
+                    if after < len(second) and second[after] - position <= PROXIMITY_WINDOW:
+                        hits += 1
+                        break
+            scores[i] = hits / len(pairs)
+        return scores
+
+    def match_counts(self, words: List[str], doc_ids: List[int]) -> np.ndarray:
+        """How many of the words (that are not stop words or too common) each document contains"""
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        counts = np.zeros(len(doc_ids), dtype=np.int32)
+        for start, end in self._informative_ranges(words).values():
+            counts += np.isin(doc_ids, self.docs[start:end], assume_unique=True)
+        return counts
+
+    def matches(self, words: List[str], doc_id: int) -> List[Tuple[int, str]]:
+        """Sorted (position, word) occurrences in a document of the words that are not stop words or too common"""
+        doc_ids = np.array([doc_id])
+        found = [
+            (position, word)
+            for word, (start, end) in self._informative_ranges(words).items()
+            for position in self._doc_positions(start, end, doc_ids)[0]
+        ]
+        return sorted(found)
+
+    def token_spans(self, doc_id: int) -> np.ndarray:
+        """(tokens, 2) character start/end of each token of a document"""
+        return self.spans[self.span_ptr[doc_id]:self.span_ptr[doc_id + 1]]
+
+    def to_arrays(self, name: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and metadata that from_store needs, for writing to a mapped store"""
+        arrays = vocabulary_arrays(f"{name}.vocabulary", self.term_ids)
+        arrays[f"{name}.doc_ptr"] = self.doc_ptr
+        arrays[f"{name}.docs"] = self.docs
+        arrays[f"{name}.pos_ptr"] = self.pos_ptr
+        arrays[f"{name}.positions"] = self.positions
+        arrays[f"{name}.span_ptr"] = self.span_ptr
+        arrays[f"{name}.spans"] = self.spans
+        return arrays, {"num_docs": self.num_docs}
+
+    @classmethod
+    def from_store(cls, store: MappedStore, name: str, meta: Dict[str, Any]) -> "PositionalIndex":
+        """Rebuild an index whose postings are views into a mapped store"""
+        return cls(
+            MappedVocabulary(store, f"{name}.vocabulary"),
+            store.array(f"{name}.doc_ptr"),
+            store.array(f"{name}.docs"),
+            store.array(f"{name}.pos_ptr"),
+            store.array(f"{name}.positions"),
+            store.array(f"{name}.span_ptr"),
+            store.array(f"{name}.spans"),
+            meta["num_docs"],
+        )
@@ -0,0 +1,160 @@
+import bisect
+import re
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from mapped_store import JSONRecords, MappedStore, StringTable, json_arrays, string_arrays
+
+# Weight of a query term found in each part of a product record
+FIELD_WEIGHTS = {"title": 3.0, "links": 2.0, "description": 1.0}
+
+# Characters of each (whitespace-collapsed) description that are indexed and returned;
+# the scraper's descriptions are whole page sections, mostly navigation past this
+DESCRIPTION_CHARS = 300
+
+# Upper bound on results per page
+MAX_LIMIT = 100
+
+
+def _words(text: str) -> List[str]:
+    return re.findall(r'\w+', text.lower())
+
+
+def collect_products(pages: List[Dict]) -> List[Dict]:
+    """Distinct data products of a snapshot, with the URL and title of the page listing them
+
+    The scraper records a product for every matching section, so nested
+    sections repeat the same title and text; those are kept once.
+    """
+    products = []
+    seen = set()
+    for page in pages:
+        for product in page.get("data_products", []):
+            title = " ".join(product.get("title", "").split())
+            description = " ".join(product.get("description", "").split())
+            key = (title.lower(), description.lower())
+            if not title or key in seen:
+                continue
+            seen.add(key)
+            links = []
+            for link in product.get("links", []):
+                if link.get("url") and link not in links:
+                    links.append({"url": link["url"], "text": " ".join(link.get("text", "").split())})
+            products.append({
+                "title": title,
+                "description": description[:DESCRIPTION_CHARS],
+                "links": links,
+                "page_url": page.get("url", ""),
+                "page_title": page.get("title", ""),
+            })
+    return products
+
+
+class ProductIndex:
+    """Prefix search over data product titles, link texts and descriptions
+
+    Terms are kept sorted with their postings laid out in the same order, so
+    every term starting with a prefix is one contiguous slice of the
+    postings and a typeahead query costs a binary search plus one
+    bincount per query word, whatever the number of matching terms.
+    """
+
+    def __init__(self, products: List[Dict], terms: List[str], indptr: np.ndarray, ids: np.ndarray,
+                 weights: np.ndarray, title_lengths: np.ndarray):
+        self.products = products
+        self.terms = terms  # sorted
+        self.indptr = indptr  # postings of terms[i] are ids/weights[indptr[i]:indptr[i + 1]]
+        self.ids = ids
+        self.weights = weights
+        # Title length breaks score ties, so "Rainfall" ranks above "Rainfall Validation Report"
+        self.title_lengths = title_lengths
+
+    @classmethod
+    def build(cls, products: List[Dict]) -> "ProductIndex":
+        """Index the given product records (as returned by collect_products)"""
+        postings = {}
+        for product_id, product in enumerate(products):
+            texts = {
+                "title": product["title"],
+                "links": " ".join(link["text"] for link in product["links"]),
+                "description": product["description"],
+            }
+            for field, text in texts.items():
+                for word in set(_words(text)):
+                    weights = postings.setdefault(word, {})
+                    weights[product_id] = max(weights.get(product_id, 0.0), FIELD_WEIGHTS[field])
+
+        terms = sorted(postings)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(postings[term]) for term in terms], out=indptr[1:])
+        ids = np.array([product_id for term in terms for product_id in sorted(postings[term])], dtype=np.int32)
+        weights = np.array([postings[term][product_id] for term in terms for product_id in sorted(postings[term])], dtype=np.float32)
+        title_lengths = np.array([len(product["title"]) for product in products], dtype=np.int32)
+        return cls(products, terms, indptr, ids, weights, title_lengths)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def _term_range(self, word: str, prefix: bool) -> Tuple[int, int]:
+        """Positions [lo, hi) of the terms equal to (or starting with) word"""
+        lo = bisect.bisect_left(self.terms, word)
+        if prefix:
+            return lo, bisect.bisect_left(self.terms, word + "\uffff", lo)
+        return lo, lo + 1 if lo < len(self.terms) and self.terms[lo] == word else lo
+
+    def search(self, query: str, offset: int = 0, limit: int = 10) -> Dict[str, Any]:
+        """Products matching every word of the query, best first, one page at a time
+
+        The last word also matches longer terms it is a prefix of (unless the
+        query ends in a space), so results update as the user types. An
+        empty query lists every product.
+        """
+        limit = max(1, min(limit, MAX_LIMIT))
+        offset = max(0, offset)
+        words = _words(query)
+
+        if words:
+            scores = np.zeros(len(self.products), dtype=np.float32)
+            matched = np.ones(len(self.products), dtype=bool)
+            for i, word in enumerate(words):
+                lo, hi = self._term_range(word, prefix=i == len(words) - 1 and not query[-1:].isspace())
+                start, end = self.indptr[lo], self.indptr[hi]
+                word_scores = np.bincount(self.ids[start:end], weights=self.weights[start:end], minlength=len(self.products))
+                matched &= word_scores > 0
+                scores += word_scores
+            candidates = np.flatnonzero(matched)
+            # Highest score first, then shorter titles, then snapshot order
+            ranked = candidates[np.lexsort((candidates, self.title_lengths[candidates], -scores[candidates]))]
+        else:
+            ranked = np.arange(len(self.products))
+
+        return {
+            "query": query,
+            "total": int(len(ranked)),
+            "offset": offset,
+            "limit": limit,
+            "results": [self.products[int(product_id)] for product_id in ranked[offset:offset + limit]],
+        }
+
+    def to_arrays(self, name: str) -> Tuple[Dict[str, np.ndarray], Dict[str, Any]]:
+        """Arrays and metadata that from_store needs, for writing to a mapped store"""
+        arrays = json_arrays(f"{name}.products", self.products)
+        arrays.update(string_arrays(f"{name}.terms", self.terms))
+        arrays[f"{name}.indptr"] = self.indptr
+        arrays[f"{name}.ids"] = self.ids
+        arrays[f"{name}.weights"] = self.weights
+        arrays[f"{name}.title_lengths"] = self.title_lengths
+        return arrays, {}
+
+    @classmethod
+    def from_store(cls, store: MappedStore, name: str, meta: Dict[str, Any]) -> "ProductIndex":
+        """Rebuild an index whose products and postings are views into a mapped store"""
+        return cls(
+            JSONRecords(store, f"{name}.products"),
+            StringTable(store, f"{name}.terms"),
+            store.array(f"{name}.indptr"),
+            store.array(f"{name}.ids"),
+            store.array(f"{name}.weights"),
+            store.array(f"{name}.title_lengths"),
+        )
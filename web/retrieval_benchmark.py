@@ -0,0 +1,373 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import random
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from memory_benchmark import memory_kb
+
+# Corpus sizes benchmarked by default, from the real snapshot's 52 pages up to 10k (the
+# sizes the stored baseline covers); 100k pages needs about 8 GB to build, so it is opt-in
+DEFAULT_SIZES = (52, 1000, 10000)
+
+# Stored results that runs are compared against (and that --save-baseline replaces)
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "retrieval_baseline.json")
+
+# A metric regresses when it is worse than the baseline by more than this fraction and
+# by more than the absolute floor for its unit, so sub-millisecond noise never trips it
+REGRESSION_TOLERANCE = 0.25
+REGRESSION_FLOORS = {"_ms": 5.0, "_mb": 8.0}
+
+# Tail latencies over a few dozen queries are reported but too noisy to gate on
+UNGATED_SUFFIXES = ("_p95_ms", "_p99_ms")
+
+# Bump when synthetic pages change, so results are only compared on the same corpus
+CORPUS_VERSION = 1
+
+# Timed passes over the query set per ranking (after one warm-up pass)
+QUERY_REPEATS = 3
+
+MISSIONS = ["INSAT-3D", "INSAT-3DR", "INSAT-3DS", "KALPANA-1", "OCEANSAT-2", "OCEANSAT-3", "SCATSAT-1",
+            "Megha-Tropiques", "SARAL-AltiKa"]
+PARAMETERS = ["rainfall", "sea surface temperature", "wind vectors", "cloud top pressure", "soil moisture",
+              "ocean colour", "chlorophyll concentration", "humidity profile", "outgoing longwave radiation",
+              "snow cover", "significant wave height", "aerosol optical depth", "sea surface salinity"]
+PRODUCT_TYPES = ["Level-1B imagery", "Level-2 product", "Level-3 composite", "daily gridded product",
+                 "validation report", "time series", "near real time product"]
+SECTIONS = ["Overview", "Data Products", "Data Access", "Specifications", "Applications", "Documentation",
+            "Validation", "Frequently Asked Questions"]
+CATEGORIES = ["missions", "catalogs", "galleries", "reports", "ocean", "atmosphere", "land", "general"]
+SENTENCES = [
+    "The {mission} {product_type} provides {parameter} at {number} km resolution.",
+    "{parameter} is retrieved from the {mission} sounder every {number} minutes.",
+    "Users can download {product_type} files for {parameter} after registering on MOSDAC.",
+    "The {filler} {filler} of {parameter} was validated against {filler} observations.",
+    "Data from {mission} are archived in HDF5 format with {filler} metadata.",
+    "{filler} {filler} {filler} {parameter} {filler}.",
+]
+QUERY_TEMPLATES = [
+    "{mission} {parameter} data",
+    "how to download {parameter} from {mission}",
+    "{product_type} of {parameter}",
+    "what is the resolution of the {mission} imager",
+    "\"{parameter}\" {product_type}",
+    "{mission} {filler}",
+]
+
+# Filler vocabulary: word i is drawn with Zipf weight 1/(i+1), so the vocabulary grows
+# with the corpus the way real text does
+FILLER_WORDS = 20000
+_SYLLABLES = ["ka", "lo", "mi", "sat", "ra", "ten", "vo", "pre", "dis", "qua", "ne", "tro", "gra", "phi", "sol", "mer"]
+
+
+def _filler_vocabulary(rng: random.Random) -> List[str]:
+    words = set()
+    while len(words) < FILLER_WORDS:
+        words.add("".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+class _Writer:
+    """Deterministic text generator over the domain and filler vocabularies"""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.filler = _filler_vocabulary(self.rng)
+        self.filler_weights = []
+        total = 0.0
+        for i in range(len(self.filler)):
+            total += 1.0 / (i + 1)
+            self.filler_weights.append(total)
+
+    def fill(self, template: str, **fixed) -> str:
+        values = {
+            "mission": self.rng.choice(MISSIONS),
+            "parameter": self.rng.choice(PARAMETERS),
+            "product_type": self.rng.choice(PRODUCT_TYPES),
+            "number": self.rng.choice([1, 4, 8, 15, 25, 30, 50]),
+            **fixed,
+        }
+        # Every {filler} placeholder gets its own word
+        parts = template.split("{filler}")
+        words = self.rng.choices(self.filler, cum_weights=self.filler_weights, k=len(parts) - 1)
+        return "".join(part + word for part, word in zip(parts, words + [""])).format(**values)
+
+
+def synthetic_pages(count: int, seed: int = 0) -> List[Dict]:
+    """Pages in the scraper's pages_*.json schema, with MOSDAC-like vocabulary and structure"""
+    writer = _Writer(seed)
+    rng = writer.rng
+    pages = []
+    for i in range(count):
+        mission, parameter = rng.choice(MISSIONS), rng.choice(PARAMETERS)
+        product_type, category = rng.choice(PRODUCT_TYPES), rng.choice(CATEGORIES)
+        title = f"{mission} {parameter} {product_type}"
+        slug = f"{mission}-{parameter}".lower().replace(" ", "-")
+        url = f"https://www.mosdac.gov.in/synthetic/{category}/{slug}-{i}"
+
+        headings, sections = [{"level": "h1", "text": title}], []
+        for heading in rng.sample(SECTIONS, rng.randint(2, 4)):
+            headings.append({"level": "h2", "text": heading})
+            sentences = [writer.fill(rng.choice(SENTENCES), mission=mission, parameter=parameter)
+                         for _ in range(rng.randint(3, 6))]
+            sections.append(f"{heading}\n\n" + " ".join(sentences))
+        main_content = f"{title}\n\n" + "\n\n".join(sections)
+
+        faqs = []
+        if i % 20 == 0:
+            faqs = [{"question": writer.fill("How do I get {parameter} data from {mission}?"),
+                     "answer": writer.fill("Register on MOSDAC and order the {product_type} from the catalog.")}
+                    for _ in range(2)]
+        tables = []
+        if i % 3 == 0:
+            tables = [{"headers": ["Parameter", "Resolution"],
+                       "rows": [[writer.fill("{parameter}"), writer.fill("{number} km")] for _ in range(4)]}]
+        products = [{"title": writer.fill("{mission} {product_type}", mission=mission),
+                     "description": writer.fill(rng.choice(SENTENCES), mission=mission),
+                     "links": [{"url": f"{url}/download", "text": f"Download {parameter}"}]}
+                    for _ in range(rng.randint(0, 2))]
+
+        pages.append({
+            "url": url,
+            "title": f"{title} | MOSDAC",
+            "description": writer.fill(SENTENCES[0], mission=mission, parameter=parameter),
+            "main_content": main_content,
+            "headings": headings,
+            "tables": tables,
+            "lists": [{"type": "ul", "items": [writer.fill("{product_type}") for _ in range(4)]}],
+            "faqs": faqs,
+            "links": [{"url": f"https://www.mosdac.gov.in/synthetic/{rng.randrange(count)}", "text": writer.fill("{filler} {filler}")}
+                      for _ in range(3)],
+            "metadata": {},
+            "data_products": products,
+            "services": [],
+            "facets": {"category": category, "missions": [mission.lower()] if category == "missions" else []},
+            "markdown": f"# {title}\n\n" + "\n\n## ".join(sections),
+            "scraped_at": "2025-01-01T00:00:00",
+        })
+    return pages
+
+
+def synthetic_queries(count: int = 30, seed: int = 1) -> List[str]:
+    """Questions over the synthetic vocabulary, mixing plain words, phrases and rare terms"""
+    writer = _Writer(seed)
+    return [writer.fill(QUERY_TEMPLATES[i % len(QUERY_TEMPLATES)]) for i in range(count)]
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {"p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "mean": sum(ordered) / len(ordered)}
+
+
+def _build(snapshot: str, results):
+    """Index the snapshot from JSON and compile its artifact, as the first startup on new data does"""
+    # Progress output goes to stderr; stdout carries --json results
+    sys.stdout = sys.stderr
+    from knowledge_base import KnowledgeBase, artifact_path, snapshot_version
+
+    before = memory_kb()
+    start = time.perf_counter()
+    with open(snapshot, "r", encoding="utf-8") as f:
+        kb = KnowledgeBase(json.load(f), source_path=snapshot, version=snapshot_version(snapshot))
+    build_ms = (time.perf_counter() - start) * 1000
+    build_rss_mb = (memory_kb()["rss"] - before["rss"]) / 1024
+
+    start = time.perf_counter()
+    kb.compile()
+    results.put({
+        "passages": len(kb.passages),
+        "terms": len(kb.inverted_index),
+        "build_ms": build_ms,
+        "build_rss_mb": build_rss_mb,
+        "compile_ms": (time.perf_counter() - start) * 1000,
+        "artifact_mb": os.path.getsize(artifact_path(snapshot)) / 1024 / 1024,
+    })
+
+
+def _serve(queries: List[str], repeats: int, results):
+    """Start MOSDACChatbot on the compiled snapshot and time retrieval like /chat does (search cache off)"""
+    # Progress output goes to stderr; stdout carries --json results
+    sys.stdout = sys.stderr
+    from chatbot import MOSDACChatbot
+
+    before = memory_kb()
+    start = time.perf_counter()
+    chatbot = MOSDACChatbot()
+    row = {
+        "startup_ms": (time.perf_counter() - start) * 1000,
+        "startup_rss_mb": (memory_kb()["rss"] - before["rss"]) / 1024,
+        "loaded_from": chatbot.kb.loaded_from,
+    }
+
+    for ranking in ("hybrid", "bm25f"):
+        for query in queries:
+            chatbot.search_relevant_content(query, ranking=ranking)
+        latencies = []
+        for _ in range(repeats):
+            for query in queries:
+                start = time.perf_counter()
+                chatbot.search_relevant_content(query, ranking=ranking)
+                latencies.append((time.perf_counter() - start) * 1000)
+        row.update({f"query_{ranking}_{key}_ms": value for key, value in _percentiles(latencies).items()})
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        chatbot.search_relevant_content_batch(queries)
+    row["batch_per_query_ms"] = (time.perf_counter() - start) * 1000 / (repeats * len(queries))
+    row["serve_rss_mb"] = (memory_kb()["rss"] - before["rss"]) / 1024
+    results.put(row)
+
+
+def _in_subprocess(target, *args) -> Dict:
+    """Run target(*args, queue) in a fresh interpreter, so each measurement starts from a clean heap
+
+    Raises RuntimeError if the process dies without reporting (e.g. killed
+    for running out of memory).
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    process = context.Process(target=target, args=(*args, results))
+    process.start()
+    while True:
+        try:
+            row = results.get(timeout=1)
+            break
+        except queue.Empty:
+            if not process.is_alive():
+                raise RuntimeError(f"{target.__name__.strip('_')} process exited with code {process.exitcode}")
+    process.join()
+    return row
+
+
+def run_size(pages: int, queries: List[str], repeats: int = QUERY_REPEATS, seed: int = 0) -> Dict:
+    """Benchmark one corpus size: build, compile, startup, query latency and memory"""
+    directory = tempfile.mkdtemp(prefix="mosdac-bench-")
+    overrides = {
+        "MOSDAC_DATA_DIR": directory,
+        "MOSDAC_SEARCH_CACHE_SIZE": "0",
+        "MOSDAC_ANSWER_CACHE_PATH": "",
+        "MOSDAC_RELOAD_INTERVAL": "0",
+        "MOSDAC_METRICS": "0",
+        # Retrieval never calls the model; the stub backend starts without a key or network
+        "MOSDAC_LLM_BACKEND": "stub",
+    }
+    saved = {key: os.environ.get(key) for key in overrides}
+    os.environ.update(overrides)
+    try:
+        snapshot = os.path.join(directory, "pages_20250101_000000.json")
+        with open(snapshot, "w", encoding="utf-8") as f:
+            json.dump(synthetic_pages(pages, seed), f, ensure_ascii=False)
+        row = {"pages": pages, "corpus_mb": os.path.getsize(snapshot) / 1024 / 1024}
+        row.update(_in_subprocess(_build, snapshot))
+        row.update(_in_subprocess(_serve, queries, repeats))
+        return row
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run(sizes: List[int], repeats: int = QUERY_REPEATS) -> Dict:
+    """Results for every size, with the environment they were measured in"""
+    queries = synthetic_queries()
+    rows = []
+    for pages in sizes:
+        print(f"⏱️ Benchmarking {pages} pages...", file=sys.stderr)
+        try:
+            rows.append(run_size(pages, queries, repeats))
+        except RuntimeError as e:
+            print(f"❌ {pages} pages failed: {e}", file=sys.stderr)
+            rows.append({"pages": pages, "error": str(e)})
+    return {
+        "corpus_version": CORPUS_VERSION,
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()},
+        "queries": len(queries),
+        "repeats": repeats,
+        "results": rows,
+    }
+
+
+def find_regressions(current: Dict, baseline: Dict, tolerance: float = REGRESSION_TOLERANCE) -> List[Dict]:
+    """Time and memory metrics worse than the baseline run at the same corpus size
+
+    A size that failed but completed in the baseline is a regression too.
+    Results from a different CORPUS_VERSION are not comparable and yield no
+    regressions.
+    """
+    if baseline.get("corpus_version") != current.get("corpus_version"):
+        return []
+    baseline_rows = {row["pages"]: row for row in baseline.get("results", [])}
+    regressions = []
+    for row in current["results"]:
+        base = baseline_rows.get(row["pages"])
+        if base is None or "error" in base:
+            continue
+        if "error" in row:
+            regressions.append({"pages": row["pages"], "metric": "error", "error": row["error"]})
+            continue
+        for metric, value in row.items():
+            floor = next((floor for suffix, floor in REGRESSION_FLOORS.items() if metric.endswith(suffix)), None)
+            if floor is None or metric.endswith(UNGATED_SUFFIXES) or not isinstance(base.get(metric), (int, float)):
+                continue
+            if value > base[metric] * (1 + tolerance) and value - base[metric] > floor:
+                regressions.append({"pages": row["pages"], "metric": metric, "baseline": base[metric], "current": value,
+                                    "ratio": value / base[metric] if base[metric] else float("inf")})
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark retrieval build time, startup, query latency and memory on synthetic corpora")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help=f"corpus sizes in pages (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument("--repeats", type=int, default=QUERY_REPEATS, help=f"timed passes over the queries (default: {QUERY_REPEATS})")
+    parser.add_argument("--output", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--baseline", metavar="FILE", default=BASELINE_PATH, help="results to compare against (default: benchmarks/retrieval_baseline.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE, help=f"allowed slowdown/growth as a fraction (default: {REGRESSION_TOLERANCE})")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.repeats)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}", file=sys.stderr)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["regressions"] = find_regressions(report, json.load(f), args.tolerance)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'pages':>8}{'build ms':>11}{'compile ms':>12}{'startup ms':>12}{'hybrid p50':>12}{'hybrid p99':>12}"
+              f"{'bm25f p50':>11}{'serve MB':>10}{'artifact MB':>13}")
+        for row in report["results"]:
+            if "error" in row:
+                print(f"{row['pages']:>8}  failed: {row['error']}")
+                continue
+            print(f"{row['pages']:>8}{row['build_ms']:>11.0f}{row['compile_ms']:>12.0f}{row['startup_ms']:>12.1f}"
+                  f"{row['query_hybrid_p50_ms']:>12.2f}{row['query_hybrid_p99_ms']:>12.2f}{row['query_bm25f_p50_ms']:>11.2f}"
+                  f"{row['serve_rss_mb']:>10.1f}{row['artifact_mb']:>13.1f}")
+
+    for regression in report.get("regressions", []):
+        if regression["metric"] == "error":
+            print(f"⚠️ Regression at {regression['pages']} pages: {regression['error']}", file=sys.stderr)
+            continue
+        print(f"⚠️ Regression at {regression['pages']} pages: {regression['metric']} {regression['baseline']:.2f} -> "
+              f"{regression['current']:.2f} ({regression['ratio']:.2f}x)", file=sys.stderr)
+    if report.get("regressions"):
+        sys.exit(1)
@@ -0,0 +1,208 @@
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Tuple
+
+try:
+    from bm25 import STOPWORDS
+except ImportError:  # NumPy/SciPy not installed: every word counts as topical
+    STOPWORDS = set()
+
+# Words that point back at something said earlier ("what about its resolution?")
+REFERRING_WORDS = {"it", "its", "this", "that", "these", "those", "they", "them", "their", "same", "above"}
+
+# Topic words carried from one turn to the follow-ups after it
+MAX_TOPIC_WORDS = 8
+
+# Characters kept of each question and answer in the verbatim recent turns, of each compacted
+# turn, and of the whole running summary
+ANSWER_CHARS = 800
+SUMMARY_LINE_CHARS = 200
+SUMMARY_CHARS = 600
+
+# Rough fixed cost of a session (object, dict slot, id) counted against the memory cap
+SESSION_OVERHEAD_BYTES = 256
+
+
+def _topic_words(text: str) -> List[str]:
+    """Distinct words of text that say what it is about, in order"""
+    words = []
+    for word in re.findall(r'\w+', text.lower()):
+        if word not in STOPWORDS and word not in REFERRING_WORDS and word not in words:
+            words.append(word)
+    return words
+
+
+def follow_up_query(question: str, topic: List[str]) -> Tuple[str, List[str]]:
+    """Retrieval query for a question asked after turns about topic, and the topic it leaves
+
+    A question that refers back ("its", "that") or names at most one topic
+    word of its own is searched together with the earlier topic; any other
+    question starts a new topic.
+    """
+    own = _topic_words(question)
+    words = set(re.findall(r'\w+', question.lower()))
+    if not topic or (len(own) > 1 and not words & REFERRING_WORDS):
+        return question, own[:MAX_TOPIC_WORDS]
+    carried = [word for word in topic if word not in own]
+    return f"{question} {' '.join(carried)}".strip(), (own + carried)[:MAX_TOPIC_WORDS]
+
+
+def _clip(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def _gist(question: str, answer: str) -> str:
+    """One-line summary of a turn: the question and the first sentence of its answer"""
+    first_sentence = re.split(r'(?<=[.!?])\s', re.sub(r'[*#`]+', '', answer).strip(), maxsplit=1)[0]
+    line = f"{' '.join(question.split())} -> {' '.join(first_sentence.split())}"
+    return _clip(line, SUMMARY_LINE_CHARS)
+
+
+class Session:
+    """Recent turns of one conversation verbatim, older ones compacted into a bounded summary"""
+
+    def __init__(self):
+        self.turns = []  # (question, answer) pairs, oldest first
+        self.summary = []  # gist lines of compacted turns, oldest first
+        self.topic = []
+        self.size = SESSION_OVERHEAD_BYTES
+
+    def history(self) -> str:
+        """The conversation so far as prompt text ("" before the first turn)"""
+        lines = []
+        if self.summary:
+            lines.append("Earlier (summary):")
+            lines.extend(f"- {line}" for line in self.summary)
+        for question, answer in self.turns:
+            lines.append(f"User: {question}")
+            lines.append(f"Assistant: {answer}")
+        return "\n".join(lines)
+
+    def add_turn(self, question: str, answer: str, topic: List[str], recent_turns: int) -> int:
+        """Record a turn, compacting the oldest beyond recent_turns; returns how many turns were compacted"""
+        self.turns.append((_clip(question, ANSWER_CHARS), _clip(answer, ANSWER_CHARS)))
+        self.topic = topic
+        compacted = 0
+        while len(self.turns) > recent_turns:
+            self.summary.append(_gist(*self.turns.pop(0)))
+            compacted += 1
+        while self.summary and sum(len(line) for line in self.summary) > SUMMARY_CHARS:
+            self.summary.pop(0)
+        self.size = SESSION_OVERHEAD_BYTES + sum(
+            len(text.encode("utf-8")) for text in [*self.summary, *self.topic, *(t for turn in self.turns for t in turn)]
+        )
+        return compacted
+
+
+class SessionStore:
+    """Thread-safe conversation sessions, capped in total bytes and dropped after idle_seconds
+
+    Sessions are kept in least-recently-used order, so the idle ones are
+    always at the front: expiry pops from the front until it reaches a live
+    session, and the memory cap evicts from the front too.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, idle_seconds: float = 1800.0, recent_turns: int = 3):
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.recent_turns = max(0, recent_turns)
+        self._sessions = OrderedDict()  # session id -> (Session, last used)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.created = 0
+        self.turns = 0
+        self.compactions = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expire(self, now: float):
+        while self._sessions:
+            session_id, (session, last_used) = next(iter(self._sessions.items()))
+            if last_used + self.idle_seconds > now:
+                break
+            self._drop(session_id)
+            self.expirations += 1
+
+    def _drop(self, session_id: str):
+        session, _ = self._sessions.pop(session_id)
+        self.bytes -= session.size
+
+    def _evict_to_fit(self):
+        while self.bytes > self.max_bytes and self._sessions:
+            self._drop(next(iter(self._sessions)))
+            self.evictions += 1
+
+    def create(self) -> str:
+        """Start an empty session and return its id"""
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire(time.monotonic())
+            session = Session()
+            self._sessions[session_id] = (session, time.monotonic())
+            self.bytes += session.size
+            self.created += 1
+            self._evict_to_fit()
+        return session_id
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            self._expire(time.monotonic())
+            return session_id in self._sessions
+
+    def context(self, session_id: str) -> Dict[str, Any]:
+        """{"history", "topic"} of a session (marking it used), or None if unknown or expired"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            session = entry[0]
+            self._sessions[session_id] = (session, now)
+            self._sessions.move_to_end(session_id)
+            return {"history": session.history(), "topic": list(session.topic)}
+
+    def record(self, session_id: str, question: str, answer: str, topic: List[str]) -> bool:
+        """Append a turn to a session; False if it has gone in the meantime"""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return False
+            session = entry[0]
+            old_size = session.size
+            self.compactions += session.add_turn(question, answer, topic, self.recent_turns)
+            self.bytes += session.size - old_size
+            self.turns += 1
+            self._sessions[session_id] = (session, now)
+            self._sessions.move_to_end(session_id)
+            self._evict_to_fit()
+            return True
+
+    def delete(self, session_id: str) -> bool:
+        """End a session; False if it did not exist"""
+        with self._lock:
+            if session_id not in self._sessions:
+                return False
+            self._drop(session_id)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Live session count, bytes held and lifetime counters"""
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "idle_seconds": self.idle_seconds,
+                "created": self.created,
+                "turns": self.turns,
+                "compactions": self.compactions,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,105 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class _Call:
+    """An in-flight computation that concurrent callers wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution (thread-based)
+
+    The first caller for a key runs the function; callers arriving while it
+    is running block until it finishes and receive the same result (or
+    exception). Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, func: Callable, *args) -> Any:
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls seen, calls that joined an in-flight execution, and the coalescing rate"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls),
+                "coalescing_rate": self.coalesced / self.calls if self.calls else 0.0,
+            }
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for coroutines running on one event loop
+
+    Cancelling a caller (e.g. its client disconnected) only stops it
+    waiting; the shared call still completes for everyone else.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        self.calls += 1
+        task = self._calls.get(key)
+        if task is None:
+            # The shared call runs in its own task, so it carries on for the others if the caller that started it goes away
+            task = self._calls[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.coalesced += 1
+        # Shield so one caller being cancelled doesn't cancel the shared call
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Future):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception retrieved when every caller was cancelled
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Calls seen, calls that joined an in-flight execution, and the coalescing rate"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+            "coalescing_rate": self.coalesced / self.calls if self.calls else 0.0,
+        }
@@ -0,0 +1,72 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Snippet length in tokens and how many snippets to take per passage
+SNIPPET_TOKENS = 40
+MAX_SNIPPETS = 2
+
+ELLIPSIS = "…"
+
+
+def densest_windows(matches: List[Tuple[int, str]], window: int, max_windows: int) -> List[List[Tuple[int, str]]]:
+    """Groups of matches (sorted (position, word) pairs) that each fit in `window` tokens, best first
+
+    A window is better when it holds more distinct words, then more
+    matches. Later windows never overlap earlier ones.
+    """
+    windows = []
+    remaining = list(matches)
+    while remaining and len(windows) < max_windows:
+        best, best_score = None, None
+        counts = {}
+        right = 0
+        for left, (position, _) in enumerate(remaining):
+            while right < len(remaining) and remaining[right][0] < position + window:
+                counts[remaining[right][1]] = counts.get(remaining[right][1], 0) + 1
+                right += 1
+            score = (len(counts), right - left)
+            if best_score is None or score > best_score:
+                best, best_score = (left, right), score
+            word = remaining[left][1]
+            counts[word] -= 1
+            if not counts[word]:
+                del counts[word]
+        left, right = best
+        windows.append(remaining[left:right])
+        # Leave a window's length either side, so the next snippet cannot overlap this one
+        first, last = remaining[left][0], remaining[right - 1][0]
+        remaining = [match for match in remaining if match[0] < first - window or match[0] > last + window]
+    return windows
+
+
+def extract_snippets(positional_index, doc_id: int, text: str, text_start: int, words: List[str],
+                     window: int = SNIPPET_TOKENS, max_snippets: int = MAX_SNIPPETS) -> List[Dict]:
+    """Windows of text with the densest query word matches, with highlight spans
+
+    doc_id is the document of positional_index whose indexed text contains
+    text starting at character text_start (matches before it are ignored).
+    Each snippet is {"text", "highlights"}, highlights being [start, end]
+    character offsets into the snippet text.
+    """
+    spans = positional_index.token_spans(doc_id)
+    first_token = int(np.searchsorted(spans[:, 0], text_start))
+    matches = [match for match in positional_index.matches(words, doc_id) if match[0] >= first_token]
+
+    snippets = []
+    for group in densest_windows(matches, window, max_snippets):
+        # Centre the matches in the window, within the passage text
+        first, last = group[0][0], group[-1][0]
+        start = max(first_token, first - (window - (last - first + 1)) // 2)
+        end = min(len(spans), start + window)
+        start = max(first_token, end - window)
+
+        char_start, char_end = int(spans[start, 0]) - text_start, int(spans[end - 1, 1]) - text_start
+        prefix = ELLIPSIS + " " if start > first_token else ""
+        suffix = " " + ELLIPSIS if end < len(spans) else ""
+        shift = len(prefix) - char_start
+        snippets.append({
+            "text": prefix + text[char_start:char_end] + suffix,
+            "highlights": [[int(spans[position, 0]) - text_start + shift, int(spans[position, 1]) - text_start + shift] for position, _ in group],
+        })
+    return snippets
@@ -0,0 +1,58 @@
+"""
+Answer cache keying and storage
+
+Run from the web directory: python -m pytest test_answer_cache.py
+"""
+
+from answer_cache import AnswerCache, answer_cache_key
+
+QUERY = ["what", "is", "insat", "3dr"]
+DOCS = ["https://www.mosdac.gov.in/insat-3dr|2025-07-25|0,3"]
+
+
+def test_key_depends_on_query_documents_and_generator():
+    key = answer_cache_key(QUERY, DOCS, "gemini:gemini-1.5-flash")
+    assert key == answer_cache_key(list(QUERY), list(DOCS), "gemini:gemini-1.5-flash")
+    assert key != answer_cache_key(QUERY + ["imager"], DOCS, "gemini:gemini-1.5-flash")
+    assert key != answer_cache_key(QUERY, ["https://www.mosdac.gov.in/insat-3dr|2025-08-01|0,3"], "gemini:gemini-1.5-flash")
+    assert key != answer_cache_key(QUERY, DOCS + ["https://www.mosdac.gov.in/insat-3d|2025-07-25|1"], "gemini:gemini-1.5-flash")
+    assert key != answer_cache_key(QUERY, DOCS, "gemini:gemini-1.5-pro")
+    assert key != answer_cache_key(QUERY, DOCS, "stub")
+
+
+def test_stub_answers_are_not_served_to_gemini(tmp_path, monkeypatch):
+    import chatbot
+    from generation import StubBackend
+    monkeypatch.setattr(chatbot, "ANSWER_CACHE_PATH", "")
+
+    class FakeGemini(StubBackend):
+        name = "gemini"
+
+        @property
+        def identity(self) -> str:
+            return "gemini:gemini-1.5-flash"
+
+        def generate(self, prompt: str) -> str:
+            return "A real answer"
+
+    bot = chatbot.MOSDACChatbot(StubBackend())
+    bot.answer_cache = AnswerCache(str(tmp_path / "answers.sqlite3"))
+    question = "What is the spatial resolution of the INSAT-3DR imager?"
+    assert bot.answer(question)["answer"].startswith("This is a stub answer")
+    assert bot.answer(question)["answered_by"] == "cache"
+
+    bot.backend = FakeGemini()
+    reply = bot.answer(question)
+    assert reply["answered_by"] == "llm"
+    assert reply["answer"] == "A real answer"
+
+
+def test_cache_round_trip_and_expiry(tmp_path):
+    cache = AnswerCache(str(tmp_path / "answers.sqlite3"), ttl_seconds=3600)
+    assert cache.get("key") is None
+    cache.put("key", "answer")
+    assert cache.get("key") == "answer"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    expired = AnswerCache(str(tmp_path / "answers.sqlite3"), ttl_seconds=0)
+    assert expired.get("key") is None
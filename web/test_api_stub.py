@@ -0,0 +1,144 @@
+"""
+Offline tests of the /chat stack on the stub generation backend (no Gemini key or network)
+
+Run from the web directory: python -m pytest test_api_stub.py
+"""
+
+import json
+import os
+import threading
+import time
+
+import pytest
+
+# Configure before api/chatbot are imported: they read the environment at import time
+os.environ.update({
+    "MOSDAC_LLM_BACKEND": "stub",
+    "MOSDAC_STUB_SEED": "0",
+    "MOSDAC_STUB_FAILURE_RATE": "0",
+    "MOSDAC_ANSWER_CACHE_PATH": "",
+    "MOSDAC_RELOAD_INTERVAL": "0",
+})
+
+from fastapi.testclient import TestClient
+
+import api
+from generation import GenerationError, HTTPBackend, StubBackend
+from llm_stub_server import make_server
+
+QUESTION = "What is the spatial resolution of the INSAT-3DR imager?"
+
+client = TestClient(api.app)
+
+
+@pytest.fixture
+def stub_server():
+    """Start a stub LLM server whose every call fails; yields its base URL"""
+    server = make_server("127.0.0.1", 0, StubBackend(failure_rate=1.0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def sse_events(body: str):
+    """(event, data) pairs of a Server-Sent Events body"""
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((fields.get("event", "message"), json.loads(fields["data"])))
+    return events
+
+
+def test_chat_answers_with_stub():
+    response = client.post("/chat", json={"message": QUESTION})
+    assert response.status_code == 200
+    reply = response.json()
+    assert reply["answered_by"] == "llm"
+    assert reply["answer"].startswith(f"This is a stub answer to: {QUESTION}")
+    assert reply["sources"] and all(source["url"] for source in reply["sources"])
+
+
+def test_chat_stream_sends_chunks_then_done():
+    response = client.post("/chat/stream", json={"message": QUESTION})
+    assert response.status_code == 200
+    events = sse_events(response.text)
+    chunks = [data["text"] for event, data in events if event == "message"]
+    event, done = events[-1]
+    assert event == "done"
+    assert done["answered_by"] == "llm"
+    assert len(chunks) > 1
+    assert "".join(chunks).startswith(f"This is a stub answer to: {QUESTION}")
+
+
+def test_chat_batch_answers_every_question():
+    questions = [QUESTION, "Where can I find ocean salinity products?", QUESTION]
+    response = client.post("/chat/batch", json={"questions": questions, "concurrency": 2})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["index"] for row in rows) == [0, 1, 2]
+    for row in rows:
+        assert row["question"] == questions[row["index"]]
+        assert row["answered_by"] == "llm"
+        assert row["answer"].startswith(f"This is a stub answer to: {row['question']}")
+
+
+def test_http_backend_reports_injected_failures(stub_server):
+    backend = HTTPBackend(stub_server)
+    with pytest.raises(GenerationError):
+        backend.generate("User Question: anything")
+
+    # Streams fail after their first chunk
+    chunks = []
+    with pytest.raises(GenerationError):
+        for text in backend.stream("User Question: anything"):
+            chunks.append(text)
+    assert len(chunks) == 1
+
+    previous = api.chatbot.backend
+    api.chatbot.backend = backend
+    try:
+        reply = client.post("/chat", json={"message": "Which INSAT-3D sounder products are archived?"}).json()
+    finally:
+        api.chatbot.backend = previous
+    assert reply["answered_by"] == "error"
+
+
+def test_chat_batch_rejects_oversized_batches():
+    response = client.post("/chat/batch", json={"questions": [QUESTION] * (api.BATCH_MAX_QUESTIONS + 1)})
+    assert response.status_code == 422
+
+
+def test_closing_a_batch_stops_generation():
+    class CountingBackend(StubBackend):
+        started = 0
+
+        def generate(self, prompt: str) -> str:
+            CountingBackend.started += 1
+            return super().generate(prompt)
+
+    previous = api.chatbot.backend
+    api.chatbot.backend = CountingBackend(latency_ms=200)
+    try:
+        questions = [f"What does INSAT-3DR imager channel {n} measure?" for n in range(12)]
+        results = api.chatbot.generate_responses(questions, concurrency=2)
+        index, reply = next(results)
+        assert reply["answered_by"] == "llm"
+        results.close()
+        started = CountingBackend.started
+        time.sleep(0.5)
+    finally:
+        api.chatbot.backend = previous
+    # Only the calls already running when the batch was closed were made
+    assert started <= 3
+    assert CountingBackend.started == started
+
+
+def test_chat_stream_reports_a_session_lost_mid_request(monkeypatch):
+    session_id = client.post("/sessions").json()["session_id"]
+    # The session passes validation, then expires before the answer is generated
+    monkeypatch.setattr(api.chatbot.sessions, "context", lambda session_id: None)
+    response = client.post("/chat/stream", json={"message": QUESTION, "session_id": session_id})
+    assert response.status_code == 200
+    assert sse_events(response.text) == [("error", {"status": 404, "detail": "Unknown or expired session"})]
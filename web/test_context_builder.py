@@ -0,0 +1,83 @@
+"""
+Packing retrieved passages into the prompt's token budget
+
+Run from the web directory: python -m pytest test_context_builder.py
+"""
+
+from context_builder import CHARS_PER_TOKEN, assemble_context, estimate_tokens
+
+
+def doc(title, passages, description="A MOSDAC page", **fields):
+    return {
+        "title": title,
+        "url": f"https://www.mosdac.gov.in/{title.lower().replace(' ', '-')}",
+        "description": description,
+        "passages": [{"id": i, "text": text, "score": score} for i, (text, score) in enumerate(passages)],
+        **fields,
+    }
+
+
+def words(prefix, count):
+    return " ".join(f"{prefix}{n}" for n in range(count))
+
+
+def test_everything_fits_a_large_budget():
+    docs = [doc("INSAT-3DR", [(words("imager", 40), 2.0)]), doc("Oceansat-3", [(words("ocm", 40), 1.0)])]
+    context, stats = assemble_context(docs, 10000)
+    assert stats["documents"] == 2
+    assert stats["passages"] == 2
+    assert stats["dropped_budget"] == stats["dropped_duplicates"] == 0
+    assert context.index("Title: INSAT-3DR") < context.index("Title: Oceansat-3")
+
+
+def test_budget_keeps_the_best_passages():
+    docs = [
+        doc("Low", [(words("low", 300), 0.5)]),
+        doc("High", [(words("high", 300), 3.0)]),
+        doc("Middle", [(words("mid", 300), 1.0)]),
+    ]
+    for budget in (150, 400, 900, 1500):
+        context, stats = assemble_context(docs, budget)
+        assert stats["context_tokens"] <= budget
+        assert "Title: High" in context
+    context, stats = assemble_context(docs, 900)
+    assert "Title: Middle" in context
+    assert "Title: Low" not in context
+    assert stats["dropped_budget"] == 1
+
+
+def test_near_duplicate_passages_are_dropped():
+    text = words("sst", 60)
+    docs = [doc("Primary", [(text, 2.0)]), doc("Mirror", [(text + " extra", 1.5)])]
+    context, stats = assemble_context(docs, 10000)
+    assert stats["dropped_duplicates"] == 1
+    assert "Title: Mirror" not in context
+
+
+def test_last_passage_is_truncated_to_the_room_left():
+    docs = [doc("Only", [(words("rainfall", 2000), 1.0)])]
+    context, stats = assemble_context(docs, 500)
+    assert 400 < stats["context_tokens"] <= 500
+    assert stats["passages"] == 1
+    assert len(context) <= 500 * CHARS_PER_TOKEN
+
+
+def test_oversized_header_is_skipped():
+    huge = doc("Huge", [(words("alpha", 50), 3.0)], description="x " * 2000)
+    small = doc("Small", [(words("beta", 400), 1.0)])
+    for budget in (50, 300, 800):
+        context, stats = assemble_context([huge], budget)
+        assert context == ""
+        assert stats["dropped_budget"] == 1
+
+        context, stats = assemble_context([huge, small], budget)
+        assert estimate_tokens(context) <= budget
+        assert "Title: Huge" not in context
+        assert "Title: Small" in context
+
+
+def test_repeated_faqs_are_shown_once():
+    faq = {"question": "What is MOSDAC?", "answer": "A satellite data centre."}
+    docs = [doc("First", [(words("one", 30), 2.0)], faqs=[faq]), doc("Second", [(words("two", 30), 1.0)], faqs=[faq])]
+    context, _ = assemble_context(docs, 10000)
+    assert context.count("Q: What is MOSDAC?") == 1
@@ -0,0 +1,55 @@
+"""
+Expanding unknown query words into close vocabulary terms
+
+Run from the web directory: python -m pytest test_fuzzy.py
+"""
+
+from fuzzy import TermExpander
+from mapped_store import MappedStore, write_store
+
+# {term: document frequency}
+VOCABULARY = {
+    "insat": 10, "3dr": 6, "insat3dr": 1, "satellite": 20, "scatsat": 4, "scat": 1, "sat": 2,
+    "salinity": 5, "ocean": 30, "data": 40,
+}
+
+
+def test_typos_are_corrected_one_edit_away():
+    expander = TermExpander.build(VOCABULARY)
+    assert expander.corrections("satelite") == ["satellite"]  # deletion
+    assert expander.corrections("satellitte") == ["satellite"]  # insertion
+    assert expander.corrections("satlelite") == ["satellite"]  # transposition
+    assert expander.corrections("salinitx") == ["salinity"]  # substitution
+    assert expander.corrections("saltiness") == []
+
+
+def test_short_and_non_alphabetic_words_are_not_corrected():
+    expander = TermExpander.build(VOCABULARY)
+    assert expander.corrections("dta") == []
+    assert expander.corrections("3dx") == []
+
+
+def test_words_are_split_into_known_terms():
+    expander = TermExpander.build(VOCABULARY)
+    assert expander.split("oceansalinity") == ["ocean", "salinity"]
+    # Known, but rarer than its letter/digit parts
+    assert expander.split("insat3dr") == ["insat", "3dr"]
+    assert expander.split("insat") == []
+
+
+def test_expand_adds_variants_and_joined_pairs():
+    expander = TermExpander.build(VOCABULARY)
+    assert expander.expand(["satelite", "insat3dr"]) == ["satellite", "insat", "3dr"]
+    assert expander.expand(["scat", "sat", "data"]) == ["scatsat"]
+    assert expander.expand(["ocean", "data"]) == []
+    assert expander.expand(["oceansalinity"], max_variants=1) == ["ocean"]
+
+
+def test_mapped_expander_matches_the_built_one(tmp_path):
+    expander = TermExpander.build(VOCABULARY)
+    arrays, meta = expander.to_arrays("fuzzy")
+    path = str(tmp_path / "fuzzy.kb")
+    write_store(path, arrays, {"fuzzy": meta})
+    mapped = TermExpander.from_store(MappedStore(path), "fuzzy", meta)
+    for words in (["satelite", "insat3dr"], ["scat", "sat"], ["oceansalinity", "salinitx"], ["ocean"]):
+        assert mapped.expand(words) == expander.expand(words)
@@ -0,0 +1,85 @@
+"""
+Swapping in new scraped snapshots without a restart
+
+Run from the web directory: python -m pytest test_hot_reload.py
+"""
+
+import json
+import time
+
+import pytest
+
+import chatbot
+from generation import StubBackend
+from knowledge_base import find_latest_snapshot
+
+
+def write_snapshot(directory, name, topic):
+    pages = [
+        {"url": f"https://www.mosdac.gov.in/{topic}-{n}", "title": f"{topic.title()} page {n}",
+         "main_content": f"The {topic} mission archives {topic} observations, product {n}. " * 5}
+        for n in range(3)
+    ]
+    path = directory / f"pages_{name}.json"
+    path.write_text(json.dumps(pages), encoding="utf-8")
+    # Snapshots are ordered by creation time; keep consecutive ones apart
+    time.sleep(0.05)
+    return path
+
+
+@pytest.fixture
+def bot(tmp_path, monkeypatch):
+    monkeypatch.setattr(chatbot, "ANSWER_CACHE_PATH", "")
+    monkeypatch.setattr(chatbot, "find_latest_snapshot", lambda: find_latest_snapshot(str(tmp_path)))
+    write_snapshot(tmp_path, "20250101_000000", "kalpana")
+    return chatbot.MOSDACChatbot(StubBackend())
+
+
+def urls(results):
+    return [result["url"] for result in results]
+
+
+def test_newer_snapshot_is_swapped_in(bot, tmp_path):
+    assert not bot.reload_if_changed()
+    old_kb = bot.kb
+    assert urls(bot.search_relevant_content("kalpana observations"))[0].startswith("https://www.mosdac.gov.in/kalpana-")
+
+    write_snapshot(tmp_path, "20250102_000000", "scatsat")
+    assert bot.reload_if_changed()
+    assert bot.kb is not old_kb
+    assert bot.kb.version.startswith("pages_20250102_000000.json@")
+    assert bot.kb.loaded_from == "artifact"
+    assert not bot.reload_if_changed()
+
+    # New searches see the new snapshot (not cached results of the old one) ...
+    assert urls(bot.search_relevant_content("scatsat observations"))[0].startswith("https://www.mosdac.gov.in/scatsat-")
+    assert not any(url.startswith("https://www.mosdac.gov.in/kalpana-") for url in urls(bot.search_relevant_content("kalpana observations")))
+    # ... while a search holding the old one still finishes on it
+    assert len(old_kb.pages) == 3
+    assert old_kb.pages[0]["url"] == "https://www.mosdac.gov.in/kalpana-0"
+
+
+def test_unreadable_snapshot_keeps_the_current_one(bot, tmp_path):
+    version = bot.kb.version
+    broken = tmp_path / "pages_20250103_000000.json"
+    broken.write_text('[{"url": "https://www.mosdac.gov.in/half', encoding="utf-8")
+    assert not bot.reload_if_changed()
+    assert bot.kb.version == version
+
+    # Retried on the next check once the snapshot is complete
+    write_snapshot(tmp_path, "20250103_000000", "oceansat")
+    assert bot.reload_if_changed()
+    assert bot.kb.version.startswith("pages_20250103_000000.json@")
+
+
+def test_auto_reload_polls_for_snapshots(bot, tmp_path):
+    bot.start_auto_reload(interval=0.05)
+    try:
+        write_snapshot(tmp_path, "20250104_000000", "megha")
+        deadline = time.time() + 30
+        while not bot.kb.version.startswith("pages_20250104_000000.json@") and time.time() < deadline:
+            time.sleep(0.05)
+        assert bot.kb.version.startswith("pages_20250104_000000.json@")
+    finally:
+        # The polling thread outlives the test; keep it away from the real data directory
+        bot.reload_if_changed = lambda: False
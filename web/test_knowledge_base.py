@@ -0,0 +1,87 @@
+"""
+Loading snapshots through the compiled knowledge base artifact
+
+Run from the web directory: python -m pytest test_knowledge_base.py
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+from dense_index import DenseIndex
+from knowledge_base import KnowledgeBase, artifact_path, compile_in_subprocess, snapshot_version
+
+
+def write_snapshot(directory, pages, name="pages_20250101_000000.json"):
+    path = str(directory / name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(pages, f)
+    return path
+
+
+@pytest.mark.parametrize("pages", [
+    [],
+    [{"url": "https://www.mosdac.gov.in/only-title", "title": "Only a title"}],
+])
+def test_tiny_snapshots_compile_and_load(tmp_path, pages):
+    path = write_snapshot(tmp_path, pages)
+    kb = KnowledgeBase.load(path)
+    assert kb.loaded_from == "artifact"
+    assert len(kb.pages) == len(pages)
+    assert [page["title"] for page in kb.pages] == [page["title"] for page in pages]
+
+    # A second load maps the artifact the first one wrote
+    assert KnowledgeBase.load_compiled(path, snapshot_version(path)) is not None
+
+
+def test_compile_failure_falls_back_to_memory(tmp_path, monkeypatch):
+    def fail(self):
+        raise RuntimeError("disk on fire")
+    monkeypatch.setattr(KnowledgeBase, "compile", fail)
+
+    path = write_snapshot(tmp_path, [{"url": "https://www.mosdac.gov.in/a", "title": "INSAT-3DR imager"}])
+    kb = KnowledgeBase.load(path)
+    assert kb.loaded_from == "json"
+    assert len(kb.pages) == 1
+
+
+def test_subprocess_build_maps_the_artifact(tmp_path):
+    path = write_snapshot(tmp_path, [{"url": "https://www.mosdac.gov.in/a", "title": "INSAT-3DR imager"}])
+    kb = KnowledgeBase.load(path, build_in_subprocess=True)
+    assert kb.loaded_from == "artifact"
+    assert kb.pages[0]["title"] == "INSAT-3DR imager"
+
+    # A fresh artifact is mapped as it is, not compiled again
+    inode = os.stat(artifact_path(path)).st_ino
+    assert compile_in_subprocess(path)
+    assert os.stat(artifact_path(path)).st_ino == inode
+
+
+def test_dense_vectors_are_deterministic():
+    texts = [f"INSAT-3DR imager channel {n} measures {topic}" for n, topic in
+             enumerate(["cloud", "water vapour", "sea surface temperature", "rainfall", "fog", "snow"] * 10)]
+    first, second = DenseIndex.build(texts, dimensions=8), DenseIndex.build(texts, dimensions=8)
+    np.testing.assert_array_equal(first.vectors, second.vectors)
+    np.testing.assert_array_equal(first.components, second.components)
+
+
+def test_compile_keeps_dense_vectors_only_in_the_artifact(tmp_path):
+    pages = [{"url": f"https://www.mosdac.gov.in/p{n}", "title": f"Page {n}", "main_content": f"ocean salinity product {n} " * 20}
+             for n in range(5)]
+    old = write_snapshot(tmp_path, pages, "pages_20250101_000000.json")
+    KnowledgeBase.load(old)
+    legacy = [str(tmp_path / f"pages_20250101_000000{suffix}") for suffix in (".dense.npy", ".dense_components.npy", ".dense.meta")]
+    for path in legacy:
+        open(path, "wb").close()
+
+    time.sleep(0.05)
+    new = write_snapshot(tmp_path, pages, "pages_20250102_000000.json")
+    kb = KnowledgeBase.load(new)
+    assert kb.loaded_from == "artifact"
+    assert kb.dense_index is not None and kb.dense_index.vectors.shape[0] == len(kb.passages)
+    assert sorted(os.listdir(tmp_path)) == [
+        "pages_20250101_000000.json", "pages_20250102_000000.json", "pages_20250102_000000.kb", "pages_20250102_000000.kb.lock",
+    ]
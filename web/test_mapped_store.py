@@ -0,0 +1,63 @@
+"""
+Round trips through the compiled-artifact file format
+
+Run from the web directory: python -m pytest test_mapped_store.py
+"""
+
+import numpy as np
+
+from mapped_store import JSONRecords, MappedPostings, MappedStore, json_arrays, postings_arrays, write_store
+
+
+def test_arrays_round_trip(tmp_path):
+    path = str(tmp_path / "store.kb")
+    arrays = {
+        "ids": np.arange(10, dtype=np.int32),
+        "matrix": np.arange(12, dtype=np.float32).reshape(3, 4),
+        "strided": np.arange(20, dtype=np.int64)[::2],
+    }
+    write_store(path, arrays, {"format": 1, "name": "test"})
+
+    store = MappedStore(path)
+    assert store.meta == {"format": 1, "name": "test"}
+    for name, array in arrays.items():
+        assert store.array(name).dtype == array.dtype
+        np.testing.assert_array_equal(store.array(name), array)
+
+
+def test_empty_arrays_round_trip(tmp_path):
+    path = str(tmp_path / "store.kb")
+    arrays = {
+        "empty": np.empty(0, dtype=np.int32),
+        "no_rows": np.empty((0, 2), dtype=np.int32),
+        "no_columns": np.empty((5, 0), dtype=np.float32),
+        "after": np.array([7, 8, 9], dtype=np.int64),
+    }
+    write_store(path, arrays, {})
+
+    store = MappedStore(path)
+    for name, array in arrays.items():
+        assert store.array(name).shape == array.shape
+        np.testing.assert_array_equal(store.array(name), array)
+
+
+def test_records_and_postings_round_trip(tmp_path):
+    path = str(tmp_path / "store.kb")
+    records = [{"title": "INSAT-3DR", "tags": ["imager"]}, {"title": "Oceansat-3 – OCM"}, {}]
+    postings = {"insat": [0, 2], "ocean": [1], "sst": []}
+    write_store(path, {**json_arrays("records", records), **postings_arrays("postings", postings)}, {})
+
+    store = MappedStore(path)
+    assert list(JSONRecords(store, "records")) == records
+    mapped = MappedPostings(store, "postings")
+    assert len(mapped) == 3
+    for term, ids in postings.items():
+        assert term in mapped
+        assert list(mapped.get(term)) == ids
+    assert "missing" not in mapped
+    assert mapped.get("missing") is None
+
+    write_store(path, {**json_arrays("records", []), **postings_arrays("postings", {})}, {})
+    store = MappedStore(path)
+    assert len(JSONRecords(store, "records")) == 0
+    assert len(MappedPostings(store, "postings")) == 0
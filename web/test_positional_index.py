@@ -0,0 +1,55 @@
+"""
+Exact phrases and term proximity over token positions
+
+Run from the web directory: python -m pytest test_positional_index.py
+"""
+
+import numpy as np
+
+from mapped_store import MappedStore, write_store
+from positional_index import PositionalIndex
+
+TEXTS = [
+    "Sea surface temperature from the imager",
+    "Temperature of the sea surface",
+    "Surface sea temperature maps",
+    "Rainfall estimates",
+    "Cloud motion vectors",
+    "Soil moisture products",
+    "Wind speed over land",
+    "Snow cover fraction",
+]
+
+
+def test_phrases_match_words_in_order():
+    index = PositionalIndex.build(TEXTS)
+    assert index.phrase_docs(["sea", "surface", "temperature"]).tolist() == [0]
+    assert index.phrase_docs(["sea", "surface"]).tolist() == [0, 1]
+    assert index.phrase_docs(["sea", "surface"], np.array([1, 2])).tolist() == [1]
+    assert index.phrase_docs(["surface", "sea"]).tolist() == [2]
+    assert index.phrase_docs(["snow", "temperature"]).tolist() == []
+    assert index.phrase_docs(["unknown", "words"]).tolist() == []
+
+
+def test_proximity_scores_ordered_nearby_pairs():
+    index = PositionalIndex.build(TEXTS)
+    scores = index.proximity(["sea", "surface", "temperature"], [0, 1, 2, 3])
+    np.testing.assert_allclose(scores, [1.0, 0.5, 0.5, 0.0])
+
+
+def test_matches_locate_words_in_the_text():
+    index = PositionalIndex.build(TEXTS)
+    spans = index.token_spans(0)
+    found = [(TEXTS[0][spans[position][0]:spans[position][1]], word) for position, word in index.matches(["sea", "imager"], 0)]
+    assert found == [("Sea", "sea"), ("imager", "imager")]
+
+
+def test_mapped_index_matches_the_built_one(tmp_path):
+    for texts in (TEXTS, [], ["Only"]):
+        index = PositionalIndex.build(texts)
+        arrays, meta = index.to_arrays("positions")
+        path = str(tmp_path / "positions.kb")
+        write_store(path, arrays, {})
+        mapped = PositionalIndex.from_store(MappedStore(path), "positions", meta)
+        for words in (["sea", "surface"], ["surface", "sea"], ["only", "word"]):
+            assert mapped.phrase_docs(words).tolist() == index.phrase_docs(words).tolist()
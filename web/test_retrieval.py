@@ -0,0 +1,109 @@
+"""
+Retrieval over the bundled snapshot: facets, and search and prompt details reported per call
+
+Run from the web directory: python -m pytest test_retrieval.py
+"""
+
+import pytest
+
+import chatbot
+from context_builder import estimate_tokens
+from generation import StubBackend
+
+
+@pytest.fixture(scope="module")
+def bot():
+    previous = chatbot.ANSWER_CACHE_PATH
+    chatbot.ANSWER_CACHE_PATH = ""
+    try:
+        yield chatbot.MOSDACChatbot(StubBackend())
+    finally:
+        chatbot.ANSWER_CACHE_PATH = previous
+
+
+def test_search_timings_are_returned_per_call(bot):
+    first, second = {}, {}
+    bot.search_relevant_content("INSAT-3DR imager spatial resolution", info=first)
+    bot.search_relevant_content("ocean surface salinity products", info=second)
+    assert set(first["timings"]) == {"lexical_ms", "dense_ms", "fusion_ms"}
+    assert set(second["timings"]) == {"lexical_ms", "dense_ms", "fusion_ms"}
+    assert first["timings"] is not second["timings"]
+    assert not hasattr(bot, "last_search_timings")
+
+
+def tagged_urls(bot, facets):
+    """URLs of the pages carrying the given facets"""
+    return {bot.kb.pages[page_id]["url"] for page_id in bot.kb.filter_pages(facets)}
+
+
+def test_explicit_filters_restrict_results(bot):
+    filters = {"mission": ["insat-3dr"]}
+    info = {}
+    results = bot.search_relevant_content("satellite data products", filters=filters, info=info)
+    assert info["facets"] == filters
+    assert results
+    assert {result["url"] for result in results} <= tagged_urls(bot, filters)
+
+
+def test_mentioned_facets_boost_without_filtering(bot, monkeypatch):
+    query = "How do I download INSAT-3DR data?"
+    tagged = tagged_urls(bot, {"mission": ["insat-3dr"]})
+    info = {}
+    boosted = [result["url"] for result in bot.search_relevant_content(query, info=info)]
+    assert info["facets"]["mission"] == ["insat-3dr"]
+    assert boosted[0] in tagged
+    assert any(url not in tagged for url in boosted)
+
+    monkeypatch.setattr(chatbot, "AUTO_FACET_BOOST", 0.0)
+    bot.search_cache.clear()
+    plain = [result["url"] for result in bot.search_relevant_content(query)]
+    assert sum(url in tagged for url in boosted) > sum(url in tagged for url in plain)
+
+
+def test_search_facets_are_returned_per_call(bot):
+    first, second = {}, {}
+    bot.search_relevant_content("INSAT-3DR cloud products", info=first)
+    bot.search_relevant_content("Oceansat-3 chlorophyll", filters={"category": ["ocean"]}, info=second)
+    assert first["facets"]["mission"] == ["insat-3dr"]
+    assert second["facets"] == {"category": ["ocean"]}
+    assert not hasattr(bot, "last_search_facets")
+
+
+def test_prompt_stats_are_returned_per_call(bot):
+    docs = bot.search_relevant_content("INSAT-3DR imager channels")
+    info = {}
+    prompt = bot.build_prompt("What does the INSAT-3DR imager measure?", docs, info=info)
+    stats = info["prompt_stats"]
+    assert stats["prompt_tokens"] == estimate_tokens(prompt)
+    assert 0 < stats["context_tokens"] <= stats["token_budget"]
+    assert not hasattr(bot, "last_prompt_stats")
+
+
+def test_misspelled_and_joined_words_find_the_page(bot):
+    query, words = bot._expand_query(bot.kb, "insat3dr imagr")
+    assert {"insat", "3dr", "imager"} <= words
+    for query in ("insat3dr imagr", "INSAT-3DR imager"):
+        assert bot.search_relevant_content(query)[0]["url"].endswith("/insat-3dr")
+
+
+def phrase_pages(bot, words):
+    """URLs of the pages with a passage containing words as a phrase"""
+    kb = bot.kb
+    return {kb.pages[int(kb.passage_page_ids[passage_id])]["url"] for passage_id in kb.positional_index.phrase_docs(words)}
+
+
+def test_quoted_phrases_restrict_results(bot):
+    pages = phrase_pages(bot, ["sea", "surface", "temperature"])
+    plain = bot.search_relevant_content("sea surface temperature data access")
+    assert any(result["url"] not in pages for result in plain)
+    # Served after the unquoted query, whose words it shares
+    quoted = bot.search_relevant_content('"sea surface temperature" data access')
+    assert quoted and {result["url"] for result in quoted} <= pages
+
+
+def test_phrase_found_nowhere_is_ignored(bot):
+    assert not phrase_pages(bot, ["temperature", "surface", "sea"])
+    quoted = bot.search_relevant_content('"temperature surface sea" imagery')
+    bot.search_cache.clear()
+    plain = bot.search_relevant_content("temperature surface sea imagery")
+    assert [result["url"] for result in quoted] == [result["url"] for result in plain]
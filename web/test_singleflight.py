@@ -0,0 +1,81 @@
+"""
+Coalescing of concurrent identical calls
+
+Run from the web directory: python -m pytest test_singleflight.py
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_threads_share_one_call():
+    flight = SingleFlight()
+    runs = []
+
+    def work():
+        runs.append(1)
+        time.sleep(0.1)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("q", work))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["answer"] * 5
+    assert len(runs) == 1
+    assert flight.stats()["coalesced"] == 4
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_async_callers_share_results_and_errors():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        async def fail():
+            await asyncio.sleep(0.05)
+            raise ValueError("boom")
+
+        assert await asyncio.gather(*(flight.do("q", work) for _ in range(4))) == ["answer"] * 4
+        assert len(runs) == 1
+        results = await asyncio.gather(*(flight.do("bad", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(result, ValueError) for result in results)
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def scenario():
+        flight = AsyncSingleFlight()
+        runs = []
+
+        async def work():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "answer"
+
+        leader = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("q", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "answer"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert len(runs) == 1
+        assert flight.stats()["in_flight"] == 0
+
+    asyncio.run(scenario())